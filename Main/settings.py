@@ -13,9 +13,19 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from tournifyx.log import logging_config, parse_levels
+from tournifyx.sqlite import database_options
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# A .env file fills in environment variables that are not already set. It is read here, once;
+# python-dotenv is only imported when there is one. BASE_DIR.parent is the older location.
+for _env_file in (BASE_DIR / '.env', BASE_DIR.parent / '.env'):
+    if _env_file.is_file():
+        from dotenv import load_dotenv
+        load_dotenv(_env_file)
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -43,25 +53,44 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tournifyx.assets.AssetMiddleware',
+    'tournifyx.perf.PerformanceMiddleware',
+    'tournifyx.replica.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tournifyx.profiles.ProfileMiddleware',
+    'tournifyx.sqlite.WriteGateMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Number of recent requests kept in memory for the /perf/ page
+PERF_RING_SIZE = 2000
+
+# Seconds a user's UserProfile/HostProfile stay in the 'profiles' cache (0 disables the cache).
+# Saves only invalidate the saving process's copy: set this only with a shared 'profiles' backend.
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', '0'))
+
 ROOT_URLCONF = 'Main.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'tournifyx.perf.TimedDjangoTemplates',
         'DIRS': [
             BASE_DIR / 'templates',
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Parsed templates are kept for the life of the process; runserver's autoreloader still
+            # drops them when a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -77,13 +106,60 @@ WSGI_APPLICATION = 'Main.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLITE_PRODUCTION=1 enables WAL, tuned pragmas, BEGIN IMMEDIATE and the single-writer gate
+SQLITE_PRODUCTION = os.getenv('SQLITE_PRODUCTION') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'tournifyx.sqlite' if SQLITE_PRODUCTION else 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': database_options() if SQLITE_PRODUCTION else {},
     }
 }
 
+# Rows of tournaments finished more than ARCHIVE_AFTER_DAYS ago move here (manage.py archive_tournaments)
+DATABASES['archive'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.getenv('ARCHIVE_DATABASE', str(BASE_DIR / 'archive.sqlite3')),
+}
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))
+
+# Deleted tournaments can be restored for DELETE_UNDO_MINUTES, then manage.py purge_deleted_tournaments removes them
+DELETE_UNDO_MINUTES = int(os.getenv('DELETE_UNDO_MINUTES', '10'))
+
+# Payment senders with this many submissions within PAYMENT_VELOCITY_HOURS are flagged to hosts
+PAYMENT_VELOCITY_LIMIT = int(os.getenv('PAYMENT_VELOCITY_LIMIT', '3'))
+PAYMENT_VELOCITY_HOURS = int(os.getenv('PAYMENT_VELOCITY_HOURS', '24'))
+
+# Card payments go through Stripe Checkout when STRIPE_SECRET_KEY is set; its webhook events are
+# verified with STRIPE_WEBHOOK_SECRET and applied by manage.py process_stripe_events
+STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
+STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+STRIPE_CURRENCY = os.getenv('STRIPE_CURRENCY', 'bdt')
+
+# Import time a worker may spend before its first response (manage.py importtime; the startup test allows 3x)
+STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', '1000'))
+
+# DB_REPLICA=<path> adds a read replica: a SQLite copy of the primary rebuilt every
+# REPLICA_REFRESH_SECONDS. A client that wrote reads from the primary for REPLICA_PIN_SECONDS,
+# which must exceed the refresh interval for read-your-writes to hold.
+DB_REPLICA = os.getenv('DB_REPLICA', '')
+if DB_REPLICA:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_REPLICA,
+        'OPTIONS': {'init_command': 'PRAGMA query_only=ON'},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['tournifyx.archive.ArchiveRouter', 'tournifyx.replica.ReplicaRouter']
+REPLICA_REFRESH_SECONDS = int(os.getenv('REPLICA_REFRESH_SECONDS', '5'))
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '15'))
+
+# Write transactions allowed to queue for the writer, and how long each may wait, before a 503
+WRITE_GATE_QUEUE = int(os.getenv('WRITE_GATE_QUEUE', '64'))
+WRITE_GATE_TIMEOUT = float(os.getenv('WRITE_GATE_TIMEOUT', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -95,6 +171,55 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Caches: LocMem that also counts hits/misses for /metrics
+CACHES = {
+    'default': {
+        'BACKEND': 'tournifyx.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'default',
+    },
+    # Rendered template regions ({% fragment %}), kept apart so large entries cannot evict profiles
+    'fragments': {
+        'BACKEND': 'tournifyx.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'fragments',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Users' profiles (profiles.py); must be a shared backend for PROFILE_CACHE_TIMEOUT > 0 with several workers
+    'profiles': {
+        'BACKEND': 'tournifyx.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'profiles',
+    },
+    # Whole pages (pagecache.cache_page); point at a shared backend to rebuild once across workers
+    'pages': {
+        'BACKEND': 'tournifyx.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+}
+
+# Seconds a rendered fragment is kept. Its key changes with the data it shows, so this only bounds
+# memory; 0 renders every fragment on every request.
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '3600'))
+
+# Seconds a cached page is served as is, then how much longer it may be served stale while one
+# request renders it again. PAGE_CACHE_SECONDS=0 turns page caching off.
+PAGE_CACHE_SECONDS = int(os.getenv('PAGE_CACHE_SECONDS', '60'))
+PAGE_CACHE_STALE_SECONDS = int(os.getenv('PAGE_CACHE_STALE_SECONDS', '600'))
+
+# Metrics: directory shared by all WSGI workers for the per-process sample files.
+# Leave unset to keep metrics in memory for a single process.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Logging: JSON lines on stderr. LOG_LEVEL is the tournifyx loggers' level (Django's stay at
+# WARNING); LOG_LEVELS sets per-module levels, e.g. "tournifyx.views=DEBUG,django.request=INFO";
+# LOG_ASYNC=1 writes from a background thread.
+LOGGING = logging_config(
+    level=os.environ.get('LOG_LEVEL', 'INFO'),
+    module_levels=parse_levels(os.environ.get('LOG_LEVELS', '')),
+    use_queue=os.environ.get('LOG_ASYNC', '') == '1',
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -122,6 +247,21 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Pre-rendered pages and JSON of finished tournaments (tournifyx.snapshots). Not under MEDIA_ROOT:
+# media is served publicly, snapshots only through the views that check login and access.
+SNAPSHOT_ROOT = os.getenv('SNAPSHOT_ROOT', os.path.join(BASE_DIR, 'snapshots'))
+
+# SERVE_ASSETS=1: this process serves /static/ and /media/ itself (tournifyx.assets), so no separate
+# web server is needed. collectstatic then stores content-hashed names with gzip/brotli copies.
+SERVE_ASSETS = os.getenv('SERVE_ASSETS') == '1'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'tournifyx.assets.CompressedManifestStaticFilesStorage' if SERVE_ASSETS
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
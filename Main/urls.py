@@ -18,17 +18,16 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path
-from tournifyx import views
-from tournifyx.views import *
+from tournifyx import views, api, metrics, perf
 from django.conf import settings
 from django.conf.urls.static import static
 
 
 urlpatterns = [
-   path('', home, name='home'),
-   path('login/', login, name='login'),
-   path('register/', register, name='register'),
-   path('logout/', logout, name='logout'),
+   path('', views.home, name='home'),
+   path('login/', views.login, name='login'),
+   path('register/', views.register, name='register'),
+   path('logout/', views.logout, name='logout'),
    path('admin/', admin.site.urls),
    path('host-tournament/', views.host_tournament, name='host_tournament'),
    path('join-tournament/', views.join_tournament, name='join_tournament'),
@@ -37,6 +36,8 @@ urlpatterns = [
    path('leave-request/<int:request_id>/approve/', views.approve_leave_request, name='approve_leave_request'),
    path('leave-request/<int:request_id>/reject/', views.reject_leave_request, name='reject_leave_request'),
    path('tournament/<int:tournament_id>/toggle-status/', views.toggle_tournament_status, name='toggle_tournament_status'),
+   path('tournament/<int:tournament_id>/schedule/', views.schedule_matches, name='schedule_matches'),
+   path('match/<int:match_id>/delay/', views.delay_match, name='delay_match'),
    path('tournament/<int:tournament_id>/toggle-visibility/', views.toggle_tournament_visibility, name='toggle_tournament_visibility'),
    #path('tournament/<int:tournament_id>/add-participant/', views.add_participant, name='add_participant'),
    path('user-tournaments/', views.user_tournaments, name='user_tournaments'),
@@ -48,20 +49,34 @@ urlpatterns = [
    path('payment/confirm/<int:payment_id>/', views.payment_confirmation, name='payment_confirmation'),
    path('payment/success/<int:tournament_id>/', views.payment_success, name='payment_success'),
    path('payment/cancel/<int:tournament_id>/', views.payment_cancel, name='payment_cancel'),
+   path('payment/stripe/webhook/', views.stripe_webhook, name='stripe_webhook'),
    path('payment/<int:payment_id>/approve/', views.approve_payment, name='approve_payment'),
    path('payment/<int:payment_id>/reject/', views.reject_payment, name='reject_payment'),
+   path('payment/queue/', views.payment_queue, name='payment_queue'),
+   path('payment/flags/', views.payment_flags, name='payment_flags'),
    path('public-tournaments/', views.public_tournaments, name='public_tournaments'),
    path('public-tournaments-link/', views.public_tournaments, name='public_tournaments_link'),
    path('join-public-tournament/<int:tournament_id>/', views.join_public_tournament, name='join_public_tournament'),
    path('match/<int:match_id>/update/', views.update_match_result, name='update_match_result'),
+   path('tournament/<int:tournament_id>/results/bulk/', views.bulk_update_match_results, name='bulk_update_match_results'),
    path('tournament/<int:tournament_id>/knockout-json/', views.tournament_knockout_json, name='tournament_knockout_json'),
    path('tournament/<int:tournament_id>/regenerate/', views.regenerate_fixtures, name='regenerate_fixtures'),
+   path('profile/', views.my_profile, name='my_profile'),
    path('profile/<str:username>/', views.profile_view, name='profile_view'),
    path('api/get-profile-phone/', views.get_profile_phone, name='get_profile_phone'),
+   path('api/v1/tournaments/', api.tournament_list, name='api_tournament_list'),
+   path('api/v1/me/tournaments/', api.my_tournaments, name='api_my_tournaments'),
+   path('api/v1/tournaments/<int:tournament_id>/', api.tournament_detail, name='api_tournament_detail'),
+   path('api/v1/tournaments/<int:tournament_id>/players/', api.tournament_players, name='api_tournament_players'),
+   path('api/v1/tournaments/<int:tournament_id>/matches/', api.tournament_matches, name='api_tournament_matches'),
+   path('api/v1/tournaments/<int:tournament_id>/standings/', api.tournament_standings, name='api_tournament_standings'),
+   path('perf/', perf.perf_dashboard, name='perf_dashboard'),
+   path('metrics', metrics.metrics_view, name='metrics'),
    #path('payment/success/<int:tournament_id>/', views.payment_success, name='payment_success'),
    #path('payment/cancel/<int:tournament_id>/', views.payment_cancel, name='payment_cancel'),
    
 ]
 
+# Outside DEBUG, SERVE_ASSETS=1 has tournifyx.assets.AssetMiddleware serve /static/ and /media/
 if settings.DEBUG:
    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,410 @@
+"""
+Read-only JSON API (v1) for tournaments, players, matches and standings.
+
+Every resource is described by a field map of API name -> ORM lookup. Querysets are
+built with .values() over only the requested lookups, so a sparse fieldset
+(`?fields=id,name`) joins only the related tables it actually needs - the same SQL
+select_related would produce, without instantiating model objects.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from . import snapshots
+from . import archive
+from .replica import replica_reads
+from .models import Match, Player, PointTable, Tournament, TournamentParticipant
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+TOURNAMENT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'category': 'category',
+    'match_type': 'match_type',
+    'num_participants': 'num_participants',
+    'player_count': 'player_count',  # annotation, see _tournament_queryset
+    'is_public': 'is_public',
+    'is_active': 'is_active',
+    'is_paid': 'is_paid',
+    'price': 'price',
+    'is_finished': 'is_finished',
+    'registration_deadline': 'registration_deadline',
+    'host': 'created_by__user__username',
+}
+
+# The signed-in user's own tournaments: adds the join code and the card status
+MY_TOURNAMENT_FIELDS = {
+    **{name: lookup for name, lookup in TOURNAMENT_FIELDS.items() if name != 'host'},
+    'code': 'code',
+    'status': 'status',  # annotation, see TournamentQuerySet.with_card_info
+}
+
+PLAYER_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'ign': 'ign',
+    'team_name': 'team_name',
+    'username': 'user_profile__user__username',
+}
+
+MATCH_FIELDS = {
+    'id': 'id',
+    'round': 'round_number',
+    'stage': 'stage',
+    'player1_id': 'player1_id',
+    'player1': 'player1__name',
+    'player2_id': 'player2_id',
+    'player2': 'player2__name',
+    'winner_id': 'winner_id',
+    'winner': 'winner__name',
+    'is_draw': 'is_draw',
+    'scheduled_time': 'scheduled_time',
+    'parent_match1_id': 'parent_match1_id',
+    'parent_match2_id': 'parent_match2_id',
+}
+
+STANDING_FIELDS = {
+    'player_id': 'player_id',
+    'player': 'player__name',
+    'matches_played': 'matches_played',
+    'wins': 'wins',
+    'draws': 'draws',
+    'losses': 'losses',
+    'points': 'points',
+}
+
+# Keyset orderings: (ORM field, descending?) - the last entry must be unique
+TOURNAMENT_ORDER = [('id', True)]
+PLAYER_ORDER = [('id', False)]
+MATCH_ORDER = [('round_number', False), ('id', False)]
+STANDING_ORDER = [('points', True), ('wins', True), ('id', False)]
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# ==============================
+# 🔸 Helpers
+# ==============================
+def _json_response(request, payload, max_age=15, private=False):
+    """
+    Serialize `payload` with an ETag, answering 304 when the client already has it.
+    Private (per-user) payloads are revalidated on every use and kept out of shared caches.
+    """
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    if private:
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def _error(message, status=400):
+    return HttpResponse(json.dumps({'error': message}), content_type='application/json', status=status)
+
+
+def _api_view(view):
+    """GET-only view wrapper that reads from the replica and turns ApiError into a JSON error response."""
+    @require_GET
+    @replica_reads
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as e:
+            return _error(e.message, e.status)
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+def _requested_fields(request, field_map, kind, primary=True):
+    """
+    Resolve the sparse fieldset for `kind` from `fields[kind]=` (or plain `fields=`
+    for the primary resource). Returns the list of API field names.
+    """
+    raw = request.GET.get(f'fields[{kind}]')
+    if raw is None and primary:
+        raw = request.GET.get('fields')
+    if not raw:
+        return list(field_map)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in field_map]
+    if unknown:
+        raise ApiError(f"Unknown {kind} field(s): {', '.join(unknown)}")
+    return names
+
+
+def _select(queryset, field_map, names):
+    """Return rows for `names`, renaming ORM lookups back to API names."""
+    lookups = [field_map[name] for name in names]
+    return [
+        {name: row[lookup] for name, lookup in zip(names, lookups)}
+        for row in queryset.values(*lookups)
+    ]
+
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, ordering):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ApiError('Invalid cursor.')
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ApiError('Invalid cursor.')
+    return values
+
+
+def _keyset_filter(ordering, values):
+    """Q selecting rows strictly after `values` in `ordering` (row-value comparison)."""
+    condition = models.Q()
+    equal = models.Q()
+    for (field, descending), value in zip(ordering, values):
+        op = 'lt' if descending else 'gt'
+        condition |= equal & models.Q(**{f'{field}__{op}': value})
+        equal &= models.Q(**{field: value})
+    return condition
+
+
+def _paginate(request, queryset, field_map, names, ordering):
+    """Cursor-paginate `queryset`; returns {'data': [...], 'next_cursor': str|None}."""
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError('limit must be an integer.')
+
+    queryset = queryset.order_by(*[('-' if desc else '') + field for field, desc in ordering])
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_keyset_filter(ordering, _decode_cursor(cursor, ordering)))
+
+    # Fetch the ordering keys alongside the requested fields to build the next cursor
+    lookups = list(dict.fromkeys([field_map[name] for name in names] + [field for field, _ in ordering]))
+    # The player_count annotation only sees the primary; archived players are counted where they live
+    archived_counts = queryset.model is Tournament and 'player_count' in names
+    if archived_counts:
+        lookups += ['archived_at']
+    rows = list(queryset.values(*lookups)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1][field] for field, _ in ordering])
+    if archived_counts:
+        counts = archive.player_counts([row['id'] for row in rows if row['archived_at']])
+        for row in rows:
+            row['player_count'] = counts.get(row['id'], row['player_count'])
+
+    data = [{name: row[field_map[name]] for name in names} for row in rows]
+    return {'data': data, 'next_cursor': next_cursor}
+
+
+def _tournament_queryset(names):
+    queryset = Tournament.objects.all()
+    if 'player_count' in names:
+        queryset = queryset.annotate(player_count=models.Count('player'))
+    return queryset
+
+
+def _check_visible(request, tournament_id, public, host_user_id, participant_user_ids=None):
+    """
+    Same rule as tournament_list: only public, active tournaments are open to everyone. The others
+    are served to their host and participants only, and are "not found" for anyone else. Returns
+    whether the response may be cached publicly.
+    """
+    if public:
+        return True
+    user = request.user
+    if user.is_authenticated:
+        if participant_user_ids is None:
+            participant = TournamentParticipant.objects.filter(tournament_id=tournament_id, user_profile__user=user).exists()
+        else:
+            participant = user.id in participant_user_ids
+        if user.id == host_user_id or participant:
+            return False
+    raise ApiError('Tournament not found.', status=404)
+
+
+def _get_tournament(request, tournament_id):
+    """(tournament, public) for a tournament the requester may see; raises ApiError 404 otherwise."""
+    tournament = Tournament.objects.select_related('created_by').only(
+        'id', 'is_finished', 'archived_at', 'is_public', 'is_active', 'created_by__user_id',
+    ).filter(id=tournament_id).first()
+    if tournament is None:
+        raise ApiError('Tournament not found.', status=404)
+    public = _check_visible(request, tournament.id, tournament.is_public and tournament.is_active,
+                            tournament.created_by.user_id)
+    archive.note(tournament.id, tournament.archived_at)
+    return tournament, public
+
+
+def _max_age(tournament):
+    # Finished tournaments no longer change, so clients may keep them longer
+    return 300 if tournament.is_finished else 15
+
+
+# ==============================
+# 🔸 Endpoints
+# ==============================
+@_api_view
+def tournament_list(request):
+    """Public tournaments, newest first. Filters: category, match_type, is_finished."""
+    names = _requested_fields(request, TOURNAMENT_FIELDS, 'tournaments')
+    queryset = _tournament_queryset(names).filter(is_public=True, is_active=True)
+    for param in ('category', 'match_type'):
+        if request.GET.get(param):
+            queryset = queryset.filter(**{param: request.GET[param].lower()})
+    if request.GET.get('is_finished') in ('true', 'false'):
+        queryset = queryset.filter(is_finished=request.GET['is_finished'] == 'true')
+    return _json_response(request, _paginate(request, queryset, TOURNAMENT_FIELDS, names, TOURNAMENT_ORDER))
+
+
+@_api_view
+def my_tournaments(request):
+    """
+    The signed-in user's tournaments, newest first, for incremental loading of "My Tournaments":
+    `?role=hosted` (latest tournament per name, the default) or `?role=joined`.
+    """
+    if not request.user.is_authenticated:
+        raise ApiError('Authentication required.', status=401)
+    host_profile = request.host_profile or None
+    role = request.GET.get('role', 'hosted')
+    if role == 'hosted':
+        queryset = Tournament.objects.none()
+        if host_profile:
+            queryset = Tournament.objects.filter(created_by=host_profile).latest_per_name()
+    elif role == 'joined':
+        queryset = Tournament.objects.joined_by(request.user_profile or None).exclude(created_by=host_profile)
+    else:
+        raise ApiError('role must be "hosted" or "joined".')
+    names = _requested_fields(request, MY_TOURNAMENT_FIELDS, 'tournaments')
+    page = _paginate(request, queryset.with_card_info(), MY_TOURNAMENT_FIELDS, names, TOURNAMENT_ORDER)
+    return _json_response(request, page, private=True)
+
+
+def _include_rows(tournament_id, include, names):
+    if include == 'players':
+        queryset = Player.objects.filter(tournament_id=tournament_id).order_by('id')
+        return _select(queryset, PLAYER_FIELDS, names)
+    if include == 'matches':
+        queryset = Match.objects.filter(tournament_id=tournament_id).order_by('round_number', 'id')
+        return _select(queryset, MATCH_FIELDS, names)
+    queryset = PointTable.objects.filter(tournament_id=tournament_id).order_by('-points', '-wins', 'id')
+    return _select(queryset, STANDING_FIELDS, names)
+
+
+INCLUDE_FIELDS = {'players': PLAYER_FIELDS, 'matches': MATCH_FIELDS, 'standings': STANDING_FIELDS}
+
+
+def full_tournament_payload(tournament_id):
+    """Detail payload with every field and every include (used for finished-tournament snapshots)."""
+    names = list(TOURNAMENT_FIELDS)
+    payload = {'data': _select(_tournament_queryset(names).filter(id=tournament_id), TOURNAMENT_FIELDS, names)[0]}
+    for include, field_map in INCLUDE_FIELDS.items():
+        payload[include] = _include_rows(tournament_id, include, list(field_map))
+    return payload
+
+
+@_api_view
+@archive.archive_reads
+def tournament_detail(request, tournament_id):
+    """
+    One tournament. `?include=players,matches,standings` embeds those collections in
+    full, one query each, so a whole tournament costs the same number of queries at any size.
+    """
+    includes = [name.strip() for name in request.GET.get('include', '').split(',') if name.strip()]
+    unknown = [name for name in includes if name not in INCLUDE_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown include(s): {', '.join(unknown)}")
+
+    # Finished tournaments without a sparse fieldset come straight from the snapshot
+    if not any(key.startswith('fields') for key in request.GET):
+        archived = snapshots.read_json(tournament_id, 'tournament.json')
+        manifest = snapshots.read_json(tournament_id, 'manifest.json')
+        if archived is not None and manifest is not None:
+            public = _check_visible(
+                request, tournament_id, archived['data']['is_public'] and archived['data']['is_active'],
+                manifest['host_user_id'], manifest['participant_user_ids'],
+            )
+            payload = {'data': archived['data']}
+            payload.update({include: archived[include] for include in includes})
+            return _json_response(request, payload, max_age=300, private=not public)
+
+    names = _requested_fields(request, TOURNAMENT_FIELDS, 'tournaments')
+    access = ['is_public', 'is_active', 'created_by__user_id']
+    lookups = list(dict.fromkeys([TOURNAMENT_FIELDS[name] for name in names] + ['is_finished', 'archived_at'] + access))
+    row = _tournament_queryset(names).filter(id=tournament_id).values(*lookups).first()
+    if row is None:
+        raise ApiError('Tournament not found.', status=404)
+    public = _check_visible(request, tournament_id, row['is_public'] and row['is_active'], row['created_by__user_id'])
+    archive.note(tournament_id, row['archived_at'])
+    if row['archived_at'] and 'player_count' in names:
+        # The annotation only sees the primary; archived players are counted where they live
+        row['player_count'] = Player.objects.filter(tournament_id=tournament_id).count()
+    payload = {'data': {name: row[TOURNAMENT_FIELDS[name]] for name in names}}
+
+    for include in includes:
+        include_names = _requested_fields(request, INCLUDE_FIELDS[include], include, primary=False)
+        payload[include] = _include_rows(tournament_id, include, include_names)
+
+    return _json_response(request, payload, max_age=300 if row['is_finished'] else 15, private=not public)
+
+
+@_api_view
+@archive.archive_reads
+def tournament_players(request, tournament_id):
+    """Players of a tournament, cursor-paginated."""
+    tournament, public = _get_tournament(request, tournament_id)
+    names = _requested_fields(request, PLAYER_FIELDS, 'players')
+    page = _paginate(request, Player.objects.filter(tournament=tournament), PLAYER_FIELDS, names, PLAYER_ORDER)
+    return _json_response(request, page, max_age=_max_age(tournament), private=not public)
+
+
+@_api_view
+@archive.archive_reads
+def tournament_matches(request, tournament_id):
+    """Matches of a tournament in bracket order. Filters: round, stage."""
+    tournament, public = _get_tournament(request, tournament_id)
+    names = _requested_fields(request, MATCH_FIELDS, 'matches')
+    queryset = Match.objects.filter(tournament=tournament)
+    if request.GET.get('round'):
+        try:
+            queryset = queryset.filter(round_number=int(request.GET['round']))
+        except ValueError:
+            raise ApiError('round must be an integer.')
+    if request.GET.get('stage'):
+        queryset = queryset.filter(stage=request.GET['stage'].upper())
+    page = _paginate(request, queryset, MATCH_FIELDS, names, MATCH_ORDER)
+    return _json_response(request, page, max_age=_max_age(tournament), private=not public)
+
+
+@_api_view
+@archive.archive_reads
+def tournament_standings(request, tournament_id):
+    """Point table of a tournament, best first."""
+    tournament, public = _get_tournament(request, tournament_id)
+    names = _requested_fields(request, STANDING_FIELDS, 'standings')
+    page = _paginate(request, PointTable.objects.filter(tournament=tournament), STANDING_FIELDS, names, STANDING_ORDER)
+    return _json_response(request, page, max_age=_max_age(tournament), private=not public)
@@ -0,0 +1,266 @@
+"""
+Archive tier for finished tournaments.
+
+`archive_tournament()` moves a tournament's Player, Match, PointTable, LeaveRequest and Payment rows
+from the primary into the 'archive' database (same schema, ids preserved) and stamps
+Tournament.archived_at. The Tournament row itself, and its TournamentParticipant rows, stay on the
+primary, so listings and membership checks are unchanged while the hot tables stay small.
+
+The archive database only has tables for those five models, and every connection to it ATTACHes
+the primary: unqualified table names fall through to the primary, so archived rows still join to
+their tournament, users and hosts.
+
+Read path: views decorated with @archive_reads read an archived tournament's rows from the archive.
+Whether it is archived is looked up on the first such read, unless the view already `note()`d it.
+Cross-tournament pages (profiles) query both databases via `databases()` and `by_database()`, each
+for its own tournaments only, and the archive only once its tables exist.
+`restore_tournament()` moves the rows back, e.g. when a host reopens the tournament.
+"""
+import contextvars
+import functools
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import LeaveRequest, Match, Payment, Player, PointTable, Tournament
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ALIAS = 'archive'
+# Insert order; rows are deleted in reverse so nothing is left pointing at a removed Player
+ARCHIVED_MODELS = [Player, Match, PointTable, LeaveRequest, Payment]
+
+
+class _ArchiveRead:
+    def __init__(self, tournament_id):
+        self.tournament_id = tournament_id
+        self.archived = None  # unknown until needed
+
+
+_reading = contextvars.ContextVar('archive_read', default=None)
+
+
+def archive_enabled():
+    return ARCHIVE_ALIAS in settings.DATABASES
+
+
+def db_for(tournament):
+    """Alias holding the tournament's rows, or None (let the routers decide) for a live tournament."""
+    return ARCHIVE_ALIAS if tournament.archived_at and archive_enabled() else None
+
+
+def schema_ready():
+    """
+    Whether `migrate --database archive` has created the archive's tables. Until it has, their names
+    fall through to the primary's tables, and querying the archive would count live rows twice.
+    """
+    connection = connections[ARCHIVE_ALIAS]
+    with connection.cursor() as cursor:
+        return Match._meta.db_table in connection.introspection.table_names(cursor)
+
+
+def databases():
+    """Aliases to query for rows spanning many tournaments; None stands for the routed live database."""
+    return [None, ARCHIVE_ALIAS] if archive_enabled() and schema_ready() else [None]
+
+
+def by_database(tournament_ids):
+    """{alias: ids} of the tournaments whose rows each database holds: archived ones in the archive."""
+    groups = {alias: [] for alias in databases()}
+    archived = set()
+    if ARCHIVE_ALIAS in groups:
+        archived = set(Tournament.objects.filter(id__in=tournament_ids, archived_at__isnull=False).values_list('id', flat=True))
+    for tournament_id in tournament_ids:
+        groups[ARCHIVE_ALIAS if tournament_id in archived else None].append(tournament_id)
+    return groups
+
+
+def player_counts(tournament_ids):
+    """{id: players} of archived tournaments, whose players a Count('player') on the primary misses."""
+    if not tournament_ids or ARCHIVE_ALIAS not in databases():
+        return {}
+    return dict(
+        Player.objects.using(ARCHIVE_ALIAS).filter(tournament_id__in=tournament_ids)
+        .values('tournament_id').annotate(n=models.Count('id')).values_list('tournament_id', 'n')
+    )
+
+
+# ==============================
+# 🔸 Read path
+# ==============================
+@receiver(connection_created)
+def attach_primary(sender, connection, **kwargs):
+    if connection.alias == ARCHIVE_ALIAS:
+        primary = str(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+        connection.connection.execute('ATTACH DATABASE ? AS live', [primary])
+
+
+def _is_archived(state):
+    if state.archived is None:
+        state.archived = Tournament.objects.filter(id=state.tournament_id, archived_at__isnull=False).exists()
+    return state.archived
+
+
+def note(tournament_id, archived_at):
+    """Record the archive state of the tournament the view just loaded, sparing the router a lookup."""
+    state = _reading.get()
+    if state is not None and state.tournament_id == int(tournament_id):
+        state.archived = archived_at is not None
+
+
+class ArchiveRouter:
+    """
+    While @archive_reads serves an archived tournament, read its rows from the archive.
+    Relations followed from archived rows go back to the primary (tournaments, users, hosts).
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        from_archive = instance is not None and instance._state.db == ARCHIVE_ALIAS
+        if model not in ARCHIVED_MODELS:
+            return DEFAULT_DB_ALIAS if from_archive else None
+        state = _reading.get()
+        if from_archive or (state is not None and _is_archived(state)):
+            return ARCHIVE_ALIAS
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != ARCHIVE_ALIAS:
+            return None
+        return app_label == 'tournifyx' and model_name in {model._meta.model_name for model in ARCHIVED_MODELS}
+
+
+def archive_reads(view):
+    """For views taking `tournament_id`: read the tournament's rows from the archive once it is archived."""
+    @functools.wraps(view)
+    def wrapper(request, *args, tournament_id, **kwargs):
+        token = _reading.set(_ArchiveRead(int(tournament_id)) if archive_enabled() else None)
+        try:
+            return view(request, *args, tournament_id=tournament_id, **kwargs)
+        finally:
+            _reading.reset(token)
+    return wrapper
+
+
+# ==============================
+# 🔸 Moving rows
+# ==============================
+def _existing_ids(model, ids, using):
+    return set(model.objects.using(using).filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def _reattach(model, rows, using):
+    """
+    Drop or detach rows whose users/hosts were deleted while the tournament sat in the archive,
+    following each foreign key's on_delete (SET_NULL detaches, anything else drops the row).
+    """
+    for field in model._meta.concrete_fields:
+        target = field.related_model
+        if not field.is_relation or target is Tournament or target in ARCHIVED_MODELS:
+            continue
+        ids = {getattr(row, field.attname) for row in rows} - {None}
+        missing = ids - _existing_ids(target, ids, using)
+        if not missing:
+            continue
+        if field.remote_field.on_delete is models.SET_NULL:
+            for row in rows:
+                if getattr(row, field.attname) in missing:
+                    setattr(row, field.attname, None)
+        else:
+            rows = [row for row in rows if getattr(row, field.attname) not in missing]
+    return rows
+
+
+def _delete_rows(tournament_id, using):
+    # Plain DELETEs: no cascade collection and no post_delete signals (which would drop the snapshot)
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for model in reversed(ARCHIVED_MODELS):
+            cursor.execute(
+                'DELETE FROM %s WHERE tournament_id = %%s' % connection.ops.quote_name(model._meta.db_table),
+                [tournament_id],
+            )
+
+
+def _insert_rows(model, rows, using, batch_size):
+    # Plain INSERTs as well: bulk_create would overwrite auto_now/auto_now_add timestamps
+    connection = connections[using]
+    fields = model._meta.concrete_fields
+    sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(f.column) for f in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, [
+                [f.get_db_prep_save(getattr(row, f.attname), connection) for f in fields]
+                for row in rows[start:start + batch_size]
+            ])
+
+
+def _move(tournament_id, source, target, batch_size):
+    """Copy every archived model's rows from `source` to `target`, then delete them from `source`."""
+    moved = 0
+    # A previous run may have copied rows and died before the source committed; start clean
+    _delete_rows(tournament_id, target)
+    for model in ARCHIVED_MODELS:
+        rows = list(model.objects.using(source).filter(tournament_id=tournament_id).order_by('pk'))
+        if target == DEFAULT_DB_ALIAS:
+            rows = _reattach(model, rows, target)
+        _insert_rows(model, rows, target, batch_size)
+        moved += len(rows)
+    _delete_rows(tournament_id, source)
+    return moved
+
+
+def archive_tournament(tournament, batch_size=500):
+    """Move the tournament's rows to the archive. Safe to re-run after a crash at any point."""
+    started = time.perf_counter()
+    # The archive holds rows whose tournaments, users and hosts live on the primary
+    connections[ARCHIVE_ALIAS].disable_constraint_checking()
+    # The target commits first (inner block): a failure in between leaves the rows in both
+    # databases with the primary still authoritative, never in neither
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=ARCHIVE_ALIAS):
+        moved = _move(tournament.id, DEFAULT_DB_ALIAS, ARCHIVE_ALIAS, batch_size)
+        tournament.archived_at = timezone.now()
+        Tournament.objects.filter(pk=tournament.pk).update(archived_at=tournament.archived_at)
+    logger.info('Archived %s rows', moved, extra={
+        'tournament_id': tournament.id, 'duration_ms': (time.perf_counter() - started) * 1000,
+    })
+    return moved
+
+
+def restore_tournament(tournament, batch_size=500):
+    """Move an archived tournament's rows back to the primary."""
+    started = time.perf_counter()
+    connections[ARCHIVE_ALIAS].disable_constraint_checking()
+    with transaction.atomic(using=ARCHIVE_ALIAS), transaction.atomic(using=DEFAULT_DB_ALIAS):
+        moved = _move(tournament.id, ARCHIVE_ALIAS, DEFAULT_DB_ALIAS, batch_size)
+        tournament.archived_at = None
+        Tournament.objects.filter(pk=tournament.pk).update(archived_at=None)
+    logger.info('Restored %s rows', moved, extra={
+        'tournament_id': tournament.id, 'duration_ms': (time.perf_counter() - started) * 1000,
+    })
+    return moved
+
+
+def purge(tournament_id):
+    """Delete a tournament's archived rows (the Tournament row is gone from the primary)."""
+    connections[ARCHIVE_ALIAS].disable_constraint_checking()
+    with transaction.atomic(using=ARCHIVE_ALIAS):
+        _delete_rows(tournament_id, ARCHIVE_ALIAS)
+
+
+def candidates(days):
+    """Finished, not yet archived tournaments whose finish is more than `days` days old."""
+    cutoff = timezone.now() - timedelta(days=days)
+    return Tournament.objects.filter(
+        is_finished=True, finished_at__lte=cutoff, archived_at__isnull=True
+    ).order_by('id')
@@ -0,0 +1,242 @@
+"""
+Static and media files served by the application itself.
+
+With SERVE_ASSETS=1, `manage.py collectstatic` stores every static file under a content-hashed
+name (ManifestStaticFilesStorage) and writes a gzip copy of the compressible ones next to it, plus
+a brotli copy when the Brotli package is installed. AssetMiddleware, first in MIDDLEWARE, answers
+/static/ and /media/ requests before sessions, auth or the URL resolver run:
+
+- the precompressed copy the client accepts (br, then gzip), never compressed per request;
+- `Cache-Control: immutable` for a year on hashed names (manifest entries, and the
+  content-addressed uploads written by `images.attach`); revalidation on everything else;
+- ETag / Last-Modified, answering If-None-Match and If-Modified-Since with 304;
+- a single byte `Range` (206, or 416 when unsatisfiable), from the uncompressed file;
+- a FileResponse over the open file, which a WSGI server with wsgi.file_wrapper (gunicorn) sends
+  with sendfile() instead of copying it through Python.
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.static import was_modified_since
+
+from . import metrics
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+# Precompressed at collectstatic; images and fonts are compressed already
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico'}
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Uploads stored by images.attach(), and their variants: <32 hex>.jpg, <32 hex>-96x96.webp
+CONTENT_ADDRESSED = re.compile(r'(^|/)[0-9a-f]{32}[-.][^/]*$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# ==============================
+# 🔸 Build: collectstatic
+# ==============================
+def compress(path):
+    """Write `path`.gz and, with Brotli installed, `path`.br, keeping only copies that save space."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    copies = {'.gz': gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        copies['.br'] = brotli.compress(data, quality=11)
+    for suffix, compressed in copies.items():
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed file names, plus precompressed copies of the compressible files under both names."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for original, processed, changed in super().post_process(paths, dry_run, **options):
+            if not isinstance(changed, Exception):
+                names.update({original, processed})
+            yield original, processed, changed
+        if dry_run:
+            return
+        for name in names:
+            if name and os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                compress(self.path(name))
+
+
+# ==============================
+# 🔸 Serving
+# ==============================
+class _FileRange:
+    """
+    `length` bytes of an open file from `start`. Exposes fileno() so a WSGI server can sendfile()
+    them; Content-Length bounds what it sends.
+    """
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        q = params.replace(' ', '').lower()
+        if q.startswith('q=') and not q[2:].strip('0.'):
+            continue  # q=0: explicitly refused
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _byte_range(header, size):
+    """(start, length) for a single `bytes=` range; None to serve the whole file; False if unsatisfiable."""
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None  # malformed or several ranges: RFC 9110 allows ignoring the header
+    first, last = match.groups()
+    if not first:
+        start = max(size - int(last), 0)  # suffix: the last N bytes
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end - start + 1
+
+
+def serve(request, path, document_root, immutable=False):
+    """Response for `path` under `document_root`, or None if there is no such file."""
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        return None
+    try:
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        return None
+    if not os.path.isfile(full_path):
+        return None
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    headers = {
+        'Cache-Control': IMMUTABLE if immutable else REVALIDATE,
+        'X-Content-Type-Options': 'nosniff',
+    }
+    encoding = None
+    range_header = request.headers.get('Range', '')
+    if os.path.splitext(full_path)[1].lower() in COMPRESSIBLE:
+        headers['Vary'] = 'Accept-Encoding'
+        # Ranges are always of the uncompressed file
+        if not range_header:
+            accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+            for name, suffix in ENCODINGS:
+                if name in accepted:
+                    try:
+                        stat, full_path, encoding = os.stat(full_path + suffix), full_path + suffix, name
+                        break
+                    except OSError:
+                        pass
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+    headers['ETag'] = etag
+    headers['Last-Modified'] = http_date(stat.st_mtime)
+    if_none_match = request.headers.get('If-None-Match')
+    if (if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*')) or (
+        not if_none_match and 'If-Modified-Since' in request.headers
+        and not was_modified_since(request.headers['If-Modified-Since'], int(stat.st_mtime))
+    ):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response.headers[name] = value
+        return response
+
+    size = stat.st_size
+    start, length, status = 0, size, 200
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range in (etag, headers['Last-Modified'])):
+        byte_range = _byte_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            start, length = byte_range
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{start + length - 1}/{size}'
+
+    response = FileResponse(
+        _FileRange(open(full_path, 'rb'), start, length), status=status,
+        content_type=content_type or 'application/octet-stream',
+    )
+    for name, value in headers.items():
+        response.headers[name] = value
+    response.headers['Content-Length'] = str(length)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _hashed_static_names():
+    """Every hashed name in the collectstatic manifest."""
+    try:
+        return frozenset(staticfiles_storage.hashed_files.values())
+    except AttributeError:
+        return frozenset()  # a storage without a manifest
+
+
+class AssetMiddleware:
+    """Serve STATIC_ROOT and MEDIA_ROOT ahead of the rest of the middleware when SERVE_ASSETS is on."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVE_ASSETS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        hashed = _hashed_static_names()
+        self.roots = [
+            ('static', settings.STATIC_URL, settings.STATIC_ROOT, lambda path: path in hashed),
+            ('media', settings.MEDIA_URL, settings.MEDIA_ROOT, lambda path: bool(CONTENT_ADDRESSED.search(path))),
+        ]
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            for kind, prefix, root, is_immutable in self.roots:
+                if root and request.path.startswith(prefix):
+                    path = request.path[len(prefix):]
+                    response = serve(request, path, root, immutable=is_immutable(path))
+                    if response is not None:
+                        metrics.inc('tournifyx_assets_served_total', kind=kind, status=str(response.status_code),
+                                    encoding=response.headers.get('Content-Encoding', 'identity'))
+                        return response
+                    break
+        return self.get_response(request)
@@ -0,0 +1,274 @@
+"""
+Microbenchmarks for the tournament algorithms in utils.py and for rendering the dashboard.
+
+Each benchmark has a setup step (not timed) and a body that is timed, traced with
+tracemalloc and counted for SQL queries. Database benchmarks expect the default
+connection to point at a throwaway in-memory SQLite database (see `in_memory_database`)
+and run every repetition inside a rolled-back transaction.
+"""
+import gc
+import json
+import os
+import random
+import subprocess
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.utils import load_backend
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .models import HostProfile, Match, Player, Tournament
+from .utils import (
+    compute_standings, generate_knockout_fixtures, generate_league_fixtures, generate_next_knockout_round,
+    propagate_result_change, recalculate_point_table,
+)
+
+DEFAULT_SIZES = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+# Timing differences below this are treated as noise when comparing runs
+NOISE_SECONDS = 0.0005
+
+# max_size keeps the O(N^2) league benchmarks within memory: 4096 players is 8.4M fixtures
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'run', 'uses_db', 'max_size'])
+
+_Player = namedtuple('_Player', ['id', 'name'])
+
+
+# ==============================
+# 🔸 Pure in-memory benchmarks
+# ==============================
+def _names(n):
+    return [f'Player {i}' for i in range(n)]
+
+
+def _league_results(n):
+    rng = random.Random(n)
+    return [(a, b, rng.choice([a, b, None]), False) for a in range(n) for b in range(a + 1, n)]
+
+
+# ==============================
+# 🔸 Database benchmarks
+# ==============================
+def _tournament(n, match_type):
+    host = HostProfile.objects.first()
+    return Tournament.objects.create(
+        name=f'Bench {match_type} {n}', category='football', match_type=match_type, num_participants=n,
+        created_by=host, code=f'B{n}{match_type[0]}'[:6].upper(),
+    )
+
+
+def _players(tournament, n):
+    return Player.objects.bulk_create([Player(tournament=tournament, name=f'P{i}') for i in range(n)], batch_size=1000)
+
+
+def _setup_next_round(n):
+    """Knockout with a finished first round; the body creates round two."""
+    tournament = _tournament(n, 'knockout')
+    players = _players(tournament, n)
+    Match.objects.bulk_create([
+        Match(tournament=tournament, player1=a, player2=b, winner=a, stage='KNOCKOUT', round_number=1)
+        for a, b in zip(players[::2], players[1::2])
+    ], batch_size=1000)
+    return tournament
+
+
+def _setup_full_bracket(n):
+    """
+    Fully decided knockout bracket; the body flips the last round-one result, whose winner
+    sits in the player2 slot all the way to the final, so the change propagates through every round.
+    """
+    tournament = _tournament(n, 'knockout')
+    players = _players(tournament, n)
+    entrants = [(p, None) for p in players]
+    last = None
+    round_number = 1
+    while len(entrants) > 1:
+        matches = Match.objects.bulk_create([
+            Match(tournament=tournament, player1=a[0], player2=b[0], winner=a[0], stage='KNOCKOUT',
+                  round_number=round_number, parent_match1=a[1], parent_match2=b[1])
+            for a, b in zip(entrants[::2], entrants[1::2])
+        ], batch_size=1000)
+        last = last or matches[-1]
+        entrants = [(m.winner, m) for m in matches]
+        round_number += 1
+    last.winner = last.player2
+    last.save()
+    return last
+
+
+def _setup_league(n):
+    """League with every fixture played; the body rebuilds the point table."""
+    tournament = _tournament(n, 'league')
+    players = _players(tournament, n)
+    rng = random.Random(n)
+    Match.objects.bulk_create([
+        Match(tournament=tournament, player1=a, player2=b, winner=rng.choice([a, b]), stage='GROUP', round_number=1)
+        for i, a in enumerate(players) for b in players[i + 1:]
+    ], batch_size=1000)
+    return Match.objects.filter(tournament=tournament).select_related('tournament').first()
+
+
+def _update_points(match):
+    from .views import update_points_for_match
+    update_points_for_match(match)
+
+
+# ==============================
+# 🔸 Template benchmarks
+# ==============================
+def _setup_dashboard(n):
+    """League of n players with every fixture played, and the host's GET of its dashboard."""
+    tournament = _setup_league(n).tournament
+    recalculate_point_table(tournament)
+    request = RequestFactory().get(f'/tournament/{tournament.id}/dashboard/')
+    request.user = tournament.created_by.user
+    # Templates are loaded (and cached by the loader) but no fragment is cached yet
+    _render_dashboard((request, tournament.id))
+    caches['fragments'].clear()
+    return request, tournament.id
+
+
+def _setup_dashboard_cached(n):
+    """As _setup_dashboard, after one render has filled the fragment cache."""
+    arguments = _setup_dashboard(n)
+    _render_dashboard(arguments)
+    return arguments
+
+
+def _render_dashboard(arguments):
+    from .views import tournament_dashboard
+    request, tournament_id = arguments
+    tournament_dashboard(request, tournament_id=tournament_id)
+
+
+BENCHMARKS = [
+    Benchmark('generate_league_fixtures', _names, generate_league_fixtures, False, 1024),
+    Benchmark('generate_knockout_fixtures', lambda n: [_Player(i, f'P{i}') for i in range(n)],
+              lambda players: generate_knockout_fixtures(players[:]), False, None),
+    Benchmark('compute_standings', _league_results, compute_standings, False, 1024),
+    Benchmark('generate_next_knockout_round', _setup_next_round, generate_next_knockout_round, True, None),
+    Benchmark('propagate_result_change', _setup_full_bracket, propagate_result_change, True, None),
+    Benchmark('update_points_for_match', _setup_league, _update_points, True, 512),
+    Benchmark('render_dashboard', _setup_dashboard, _render_dashboard, True, 128),
+    Benchmark('render_dashboard_cached', _setup_dashboard_cached, _render_dashboard, True, 128),
+]
+
+
+@contextmanager
+def in_memory_database():
+    """Point the default connection at a freshly migrated in-memory SQLite database."""
+    original = connections[DEFAULT_DB_ALIAS]
+    settings_dict = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+    )[DEFAULT_DB_ALIAS]
+    memory = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+    connections[DEFAULT_DB_ALIAS] = memory
+    try:
+        call_command('migrate', verbosity=0, interactive=False)
+        from django.contrib.auth.models import User
+        HostProfile.objects.create(user=User.objects.create(username='bench-host'))
+        yield
+    finally:
+        memory.close()
+        connections[DEFAULT_DB_ALIAS] = original
+
+
+def _measure_once(bench, n, trace):
+    random.seed(n)
+    with transaction.atomic() if bench.uses_db else nullcontext():
+        argument = bench.setup(n)
+        gc.collect()
+        if trace:
+            tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            bench.run(argument)
+            elapsed = time.perf_counter() - started
+        peak = 0
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        if bench.uses_db:
+            transaction.set_rollback(True)
+    return elapsed, peak, len(queries)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, only=None):
+    """Return {'name[N]': {'seconds', 'min_seconds', 'peak_bytes', 'queries'}}."""
+    results = {}
+    for bench in BENCHMARKS:
+        if only and bench.name not in only:
+            continue
+        for n in sizes:
+            if bench.max_size and n > bench.max_size:
+                continue
+            timings = []
+            for _ in range(repeat):
+                elapsed, _, queries = _measure_once(bench, n, trace=False)
+                timings.append(elapsed)
+            # Allocation tracing slows code down, so it gets its own run
+            _, peak, _ = _measure_once(bench, n, trace=True)
+            timings.sort()
+            results[f'{bench.name}[{n}]'] = {
+                'seconds': timings[len(timings) // 2],
+                'min_seconds': timings[0],
+                'peak_bytes': peak,
+                'queries': queries,
+            }
+    return results
+
+
+# ==============================
+# 🔸 History & comparison
+# ==============================
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def append_history(path, results, label=''):
+    history = load_history(path)
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ''
+    history.append({
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': revision,
+        'label': label,
+        'results': results,
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=1)
+    return history[-1]
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Compare two history entries. Time and peak memory regress when they grow by more than
+    `threshold` (a fraction); query counts are deterministic, so any increase is a regression.
+    Returns a list of (key, metric, before, after, regressed) rows.
+    """
+    rows = []
+    for key in sorted(set(baseline['results']) & set(current['results'])):
+        before, after = baseline['results'][key], current['results'][key]
+        for metric in ('seconds', 'peak_bytes', 'queries'):
+            old, new = before[metric], after[metric]
+            if metric == 'queries':
+                regressed = new > old
+            else:
+                regressed = old > 0 and new > old * (1 + threshold)
+                if metric == 'seconds':
+                    regressed = regressed and new - old > NOISE_SECONDS
+            rows.append((key, metric, old, new, regressed))
+    return rows
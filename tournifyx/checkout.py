@@ -0,0 +1,159 @@
+"""
+Stripe Checkout for card payments.
+
+`start()` opens a Checkout Session for a pending payment and keeps the session id in
+Payment.gateway_transaction_id. Stripe reports the outcome to `stripe_webhook`, which only verifies
+the signature and stores the raw event (`receive()`) before answering, so Stripe gets its 200 in
+milliseconds. `process_events()` (run by `manage.py process_stripe_events`) applies stored events
+to their payments, each in its own transaction and at most once: a redelivered event hits the
+unique event id, and a worker claims an event with a compare-and-swap UPDATE before applying it.
+
+The stripe SDK is imported on first use, not at startup: only card checkouts and webhooks need it.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import metrics, payments
+from .models import Payment, StripeEvent
+
+logger = logging.getLogger(__name__)
+
+# Events whose handling raised this many times are left for a person to look at
+MAX_ATTEMPTS = 5
+
+# event type -> payment transition (None: wait for a later event)
+ACTIONS = {
+    'checkout.session.completed': 'settle',
+    'checkout.session.async_payment_succeeded': 'settle',
+    'checkout.session.async_payment_failed': 'fail',
+    'checkout.session.expired': 'cancel',
+}
+
+
+class CheckoutUnavailable(Exception):
+    """Stripe could not open a checkout session."""
+
+
+class InvalidWebhook(Exception):
+    """The webhook body was malformed or its signature did not match."""
+
+
+def enabled():
+    return bool(settings.STRIPE_SECRET_KEY)
+
+
+def start(payment, success_url, cancel_url):
+    """Open a Checkout Session for `payment`; returns the URL to send the payer to. Raises CheckoutUnavailable."""
+    import stripe
+    try:
+        session = stripe.checkout.Session.create(
+            api_key=settings.STRIPE_SECRET_KEY,
+            mode='payment',
+            line_items=[{
+                'quantity': 1,
+                'price_data': {
+                    'currency': settings.STRIPE_CURRENCY,
+                    'unit_amount': int(payment.amount * 100),
+                    'product_data': {'name': payment.tournament.name},
+                },
+            }],
+            client_reference_id=payment.transaction_id,
+            metadata={'payment_id': payment.id},
+            success_url=success_url,
+            cancel_url=cancel_url,
+            # A retried request returns the same session instead of opening a second one
+            idempotency_key=f'checkout-{payment.transaction_id}',
+        )
+    except stripe.error.StripeError as e:
+        raise CheckoutUnavailable(str(e)) from e
+    payment.gateway_transaction_id = session.id
+    payment.save(update_fields=['gateway_transaction_id', 'updated_at'])
+    return session.url
+
+
+def is_stripe_checkout(payment):
+    return bool(payment.gateway_transaction_id) and payment.gateway_transaction_id.startswith('cs_')
+
+
+# ==============================
+# 🔸 Webhook
+# ==============================
+def receive(payload, signature):
+    """
+    Verify and durably store a webhook delivery. Returns True for a new event, False for a
+    redelivery. Raises InvalidWebhook.
+    """
+    import stripe
+    try:
+        event = stripe.Webhook.construct_event(payload, signature, settings.STRIPE_WEBHOOK_SECRET)
+    except (ValueError, stripe.error.SignatureVerificationError) as e:
+        raise InvalidWebhook(str(e)) from e
+    _, created = StripeEvent.objects.get_or_create(
+        event_id=event['id'], defaults={'type': event['type'], 'payload': payload.decode('utf-8')}
+    )
+    return created
+
+
+# ==============================
+# 🔸 Worker
+# ==============================
+def _payment_for(session):
+    payment = Payment.objects.filter(gateway_transaction_id=session['id']).first()
+    if payment is None and (session.get('metadata') or {}).get('payment_id'):
+        payment = Payment.objects.filter(pk=session['metadata']['payment_id']).first()
+    return payment
+
+
+def _apply(event):
+    """Apply one event's payment transition; returns the outcome label."""
+    action = ACTIONS.get(event['type'])
+    session = event['data']['object']
+    if action == 'settle' and event['type'] == 'checkout.session.completed' and session.get('payment_status') != 'paid':
+        action = None  # Delayed payment methods: async_payment_succeeded/failed follows
+    if action is None:
+        return 'ignored'
+    payment = _payment_for(session)
+    if payment is None:
+        logger.warning('Stripe event %s for unknown checkout session %s', event['id'], session['id'])
+        return 'unknown_payment'
+    fields = {'completed_at': timezone.now()} if action == 'settle' else {}
+    if session.get('payment_intent'):
+        fields['payment_details'] = dict(payment.payment_details, payment_intent=session['payment_intent'])
+    try:
+        payments.transition(payment, action, **fields)
+    except payments.InvalidTransition:
+        # e.g. expired after the payer cancelled, or a second event for the same outcome
+        return 'no_change'
+    logger.info('Stripe %s: payment %s %s', event['type'], payment.id, payment.status,
+                extra={'tournament_id': payment.tournament_id})
+    return payment.status
+
+
+def process(pk):
+    """Apply the stored event `pk` unless another worker already has. Returns True if this call applied it."""
+    try:
+        with transaction.atomic():
+            if not StripeEvent.objects.filter(pk=pk, processed_at__isnull=True).update(processed_at=timezone.now()):
+                return False
+            event = json.loads(StripeEvent.objects.values_list('payload', flat=True).get(pk=pk))
+            outcome = _apply(event)
+    except Exception as e:
+        # The claim rolled back with everything else; count the attempt and retry on a later pass
+        logger.exception('Stripe event %s failed', pk)
+        StripeEvent.objects.filter(pk=pk).update(attempts=models.F('attempts') + 1, last_error=repr(e))
+        return False
+    metrics.inc('tournifyx_stripe_events_total', type=event['type'], outcome=outcome)
+    return True
+
+
+def pending(limit=100):
+    return StripeEvent.objects.filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS).order_by('id')[:limit]
+
+
+def process_events(limit=100):
+    """Apply up to `limit` stored events, oldest first; returns how many this call applied."""
+    return sum(process(pk) for pk in pending(limit).values_list('pk', flat=True))
@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Tournament, Player, UserProfile
+from . import images
+from .models import Payment, Tournament, Player, UserProfile
 
 
 class ContactForm(forms.Form):
@@ -65,6 +66,7 @@ class CustomUserCreationForm(UserCreationForm):
         if profile_picture:
             if profile_picture.size > 5 * 1024 * 1024:  # 5MB limit
                 raise forms.ValidationError("Image file too large ( > 5MB )")
+            images.validate(profile_picture)
         return profile_picture
     
     def save(self, commit=True):
@@ -77,10 +79,12 @@ class CustomUserCreationForm(UserCreationForm):
             phone_number = self.cleaned_data.get('phone_number')
             user_profile, created = UserProfile.objects.get_or_create(user=user)
             if profile_picture:
-                user_profile.avatar = profile_picture
+                images.attach(user_profile, 'avatar', profile_picture)
             if phone_number:
                 user_profile.phone_number = phone_number
             user_profile.save()
+            if profile_picture:
+                images.enqueue(user_profile, 'avatar')
         return user
 
 
@@ -175,3 +179,55 @@ class PlayerForm(forms.ModelForm):
    class Meta:
        model = Player
        fields = ['name', 'team_name']  # Include team_name
+
+
+class PaymentQueueFilterForm(forms.Form):
+    """Filters for the host payment queue; every field is optional."""
+    FILTER_INPUT = 'w-full p-2 rounded-lg bg-white/10 text-white border border-cyan-500/30 focus:outline-none focus:border-cyan-400'
+
+    status = forms.ChoiceField(
+        choices=[('pending_approval', 'Pending Approval'), ('all', 'Any status')] + [
+            choice for choice in Payment.PAYMENT_STATUS_CHOICES if choice[0] != 'pending_approval'
+        ],
+        required=False, widget=forms.Select(attrs={'class': FILTER_INPUT}),
+    )
+    tournament = forms.ModelChoiceField(
+        queryset=Tournament.objects.none(), required=False, empty_label='All tournaments',
+        widget=forms.Select(attrs={'class': FILTER_INPUT}),
+    )
+    payment_method = forms.ChoiceField(
+        choices=[('', 'Any method')] + Payment.PAYMENT_METHOD_CHOICES, required=False,
+        widget=forms.Select(attrs={'class': FILTER_INPUT}),
+    )
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': FILTER_INPUT}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': FILTER_INPUT}))
+    amount_min = forms.DecimalField(required=False, min_value=0, widget=forms.NumberInput(attrs={'class': FILTER_INPUT, 'placeholder': 'Min'}))
+    amount_max = forms.DecimalField(required=False, min_value=0, widget=forms.NumberInput(attrs={'class': FILTER_INPUT, 'placeholder': 'Max'}))
+    duplicates_only = forms.BooleanField(required=False, label='Duplicate transaction IDs only')
+
+    def __init__(self, *args, host_profile=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['tournament'].queryset = Tournament.objects.filter(created_by=host_profile, is_paid=True).order_by('-id')
+
+    def filter(self, payments):
+        """Narrow `payments` (annotated with `has_duplicate`) to the valid filters."""
+        if not self.is_valid():
+            return payments.filter(status='pending_approval')
+        data = self.cleaned_data
+        if data['status'] != 'all':
+            payments = payments.filter(status=data['status'] or 'pending_approval')
+        if data['tournament']:
+            payments = payments.filter(tournament=data['tournament'])
+        if data['payment_method']:
+            payments = payments.filter(payment_method=data['payment_method'])
+        if data['date_from']:
+            payments = payments.filter(created_at__date__gte=data['date_from'])
+        if data['date_to']:
+            payments = payments.filter(created_at__date__lte=data['date_to'])
+        if data['amount_min'] is not None:
+            payments = payments.filter(amount__gte=data['amount_min'])
+        if data['amount_max'] is not None:
+            payments = payments.filter(amount__lte=data['amount_max'])
+        if data['duplicates_only']:
+            payments = payments.filter(has_duplicate=True)
+        return payments
@@ -0,0 +1,102 @@
+"""
+Fragment caching for the large templates.
+
+`{% fragment %}` (`{% load fragments %}`) caches a region of a template in the 'fragments' cache,
+keyed by its name and the values it varies on. A tournament among those values stands for its id
+and Tournament.version:
+
+    {% fragment 'dashboard_fixtures' tournament is_host %} ... {% endfragment %}
+
+Tournament.version is the time of the last change to the tournament, its players, matches, point
+table or participants. signals.py bumps it after every save and delete, once per tournament when
+the transaction commits (bump_on_commit), and the bulk updates that skip signals call bump()
+themselves. A change therefore moves readers to new keys, and the old
+entries simply expire after FRAGMENT_CACHE_TIMEOUT. Views read the version before anything the
+fragment shows, so a cached fragment is never older than its key. They pass querysets or lazy
+objects rather than lists, so a cached fragment also skips the fragment's queries.
+
+site_version() keys what spans tournaments, such as the home page. It is kept in the 'fragments'
+cache and moved by every bump() and purge rather than read from the table; with a per-process
+cache other processes see a change within SITE_VERSION_TIMEOUT.
+
+A {% csrf_token %} inside a fragment is cached as a placeholder and filled in per request.
+"""
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import models, transaction
+from django.template import Context
+from django.template.defaulttags import CsrfTokenNode
+
+from .models import Tournament
+
+CSRF_PLACEHOLDER = 'fragmentcsrfplaceholder'
+SITE_VERSION_KEY = 'fragments.site_version'
+# Seconds before site_version() reads the table again, for changes made by other processes
+SITE_VERSION_TIMEOUT = 60
+
+_pending = threading.local()
+
+
+def bump(tournament_id):
+    """Give the tournament a new version; returns it."""
+    version = time.time_ns()
+    Tournament.all_objects.filter(pk=tournament_id).update(version=version)
+    # Not before the change is visible, or a page rendered from the old rows would get the new version
+    transaction.on_commit(lambda: touch_site(version))
+    return version
+
+
+def bump_on_commit(tournament_id):
+    """bump() the tournament when the current transaction commits, once however many rows it changed."""
+    pending = getattr(_pending, 'ids', None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.add(tournament_id)
+    # One callback per call: a rolled-back savepoint drops its own, and the first one left bumps them all
+    transaction.on_commit(_flush_bumps)
+
+
+def _flush_bumps():
+    ids = list(_pending.ids)
+    if not ids:
+        return
+    _pending.ids.clear()
+    version = time.time_ns()
+    Tournament.all_objects.filter(pk__in=ids).update(version=version)
+    touch_site(version)
+
+
+def touch_site(version=None):
+    """Move site_version() on, after a change it cannot see in the tournaments' versions."""
+    cache().set(SITE_VERSION_KEY, str(version or time.time_ns()), SITE_VERSION_TIMEOUT)
+
+
+def site_version():
+    """Changes whenever any tournament changes or is purged; keys fragments that span tournaments."""
+    version = cache().get(SITE_VERSION_KEY)
+    if version is None:
+        latest = Tournament.all_objects.aggregate(version=models.Max('version'), count=models.Count('id'))
+        version = f'{latest["version"] or 0}.{latest["count"]}'
+        cache().set(SITE_VERSION_KEY, version, SITE_VERSION_TIMEOUT)
+    return version
+
+
+def key(name, vary_on):
+    return make_template_fragment_key(name, [
+        f'{value.pk}.{value.version}' if isinstance(value, Tournament) else value for value in vary_on
+    ])
+
+
+def cache():
+    return caches['fragments']
+
+
+def fill_csrf(html, context):
+    """Replace the placeholder tokens in a cached fragment with this request's (or drop them)."""
+    placeholder = CsrfTokenNode().render(Context({'csrf_token': CSRF_PLACEHOLDER}))
+    if placeholder not in html:
+        return html
+    return html.replace(placeholder, CsrfTokenNode().render(context))
@@ -0,0 +1,169 @@
+"""
+Avatar and cover photo pipeline.
+
+`attach()` checks an upload from its header alone (format and dimensions; no pixels are decoded)
+and stores it under the SHA-256 of its content, so a file name never changes meaning and its URL
+can be cached forever. `enqueue()` then queues an ImageJob, and `manage.py process_images` renders
+the field's VARIANTS as WebP and JPEG next to the original and records them in
+UserProfile.image_variants. Until that has happened the `picture` template tag
+(`{% load image_variants %}`) serves the original.
+
+Pillow is imported inside the functions that need it, keeping it out of worker startup.
+"""
+import hashlib
+import io
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import ImageJob, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# name -> (width, height); images are scaled and cropped to fill
+VARIANTS = {'thumb': (96, 96), 'medium': (320, 320), 'cover': (1500, 500)}
+FIELD_VARIANTS = {'avatar': ('thumb', 'medium'), 'cover_photo': ('cover',)}
+# extension -> (Pillow format, save options); the first is preferred where the browser supports it
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+MIN_SIDE = 64
+MAX_SIDE = 6000
+MAX_PIXELS = 24_000_000
+
+MAX_ATTEMPTS = 3
+# A claimed job not finished within this long is assumed to have lost its worker
+LEASE = timedelta(minutes=5)
+
+
+def validate(upload):
+    """Check the format and dimensions from the image header and return the format."""
+    from PIL import Image, UnidentifiedImageError
+    try:
+        upload.seek(0)
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError('Upload a JPEG, PNG, WebP or GIF image.')
+    finally:
+        upload.seek(0)
+    if image_format not in EXTENSIONS:
+        raise ValidationError('Upload a JPEG, PNG, WebP or GIF image.')
+    if min(width, height) < MIN_SIDE:
+        raise ValidationError(f'Image is too small ({width}x{height}); it must be at least {MIN_SIDE}px on each side.')
+    if max(width, height) > MAX_SIDE or width * height > MAX_PIXELS:
+        raise ValidationError(f'Image is too large ({width}x{height}); it must be at most {MAX_SIDE}px on each side.')
+    return image_format
+
+
+def attach(profile, field, upload):
+    """Validate `upload` and point `profile.<field>` at its content-addressed copy (saved once per content)."""
+    image_format = validate(upload)
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    field_file = getattr(profile, field)
+    name = f'{field_file.field.upload_to}{digest.hexdigest()[:32]}{EXTENSIONS[image_format]}'
+    if not field_file.storage.exists(name):
+        name = field_file.storage.save(name, upload)
+    field_file.name = name
+
+
+def enqueue(profile, field):
+    return ImageJob.objects.create(user_profile=profile, field=field, source=getattr(profile, field).name)
+
+
+# ==============================
+# 🔸 Variants
+# ==============================
+def _encode(image, ext):
+    image_format, options = FORMATS[ext]
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(storage, source, field):
+    """Write the field's variants of `source` to `storage`; returns {variant: file stem}."""
+    from PIL import Image, ImageOps
+    sizes = {variant: VARIANTS[variant] for variant in FIELD_VARIANTS[field]}
+    with storage.open(source, 'rb') as f, Image.open(f) as image:
+        # JPEGs decode straight at a reduced scale that still covers the largest variant
+        image.draft('RGB', (max(w for w, _ in sizes.values()), max(h for _, h in sizes.values())))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+
+        stems = {}
+        for variant, (width, height) in sizes.items():
+            stem = f'{os.path.splitext(source)[0]}-{width}x{height}'
+            fitted = ImageOps.fit(image, (width, height))
+            for ext in FORMATS:
+                name = f'{stem}.{ext}'
+                if not storage.exists(name):
+                    storage.save(name, ContentFile(_encode(fitted, ext)))
+            stems[variant] = stem
+    return stems
+
+
+def _record(profile_id, source, stems):
+    with transaction.atomic():
+        profile = UserProfile.objects.select_for_update().get(pk=profile_id)
+        # Keep only the entries of the images the profile still uses
+        current = {profile.avatar.name, profile.cover_photo.name}
+        variants = {name: entry for name, entry in profile.image_variants.items() if name in current}
+        if source in current:
+            variants[source] = stems
+        UserProfile.objects.filter(pk=profile_id).update(image_variants=variants)
+
+
+def process(pk):
+    """Render the variants for job `pk` unless another worker holds it. Returns True if this call finished it."""
+    now = timezone.now()
+    claimed = ImageJob.objects.filter(pk=pk, done_at__isnull=True).filter(
+        models.Q(claimed_at__isnull=True) | models.Q(claimed_at__lt=now - LEASE)
+    ).update(claimed_at=now, attempts=models.F('attempts') + 1)
+    if not claimed:
+        return False
+    job = ImageJob.objects.select_related('user_profile').get(pk=pk)
+    started = time.perf_counter()
+    field_file = getattr(job.user_profile, job.field)
+    try:
+        # Rendered outside any transaction: the SQLite write lock is only held to record the result
+        stems = render_variants(field_file.storage, job.source, job.field)
+    except Exception as e:
+        logger.exception('Image job %s failed', pk)
+        ImageJob.objects.filter(pk=pk).update(claimed_at=None, last_error=repr(e))
+        metrics.inc('tournifyx_images_processed_total', field=job.field, outcome='error')
+        return False
+    _record(job.user_profile_id, job.source, stems)
+    ImageJob.objects.filter(pk=pk).update(done_at=timezone.now(), last_error='')
+    metrics.inc('tournifyx_images_processed_total', field=job.field, outcome='done')
+    logger.info('Rendered %s variants of %s', len(stems), job.source, extra={
+        'duration_ms': (time.perf_counter() - started) * 1000,
+    })
+    return True
+
+
+def pending(limit=20):
+    return ImageJob.objects.filter(done_at__isnull=True, attempts__lt=MAX_ATTEMPTS).order_by('id')[:limit]
+
+
+def process_jobs(limit=20):
+    """Process up to `limit` queued jobs, oldest first; returns how many this call finished."""
+    return sum(process(pk) for pk in pending(limit).values_list('pk', flat=True))
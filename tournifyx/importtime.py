@@ -0,0 +1,57 @@
+"""
+Startup import profile.
+
+`profile()` runs a script in a fresh interpreter under `python -X importtime` and parses the
+report into one Import per module: the time spent in the module itself and the cumulative time
+including everything it imported. `manage.py importtime` prints a summary and holds a worker's
+cold start to STARTUP_BUDGET_MS, and the startup test to three times that, allowing for slower
+machines. Both fail if any of LAZY_MODULES is imported.
+"""
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+
+# What a worker does before its first response: build the WSGI app and load the URLconf.
+# An import statement, not get_resolver(): importlib.import_module() imports are not timed.
+COLD_START = 'import Main.wsgi; import Main.urls'
+
+# Heavy optional dependencies that only specific requests need; none may load at startup
+LAZY_MODULES = ('stripe', 'PIL', 'dotenv', 'brotli')
+
+Import = namedtuple('Import', 'module self_us cumulative_us depth')
+
+
+def parse(report):
+    """Import records from `-X importtime` stderr output, in the order they finished."""
+    imports = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or line.rstrip().endswith('imported package'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append(Import(name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def profile(script=COLD_START):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'Main.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f'Startup script failed:\n{result.stderr[-2000:]}')
+    return parse(result.stderr)
+
+
+def total_ms(imports):
+    return sum(i.cumulative_us for i in imports if i.depth == 0) / 1000
+
+
+def eager(imports, modules=LAZY_MODULES):
+    """The top-level packages of `modules` that were imported."""
+    return sorted({i.module.split('.')[0] for i in imports} & set(modules))
@@ -0,0 +1,91 @@
+"""
+Structured logging: JSON lines with the event's extra fields (tournament_id, duration_ms, ...)
+and an optional queue handler so request threads never block on stdout.
+
+Log calls use %-style arguments, so nothing is formatted unless the level is enabled:
+
+    logger.debug('Generated %s fixtures', len(pairs), extra={'tournament_id': tournament.id})
+"""
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extra fields and exception."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class AsyncStreamHandler(QueueHandler):
+    """
+    Queue records and write them as JSON from a background QueueListener thread.
+    When the queue is full records are dropped rather than blocking the request.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def parse_levels(spec):
+    """'tournifyx.views=DEBUG,tournifyx.utils=INFO' -> {'tournifyx.views': 'DEBUG', ...}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def logging_config(level='INFO', module_levels=None, use_queue=False):
+    """LOGGING dict for settings: JSON to stderr, optionally through AsyncStreamHandler."""
+    if use_queue:
+        handler = {'()': 'tournifyx.log.AsyncStreamHandler'}
+    else:
+        handler = {'class': 'logging.StreamHandler', 'formatter': 'json'}
+
+    loggers = {
+        'tournifyx': {'handlers': ['console'], 'level': level, 'propagate': False},
+        # Django's own INFO records are one per request (runserver) or per query (django.db)
+        'django': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    }
+    for name, module_level in (module_levels or {}).items():
+        loggers.setdefault(name, {})['level'] = module_level
+
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {'json': {'()': 'tournifyx.log.JsonFormatter'}},
+        'handlers': {'console': handler},
+        'loggers': loggers,
+    }
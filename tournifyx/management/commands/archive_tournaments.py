@@ -0,0 +1,64 @@
+"""
+Move the rows of long-finished tournaments to the archive database.
+
+    python manage.py archive_tournaments                 # finished more than ARCHIVE_AFTER_DAYS ago
+    python manage.py archive_tournaments --days 90 --limit 100 --dry-run
+    python manage.py archive_tournaments --restore 12 15
+
+Each tournament is moved in its own transaction, so an interrupted run can simply be started again.
+"""
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from tournifyx import archive
+from tournifyx.models import Tournament
+
+
+class Command(BaseCommand):
+    help = 'Move the rows of tournaments finished more than --days ago to the archive database, or restore them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive tournaments finished at least this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per INSERT batch.')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many tournaments (0: no limit).')
+        parser.add_argument('--restore', type=int, nargs='+', metavar='ID',
+                            help='Move these tournaments back to the primary instead.')
+        parser.add_argument('--dry-run', action='store_true', help='List the tournaments without moving anything.')
+
+    def handle(self, *args, **options):
+        if not archive.archive_enabled():
+            raise CommandError(f'No "{archive.ARCHIVE_ALIAS}" database is configured.')
+        if not options['dry_run']:
+            call_command('migrate', database=archive.ARCHIVE_ALIAS, verbosity=0, interactive=False)
+
+        if options['restore']:
+            tournaments = Tournament.objects.filter(id__in=options['restore'], archived_at__isnull=False).order_by('id')
+            move, verb = archive.restore_tournament, 'Restored'
+        else:
+            tournaments = archive.candidates(options['days'])
+            move, verb = archive.archive_tournament, 'Archived'
+        tournaments = tournaments.only('id', 'name', 'archived_at')
+        if options['limit']:
+            tournaments = tournaments[:options['limit']]
+        tournaments = list(tournaments)
+
+        total_rows = 0
+        started = time.monotonic()
+        for n, tournament in enumerate(tournaments, 1):
+            if options['dry_run']:
+                self.stdout.write(f'[{n}/{len(tournaments)}] would move tournament {tournament.id} "{tournament.name}"')
+                continue
+            rows = move(tournament, batch_size=options['batch_size'])
+            total_rows += rows
+            self.stdout.write(f'[{n}/{len(tournaments)}] {verb.lower()} tournament {tournament.id}: {rows} rows')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{len(tournaments)} tournament(s) would be moved.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{verb} {len(tournaments)} tournament(s), {total_rows} rows in {time.monotonic() - started:.1f}s.'
+            ))
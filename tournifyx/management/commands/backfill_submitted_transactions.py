@@ -0,0 +1,51 @@
+"""
+Index the transaction IDs and sender numbers of payments submitted before SubmittedTransaction existed.
+
+    python manage.py backfill_submitted_transactions --batch-size 1000
+
+Payments are read in primary-key order, one batch per query, from the primary and the archive.
+Payments already indexed are skipped, so the command can be stopped and re-run at any point.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from tournifyx import archive, payments
+from tournifyx.models import Payment, SubmittedTransaction
+
+
+class Command(BaseCommand):
+    help = 'Fill SubmittedTransaction from the transaction IDs and sender numbers stored on existing payments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Payments per query and INSERT.')
+
+    def handle(self, *args, **options):
+        total = 0
+        for alias in archive.databases():
+            total += self._backfill(Payment.objects.using(alias), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} payment(s).'))
+
+    def _backfill(self, payments_qs, batch_size):
+        submitted = payments_qs.filter(
+            Q(gateway_transaction_id__gt='') | Q(payment_details__has_key='sender_number')
+        ).only('id', 'tournament_id', 'payment_method', 'gateway_transaction_id', 'payment_details',
+               'completed_at', 'created_at').order_by('id')
+        last_id, indexed = 0, 0
+        while True:
+            batch = list(submitted.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return indexed
+            last_id = batch[-1].id
+            done = set(SubmittedTransaction.objects.filter(payment_id__in=[p.id for p in batch]).values_list('payment_id', flat=True))
+            records = [
+                payments.submitted_transaction(
+                    payment,
+                    payment.payment_details.get('transaction_id') or payment.gateway_transaction_id,
+                    payment.payment_details.get('sender_number'),
+                    payment.completed_at or payment.created_at,
+                )
+                for payment in batch if payment.id not in done
+            ]
+            SubmittedTransaction.objects.bulk_create(records, ignore_conflicts=True)
+            indexed += len(records)
+            self.stdout.write(f'payments up to id {last_id}: {indexed} indexed')
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tournifyx import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the tournament algorithms. '
+        '"bench run" records time, peak allocations and query counts into the history file; '
+        '"bench compare" flags regressions between two recorded runs.'
+    )
+
+    def add_arguments(self, parser):
+        default_history = str(settings.BASE_DIR / 'benchmarks' / 'history.json')
+        actions = parser.add_subparsers(dest='action', required=True)
+
+        run = actions.add_parser('run', help='Run the benchmarks and append the results to the history.')
+        run.add_argument('--sizes', default=','.join(map(str, benchmarks.DEFAULT_SIZES)),
+                         help='Comma-separated player counts.')
+        run.add_argument('--repeat', type=int, default=3)
+        run.add_argument('--only', default='', help='Comma-separated benchmark names.')
+        run.add_argument('--label', default='', help='Free-form note stored with the run.')
+        run.add_argument('--history', default=default_history)
+
+        compare = actions.add_parser('compare', help='Compare two runs from the history.')
+        compare.add_argument('--baseline', type=int, default=-2, help='History index of the baseline run.')
+        compare.add_argument('--current', type=int, default=-1, help='History index of the run to check.')
+        compare.add_argument('--threshold', type=float, default=0.2,
+                             help='Allowed growth of time and peak memory, as a fraction.')
+        compare.add_argument('--history', default=default_history)
+
+    def handle(self, *args, **options):
+        if options['action'] == 'run':
+            self._run(options)
+        else:
+            self._compare(options)
+
+    def _run(self, options):
+        try:
+            sizes = [int(n) for n in options['sizes'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+        only = {name.strip() for name in options['only'].split(',') if name.strip()}
+        unknown = only - {bench.name for bench in benchmarks.BENCHMARKS}
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+        with benchmarks.in_memory_database():
+            results = benchmarks.run_benchmarks(sizes, options['repeat'], only)
+        entry = benchmarks.append_history(options['history'], results, options['label'])
+
+        self.stdout.write(f'{"benchmark":<38}{"median ms":>12}{"peak KiB":>12}{"queries":>9}')
+        for key, result in results.items():
+            self.stdout.write(
+                f'{key:<38}{result["seconds"] * 1000:>12.3f}{result["peak_bytes"] / 1024:>12.1f}{result["queries"]:>9}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Recorded run {entry["time"]} in {options["history"]}'))
+
+    def _compare(self, options):
+        history = benchmarks.load_history(options['history'])
+        try:
+            baseline, current = history[options['baseline']], history[options['current']]
+        except IndexError:
+            raise CommandError(f'{options["history"]} has {len(history)} run(s); need a baseline and a current run.')
+
+        rows = benchmarks.compare(baseline, current, options['threshold'])
+        regressions = [row for row in rows if row[4]]
+        self.stdout.write(f'Baseline {baseline["time"]} {baseline["revision"]} -> current {current["time"]} {current["revision"]}')
+        for key, metric, old, new, regressed in rows:
+            change = f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+            marker = '  REGRESSION' if regressed else ''
+            self.stdout.write(f'{key:<38}{metric:<12}{old:>14.6g}{new:>14.6g}{change:>10}{marker}')
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) beyond {options["threshold"]:.0%}.')
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,45 @@
+"""
+Profile what a worker imports before it can serve its first request.
+
+    python manage.py importtime                   # Main.wsgi plus the URLconf
+    python manage.py importtime --top 40 --budget 800
+    python manage.py importtime --script "import Main.asgi"
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tournifyx import importtime
+
+
+class Command(BaseCommand):
+    help = 'Run a cold start under "python -X importtime" and summarize the slowest imports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--script', default=importtime.COLD_START, help='Python code to profile.')
+        parser.add_argument('--top', type=int, default=20, help='Rows per table.')
+        parser.add_argument('--budget', type=float, default=settings.STARTUP_BUDGET_MS,
+                            help='Fail when the total import time exceeds this many milliseconds.')
+
+    def handle(self, *args, **options):
+        try:
+            imports = importtime.profile(options['script'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        top = options['top']
+
+        self.stdout.write('Slowest modules (own time):')
+        for i in sorted(imports, key=lambda i: i.self_us, reverse=True)[:top]:
+            self.stdout.write(f'  {i.self_us / 1000:8.1f} ms  {i.module}')
+        self.stdout.write('Project modules (with their imports):')
+        ours = [i for i in imports if i.module.split('.')[0] in ('Main', 'tournifyx')]
+        for i in sorted(ours, key=lambda i: i.cumulative_us, reverse=True)[:top]:
+            self.stdout.write(f'  {i.cumulative_us / 1000:8.1f} ms  {i.module}')
+
+        total = importtime.total_ms(imports)
+        self.stdout.write(f'{len(imports)} modules, {total:.1f} ms')
+        eager = importtime.eager(imports)
+        if eager:
+            raise CommandError(f'Imported at startup, should load lazily: {", ".join(eager)}')
+        if total > options['budget']:
+            raise CommandError(f'Startup imports took {total:.1f} ms, over the {options["budget"]:.0f} ms budget.')
+        self.stdout.write(self.style.SUCCESS(f'Within the {options["budget"]:.0f} ms budget.'))
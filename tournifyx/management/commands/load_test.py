@@ -0,0 +1,345 @@
+"""
+Replay TournifyX traffic patterns against a running server and check data invariants afterwards.
+
+    python manage.py runserver &            # or any WSGI/ASGI server using the same database
+    python manage.py load_test --base-url http://127.0.0.1:8000 --joiners 300 --duration 30
+
+Scenarios (all run concurrently):
+  join rush   - `--joiners` logged-in users POST join_tournament at once for the last `--seats` seats
+  spectators  - poll knockout-json every `--poll-interval` seconds, like static/js/bracket.js
+  hosts       - enter results on a league and a knockout tournament
+  visitors    - anonymous home page views
+
+The command creates its own users and tournaments through the ORM, so it must point at the
+same database as the server. They are deleted afterwards unless --keep is given.
+"""
+import random
+import string
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from http.cookiejar import CookieJar
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.urls import reverse
+
+from tournifyx.models import HostProfile, Match, Player, PointTable, Tournament, UserProfile
+from tournifyx.utils import compute_standings
+
+
+PASSWORD = 'load-test-password'
+# static/js/bracket.js POLL_INTERVAL
+SPECTATOR_POLL_SECONDS = 2.5
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Client:
+    """Minimal cookie-keeping HTTP client; redirects are reported, not followed."""
+
+    def __init__(self, base_url, recorder, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect())
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, scenario, path, data=None, record=True):
+        url = self.base_url + path
+        body = None
+        headers = {}
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            body = urllib.parse.urlencode(data).encode()
+            headers = {'X-CSRFToken': self.csrf_token(), 'Referer': url}
+        started = time.perf_counter()
+        try:
+            with self.opener.open(urllib.request.Request(url, data=body, headers=headers), timeout=self.timeout) as response:
+                content = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            content = e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError) as e:
+            content = b''
+            status = type(e).__name__
+        if record:
+            self.recorder.add(scenario, time.perf_counter() - started, status)
+        return status, content
+
+    def login(self, username):
+        path = reverse('login')
+        self.request('login', path, record=False)
+        status, _ = self.request('login', path, {'username': username, 'password': PASSWORD})
+        return status == 302
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, scenario, seconds, status):
+        with self.lock:
+            self.samples[scenario].append((seconds, status))
+
+    def report(self, elapsed):
+        rows = []
+        for scenario, samples in sorted(self.samples.items()):
+            latencies = sorted(s for s, _ in samples)
+            errors = sum(1 for _, status in samples if not isinstance(status, int) or status >= 500)
+            client_errors = sum(1 for _, status in samples if isinstance(status, int) and 400 <= status < 500)
+            rows.append({
+                'scenario': scenario,
+                'requests': len(samples),
+                'rps': len(samples) / elapsed if elapsed else 0,
+                'p50': _percentile(latencies, 50) * 1000,
+                'p95': _percentile(latencies, 95) * 1000,
+                'p99': _percentile(latencies, 99) * 1000,
+                'max': latencies[-1] * 1000 if latencies else 0,
+                'errors': errors,
+                'client_errors': client_errors,
+            })
+        return rows
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, -(-len(values) * pct // 100) - 1))
+    return values[int(index)]
+
+
+# ==============================
+# 🔸 Invariants
+# ==============================
+def check_invariants(tournament_ids):
+    """Return a list of human-readable violations for the given tournaments."""
+    violations = []
+    tournaments = Tournament.objects.filter(id__in=tournament_ids).annotate(
+        player_count=models.Count('player', distinct=True),
+        participant_count=models.Count('tournamentparticipant', distinct=True),
+    )
+    for t in tournaments:
+        if t.player_count > t.num_participants:
+            violations.append(f'Tournament {t.id} is overfilled: {t.player_count}/{t.num_participants} players.')
+        if t.participant_count > t.num_participants:
+            violations.append(f'Tournament {t.id} has {t.participant_count} participants for {t.num_participants} seats.')
+
+        duplicates = (
+            Player.objects.filter(tournament=t, user_profile__isnull=False)
+            .values('user_profile').annotate(n=models.Count('id')).filter(n__gt=1)
+        )
+        for row in duplicates:
+            violations.append(f'Tournament {t.id} has {row["n"]} players for user profile {row["user_profile"]}.')
+
+        results = Match.objects.filter(tournament=t).values_list('player1_id', 'player2_id', 'winner_id', 'is_draw')
+        expected = compute_standings(results)
+        fields = ['matches_played', 'wins', 'draws', 'losses', 'points']
+        actual = {row['player_id']: row for row in PointTable.objects.filter(tournament=t).values('player_id', *fields)}
+        for player_id in set(expected) | set(actual):
+            want = expected.get(player_id, dict.fromkeys(fields, 0))
+            have = actual.get(player_id, dict.fromkeys(fields, 0))
+            if any(want[f] != have[f] for f in fields):
+                violations.append(f'Tournament {t.id} standings for player {player_id} do not match its results.')
+
+        if t.match_type == 'knockout':
+            per_round = Match.objects.filter(tournament=t).values('round_number').annotate(n=models.Count('id'))
+            for row in per_round:
+                allowed = t.num_participants >> row['round_number']
+                if row['n'] > allowed:
+                    violations.append(f'Tournament {t.id} round {row["round_number"]} has {row["n"]} matches, expected at most {allowed}.')
+    return violations
+
+
+# ==============================
+# 🔸 Scenarios
+# ==============================
+def _join_rush(base_url, recorder, usernames, code, barrier, outcomes):
+    def run(username):
+        client = Client(base_url, recorder)
+        logged_in = client.login(username)
+        barrier.wait()
+        if not logged_in:
+            outcomes['login_failed'] += 1
+            return
+        status, _ = client.request('join_tournament', reverse('join_tournament'), {'join_tournament': '1', 'tournament_code': code})
+        outcomes[status] += 1
+    return [threading.Thread(target=run, args=(username,)) for username in usernames]
+
+
+def _spectators(base_url, recorder, count, tournament_id, interval, deadline, seed):
+    def run(n):
+        rng = random.Random(f'{seed}:spectator:{n}')
+        client = Client(base_url, recorder)
+        path = reverse('tournament_knockout_json', args=[tournament_id])
+        time.sleep(rng.uniform(0, interval))  # spread the first polls like real page loads
+        while time.monotonic() < deadline:
+            client.request('knockout_json', path)
+            time.sleep(interval)
+    return [threading.Thread(target=run, args=(n,)) for n in range(count)]
+
+
+def _visitors(base_url, recorder, count, deadline, seed):
+    def run(n):
+        rng = random.Random(f'{seed}:visitor:{n}')
+        client = Client(base_url, recorder)
+        while time.monotonic() < deadline:
+            client.request('home', reverse('home'))
+            time.sleep(rng.uniform(0.5, 2.0))
+    return [threading.Thread(target=run, args=(n,)) for n in range(count)]
+
+
+def _hosts(base_url, recorder, count, host_username, league_match_ids, knockout_id, deadline, seed):
+    def run(n):
+        rng = random.Random(f'{seed}:host:{n}')
+        client = Client(base_url, recorder)
+        try:
+            if not client.login(host_username):
+                return
+            while time.monotonic() < deadline:
+                if rng.random() < 0.5:
+                    # Re-enter a league result, sometimes as a draw
+                    match = Match.objects.values('id', 'player1_id', 'player2_id').get(id=rng.choice(league_match_ids))
+                    draw = rng.random() < 0.1
+                else:
+                    # Decide an open match of the current knockout round
+                    match = (
+                        Match.objects.filter(tournament_id=knockout_id, winner__isnull=True, player2__isnull=False)
+                        .values('id', 'player1_id', 'player2_id').order_by('id').first()
+                    )
+                    draw = False
+                if match:
+                    data = {'draw': 'on'} if draw else {'winner_id': rng.choice([match['player1_id'], match['player2_id']])}
+                    client.request('update_match_result', reverse('update_match_result', args=[match['id']]), data)
+                time.sleep(rng.uniform(0.2, 1.0))
+        finally:
+            connection.close()
+    return [threading.Thread(target=run, args=(n,)) for n in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Run a concurrent load test against a running server and verify data invariants afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to keep polling and entering results.')
+        parser.add_argument('--joiners', type=int, default=200, help='Users racing for the last seats.')
+        parser.add_argument('--seats', type=int, default=5, help='Seats left in the join-rush tournament.')
+        parser.add_argument('--spectators', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=SPECTATOR_POLL_SECONDS)
+        parser.add_argument('--hosts', type=int, default=2)
+        parser.add_argument('--visitors', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keep', action='store_true', help='Keep the generated users and tournaments.')
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        run = f'{seed}_{int(time.time())}'
+        fixtures = self._setup(run, options)
+        try:
+            self._run(fixtures, options)
+            violations = check_invariants(fixtures['tournament_ids'])
+        finally:
+            if not options['keep']:
+                Tournament.objects.filter(id__in=fixtures['tournament_ids']).delete()
+                User.objects.filter(username__startswith=f'lt_{run}_').delete()
+
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f'{len(violations)} invariant violation(s).')
+        self.stdout.write(self.style.SUCCESS('All invariants hold.'))
+
+    def _setup(self, run, options):
+        password = make_password(PASSWORD)
+        host_username = f'lt_{run}_host'
+        host_user = User.objects.create(username=host_username, password=password)
+        host = HostProfile.objects.create(user=host_user)
+
+        usernames = [f'lt_{run}_u{n}' for n in range(options['joiners'])]
+        users = User.objects.bulk_create([User(username=name, password=password) for name in usernames], batch_size=500)
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users], batch_size=500)
+
+        def tournament(name, match_type, seats):
+            # A fresh code, as create_tournament picks one: codes are unique and runs may be --keep'd
+            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+            while Tournament.all_objects.filter(code=code).exists():
+                code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+            return Tournament.objects.create(
+                name=f'Load test {name}', category='valorant', match_type=match_type, num_participants=seats,
+                created_by=host, code=code, is_active=True, is_public=True,
+            )
+
+        rush = tournament('rush', 'league', 8 + options['seats'])
+        Player.objects.bulk_create([Player(tournament=rush, name=f'Seeded {n}', added_by=host) for n in range(8)])
+
+        league = tournament('league', 'league', 8)
+        league_players = Player.objects.bulk_create([Player(tournament=league, name=f'L{n}', added_by=host) for n in range(8)])
+        league_matches = [
+            Match.objects.create(tournament=league, player1=a, player2=b, stage='GROUP', round_number=1)
+            for i, a in enumerate(league_players) for b in league_players[i + 1:]
+        ]
+
+        knockout = tournament('bracket', 'knockout', 16)
+        ko_players = Player.objects.bulk_create([Player(tournament=knockout, name=f'K{n}', added_by=host) for n in range(16)])
+        for a, b in zip(ko_players[::2], ko_players[1::2]):
+            Match.objects.create(tournament=knockout, player1=a, player2=b, stage='KNOCKOUT', round_number=1)
+
+        return {
+            'host_username': host_username,
+            'usernames': usernames,
+            'rush': rush,
+            'league_match_ids': [m.id for m in league_matches],
+            'knockout_id': knockout.id,
+            'tournament_ids': [rush.id, league.id, knockout.id],
+        }
+
+    def _run(self, fixtures, options):
+        base_url = options['base_url']
+        recorder = Recorder()
+        outcomes = defaultdict(int)
+        barrier = threading.Barrier(len(fixtures['usernames']) + 1)
+        started = time.monotonic()
+        deadline = started + options['duration']
+
+        joiners = _join_rush(base_url, recorder, fixtures['usernames'], fixtures['rush'].code, barrier, outcomes)
+        background = (
+            _spectators(base_url, recorder, options['spectators'], fixtures['knockout_id'], options['poll_interval'], deadline, options['seed'])
+            + _hosts(base_url, recorder, options['hosts'], fixtures['host_username'], fixtures['league_match_ids'],
+                     fixtures['knockout_id'], deadline, options['seed'])
+            + _visitors(base_url, recorder, options['visitors'], deadline, options['seed'])
+        )
+        for thread in background + joiners:
+            thread.daemon = True
+            thread.start()
+        self.stdout.write(f'{len(joiners)} joiners logging in...')
+        barrier.wait()
+        self.stdout.write('Join rush started.')
+        for thread in joiners + background:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f'\n{"scenario":<22}{"reqs":>7}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}{"5xx":>6}{"4xx":>6}')
+        for row in recorder.report(elapsed):
+            self.stdout.write(
+                f'{row["scenario"]:<22}{row["requests"]:>7}{row["rps"]:>9.1f}{row["p50"]:>9.1f}{row["p95"]:>9.1f}'
+                f'{row["p99"]:>9.1f}{row["max"]:>9.1f}{row["errors"]:>6}{row["client_errors"]:>6}'
+            )
+        seated = Player.objects.filter(tournament=fixtures['rush'], user_profile__isnull=False).count()
+        self.stdout.write(f'\nJoin rush: {seated}/{options["seats"]} seats taken by {len(joiners)} users; responses {dict(outcomes)}')
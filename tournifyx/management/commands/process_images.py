@@ -0,0 +1,33 @@
+"""
+Render the resized variants of uploaded avatars and cover photos.
+
+    python manage.py process_images                  # once, e.g. from cron
+    python manage.py process_images --interval 2     # keep running as a background worker
+
+Each job is leased by one worker at a time, so several workers may run side by side.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournifyx import images
+
+
+class Command(BaseCommand):
+    help = 'Render WebP and JPEG variants of newly uploaded profile images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Jobs per pass.')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between passes; 0 runs until no jobs are left and exits.')
+
+    def handle(self, *args, **options):
+        while True:
+            rendered = images.process_jobs(options['limit'])
+            if rendered:
+                self.stdout.write(f'Rendered variants for {rendered} image(s).')
+                continue
+            if not options['interval']:
+                self.stdout.write(self.style.SUCCESS('No jobs left.'))
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+"""
+Apply stored Stripe webhook events to their payments.
+
+    python manage.py process_stripe_events                  # once, e.g. from cron
+    python manage.py process_stripe_events --interval 2     # keep running as a background worker
+
+Each event is applied in its own transaction and at most once, so several workers may run side by side.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournifyx import checkout
+
+
+class Command(BaseCommand):
+    help = 'Apply Stripe webhook events stored by the webhook endpoint to their payments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Events per pass.')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between passes; 0 runs until no events are left and exits.')
+
+    def handle(self, *args, **options):
+        while True:
+            applied = checkout.process_events(options['limit'])
+            if applied:
+                self.stdout.write(f'Applied {applied} event(s).')
+                continue
+            if not options['interval']:
+                self.stdout.write(self.style.SUCCESS('No events left.'))
+                return
+            time.sleep(options['interval'])
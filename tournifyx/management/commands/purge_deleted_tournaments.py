@@ -0,0 +1,46 @@
+"""
+Purge tournaments deleted more than DELETE_UNDO_MINUTES ago.
+
+    python manage.py purge_deleted_tournaments                  # once, e.g. from cron
+    python manage.py purge_deleted_tournaments --interval 60    # keep running as a background worker
+
+Rows go in batches of --batch-size, one short transaction each; a purge interrupted at any point
+continues on the next run.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournifyx import purge
+
+
+class Command(BaseCommand):
+    help = 'Delete the rows of soft-deleted tournaments whose undo window has closed, in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per DELETE.')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many tournaments (0: no limit).')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between passes; 0 runs a single pass and exits.')
+
+    def handle(self, *args, **options):
+        while True:
+            self._pass(options)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def _pass(self, options):
+        tournaments = purge.candidates()
+        if options['limit']:
+            tournaments = tournaments[:options['limit']]
+        tournaments = list(tournaments)
+        for n, tournament in enumerate(tournaments, 1):
+            prefix = f'[{n}/{len(tournaments)}] tournament {tournament.id}'
+            rows = purge.purge_tournament(
+                tournament, batch_size=options['batch_size'],
+                progress=lambda table, deleted: self.stdout.write(f'{prefix}: {table} {deleted} rows deleted'),
+            )
+            self.stdout.write(f'{prefix}: purged, {rows} rows')
+        if tournaments or not options['interval']:
+            self.stdout.write(self.style.SUCCESS(f'Purged {len(tournaments)} tournament(s).'))
@@ -0,0 +1,453 @@
+"""
+Seed a large synthetic dataset for benchmarks and load tests.
+
+    python manage.py seed_bench --users 100000 --tournaments 20000 --matches 2000000 --workers 4
+
+Everything is derived from --seed: every tournament draws from its own Random(seed, index)
+and every row gets a primary key computed up front, so the same seed on the same starting
+database produces identical rows whether it runs in one process or in several workers.
+Workers write into their own staging SQLite files, which are merged into the database at the end.
+"""
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.db.utils import load_backend
+
+from tournifyx.models import (
+    HostProfile, Match, Payment, Player, PointTable, Tournament, TournamentParticipant, UserProfile,
+)
+from tournifyx.utils import compute_standings
+
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+CATEGORIES = [value for value, _ in Tournament.CATEGORY_CHOICES]
+MATCH_TYPES = [value for value, _ in Tournament.MATCH_TYPE_CHOICES]
+PAYMENT_METHODS = [value for value, _ in Payment.PAYMENT_METHOD_CHOICES]
+
+# Insert order of the per-tournament tables (foreign keys first)
+TOURNAMENT_MODELS = [Tournament, Player, TournamentParticipant, Match, PointTable, Payment]
+# Objects buffered before a chunk is written
+CHUNK_OBJECTS = 50000
+
+Plan = namedtuple('Plan', ['match_type', 'category', 'players', 'joined', 'extra_payers', 'is_paid',
+                           'is_public', 'finished', 'knockout_rounds', 'matches'])
+Ids = namedtuple('Ids', ['tournament', 'player', 'participant', 'match', 'point', 'payment'])
+Population = namedtuple('Population', ['users', 'user_base', 'profile_base', 'hosts', 'host_base'])
+
+
+def _stage(num_matches):
+    if num_matches == 1:
+        return 'FINAL'
+    if num_matches == 2:
+        return 'SEMI'
+    if num_matches == 4:
+        return 'QUARTER'
+    return 'KNOCKOUT'
+
+
+def _code(pk):
+    """Unique 6-character tournament code derived from the primary key."""
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    code = ''
+    while pk:
+        pk, rem = divmod(pk, 36)
+        code = digits[rem] + code
+    return code.rjust(6, '0')[-6:]
+
+
+def plan_tournament(seed, index, avg_matches, users):
+    """Size and shape of tournament `index`; cheap, so the parent can lay out every id range."""
+    rng = random.Random(f'{seed}:plan:{index}')
+    match_type = MATCH_TYPES[index % len(MATCH_TYPES)]
+    category = CATEGORIES[(index // len(MATCH_TYPES)) % len(CATEGORIES)]
+    target = max(1.0, avg_matches * rng.uniform(0.5, 1.5))
+    finished = rng.random() < 0.5
+
+    if match_type == 'knockout':
+        rounds = max(1, round(math.log2(target + 1)))
+        players = 2 ** rounds
+        played = rounds if finished else rng.randrange(rounds)
+        # Rounds exist up to the first unfinished one
+        knockout_rounds = min(played + 1, rounds)
+        matches = sum(players >> r for r in range(1, knockout_rounds + 1))
+    else:
+        players = max(2, round((1 + math.sqrt(1 + 8 * target)) / 2))
+        knockout_rounds = 0
+        matches = players * (players - 1) // 2
+
+    is_public = rng.random() < 0.6
+    is_paid = rng.random() < 0.3
+    joined = min(users, round(players * rng.random())) if is_public else 0
+    extra_payers = min(users - joined, rng.randint(0, 3)) if is_paid else 0
+    return Plan(match_type, category, players, joined, extra_payers, is_paid, is_public, finished,
+                knockout_rounds, matches)
+
+
+def _row_counts(plan):
+    payments = plan.joined + plan.extra_payers if plan.is_paid else 0
+    # Point table ids are reserved for every player; only players with results get a row
+    return Ids(1, plan.players, plan.joined, plan.matches, plan.players, payments)
+
+
+def build_tournament(seed, index, plan, ids, population):
+    """Model instances for one tournament with its players, matches, standings and payments."""
+    rng = random.Random(f'{seed}:tournament:{index}')
+    created = EPOCH + timedelta(minutes=rng.randrange(365 * 24 * 60))
+    host_index = rng.randrange(population.hosts)
+    host_id = population.host_base + host_index + 1
+    price = Decimal(rng.choice([50, 100, 200, 500])) if plan.is_paid else Decimal('0.00')
+
+    tournament = Tournament(
+        id=ids.tournament,
+        name=f'{plan.category.title()} {plan.match_type.title()} #{index + 1}',
+        description='Seeded benchmark tournament',
+        category=plan.category,
+        num_participants=plan.players,
+        match_type=plan.match_type,
+        created_by_id=host_id,
+        code=_code(ids.tournament),
+        is_active=True,
+        is_paid=plan.is_paid,
+        price=price,
+        payment_phone='01700000000' if plan.is_paid else None,
+        is_public=plan.is_public,
+        registration_deadline=created + timedelta(days=7),
+        is_finished=plan.finished,
+    )
+
+    user_indexes = rng.sample(range(population.users), plan.joined + plan.extra_payers)
+    players, participants = [], []
+    for n in range(plan.players):
+        if n < plan.joined:
+            user_pk = population.user_base + user_indexes[n] + 1
+            profile_id = population.profile_base + user_indexes[n] + 1
+            players.append(Player(
+                id=ids.player + n, tournament_id=tournament.id, name=f'bench_{user_pk}', ign=f'bench_{user_pk}',
+                team_name=f'bench_{user_pk}', user_profile_id=profile_id,
+            ))
+            participants.append(TournamentParticipant(
+                id=ids.participant + n, tournament_id=tournament.id, user_profile_id=profile_id,
+                joined_at=created + timedelta(minutes=n),
+            ))
+        else:
+            players.append(Player(
+                id=ids.player + n, tournament_id=tournament.id, name=f'Player {n + 1}', added_by_id=host_id,
+            ))
+
+    kickoff = created + timedelta(days=8)
+    if plan.match_type == 'knockout':
+        matches = _knockout_matches(rng, plan, ids, tournament, players, kickoff)
+    else:
+        matches = _league_matches(rng, plan, ids, tournament, players, kickoff)
+
+    standings = compute_standings((m.player1_id, m.player2_id, m.winner_id, m.is_draw) for m in matches)
+    points = [
+        PointTable(id=ids.point + n, tournament_id=tournament.id, player_id=player.id, **standings[player.id])
+        for n, player in enumerate(players) if player.id in standings
+    ]
+
+    payments = []
+    if plan.is_paid:
+        for n, user_index in enumerate(user_indexes):
+            is_player = n < plan.joined
+            status = 'completed' if is_player else rng.choice(['pending_approval', 'rejected', 'pending'])
+            paid_at = created + timedelta(hours=1 + n)
+            payments.append(Payment(
+                id=ids.payment + n, tournament_id=tournament.id,
+                user_profile_id=population.profile_base + user_index + 1,
+                player_id=players[n].id if is_player else None,
+                amount=price, payment_method=rng.choice(PAYMENT_METHODS), status=status,
+                transaction_id=f'BENCH{ids.payment + n}',
+                payment_details={'sender_number': f'017{rng.randrange(10 ** 8):08d}'},
+                created_at=paid_at, updated_at=paid_at,
+                completed_at=paid_at if status == 'completed' else None,
+            ))
+
+    if plan.finished:
+        # Drawn last so every value above stays the same; within two days of the last match
+        last_match = max((m.scheduled_time for m in matches), default=kickoff)
+        tournament.finished_at = last_match + timedelta(minutes=rng.randrange(1, 48 * 60))
+
+    return {
+        Tournament: [tournament], Player: players, TournamentParticipant: participants,
+        Match: matches, PointTable: points, Payment: payments,
+    }
+
+
+def _result(rng, match, draws=True):
+    if draws and rng.random() < 0.1:
+        match.is_draw = True
+    else:
+        match.winner_id = rng.choice([match.player1_id, match.player2_id])
+
+
+def _league_matches(rng, plan, ids, tournament, players, kickoff):
+    played_share = 1.0 if plan.finished else rng.random()
+    matches = []
+    for n, (p1, p2) in enumerate(itertools.combinations(players, 2)):
+        match = Match(
+            id=ids.match + n, tournament_id=tournament.id, player1_id=p1.id, player2_id=p2.id,
+            stage='GROUP', round_number=1, scheduled_time=kickoff + timedelta(hours=n),
+        )
+        if rng.random() < played_share:
+            _result(rng, match)
+        matches.append(match)
+    return matches
+
+
+def _knockout_matches(rng, plan, ids, tournament, players, kickoff):
+    entrants = [p.id for p in players]
+    rng.shuffle(entrants)
+    pairs = [(entrants[i], entrants[i + 1], None, None) for i in range(0, len(entrants), 2)]
+    total_rounds = int(math.log2(plan.players))
+    played_rounds = total_rounds if plan.finished else plan.knockout_rounds - 1
+
+    matches = []
+    for round_number in range(1, plan.knockout_rounds + 1):
+        current = []
+        for p1, p2, parent1, parent2 in pairs:
+            match = Match(
+                id=ids.match + len(matches), tournament_id=tournament.id, player1_id=p1, player2_id=p2,
+                stage=_stage(len(pairs)), round_number=round_number, parent_match1_id=parent1,
+                parent_match2_id=parent2, scheduled_time=kickoff + timedelta(days=round_number - 1),
+            )
+            if round_number <= played_rounds:
+                _result(rng, match, draws=False)
+            matches.append(match)
+            current.append(match)
+        pairs = [
+            (a.winner_id, b.winner_id, a.id, b.id)
+            for a, b in zip(current[::2], current[1::2])
+        ]
+    return matches
+
+
+@contextmanager
+def _explicit_timestamps():
+    """Keep the generated created_at/updated_at/joined_at values instead of now()."""
+    fields = [
+        f for model in TOURNAMENT_MODELS for f in model._meta.concrete_fields
+        if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _write(buffer, using, batch_size):
+    with transaction.atomic(using=using):
+        for model in TOURNAMENT_MODELS:
+            if buffer[model]:
+                model.objects.using(using).bulk_create(buffer[model], batch_size=batch_size)
+    counts = {model: len(buffer[model]) for model in TOURNAMENT_MODELS}
+    for model in TOURNAMENT_MODELS:
+        buffer[model] = []
+    return counts
+
+
+def seed_tournaments(seed, jobs, population, using, batch_size):
+    """Build and insert the tournaments in `jobs` ((index, plan, ids) tuples) in chunks."""
+    totals = dict.fromkeys(TOURNAMENT_MODELS, 0)
+    buffer = {model: [] for model in TOURNAMENT_MODELS}
+    buffered = 0
+    with _explicit_timestamps():
+        for index, plan, ids in jobs:
+            for model, objs in build_tournament(seed, index, plan, ids, population).items():
+                buffer[model].extend(objs)
+                buffered += len(objs)
+            if buffered >= CHUNK_OBJECTS:
+                for model, n in _write(buffer, using, batch_size).items():
+                    totals[model] += n
+                buffered = 0
+        for model, n in _write(buffer, using, batch_size).items():
+            totals[model] += n
+    return totals
+
+
+# ==============================
+# 🔸 Parallel workers
+# ==============================
+def _register_staging(path):
+    alias = f'seed_stage_{os.path.basename(path).split(".")[0]}'
+    config = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: {}, alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}}
+    )[alias]
+    # Only this thread's connection handler learns about the alias; settings stay untouched
+    connections[alias] = load_backend(config['ENGINE']).DatabaseWrapper(config, alias)
+    return alias
+
+
+def _staging_worker(args):
+    """Seed a slice of tournaments into its own SQLite file (runs in a forked process)."""
+    path, seed, jobs, population, batch_size = args
+    alias = _register_staging(path)
+    staging = connections[alias]
+    with staging.schema_editor() as editor:
+        for model in TOURNAMENT_MODELS:
+            editor.create_model(model)
+    # Users and hosts live in the main database only
+    staging.disable_constraint_checking()
+    try:
+        totals = seed_tournaments(seed, jobs, population, alias, batch_size)
+    finally:
+        staging.close()
+    return path, {model._meta.label: n for model, n in totals.items()}
+
+
+def _merge_staging(path, batch_size):
+    """Copy a staging file's rows into the default database, keeping their primary keys."""
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute('ATTACH DATABASE %s AS stage', [path])
+            try:
+                with transaction.atomic():
+                    for model in TOURNAMENT_MODELS:
+                        table = quote(model._meta.db_table)
+                        columns = ', '.join(quote(f.column) for f in model._meta.concrete_fields)
+                        cursor.execute(f'INSERT INTO main.{table} ({columns}) SELECT {columns} FROM stage.{table}')
+            finally:
+                cursor.execute('DETACH DATABASE stage')
+        return
+
+    alias = _register_staging(path)
+    try:
+        with transaction.atomic(), _explicit_timestamps():
+            for model in TOURNAMENT_MODELS:
+                rows = model.objects.using(alias).order_by('pk').iterator(chunk_size=batch_size)
+                while True:
+                    chunk = list(itertools.islice(rows, batch_size))
+                    if not chunk:
+                        break
+                    model.objects.bulk_create(chunk, batch_size=batch_size)
+    finally:
+        connections[alias].close()
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset (users, tournaments, matches, payments) for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tournaments', type=int, default=200)
+        parser.add_argument('--matches', type=int, default=20000, help='Approximate total number of matches.')
+        parser.add_argument('--hosts', type=int, default=None, help='Users that also host (default: 1 in 20).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=1, help='Parallel worker processes for tournament data.')
+
+    def handle(self, *args, **options):
+        users, tournaments = options['users'], options['tournaments']
+        if users < 1 or tournaments < 0 or options['matches'] < 0:
+            raise CommandError('--users must be at least 1 and counts cannot be negative.')
+        hosts = options['hosts'] or max(1, users // 20)
+        if hosts > users:
+            raise CommandError('--hosts cannot exceed --users.')
+        seed, batch_size = options['seed'], options['batch_size']
+        workers = options['workers']
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self.stderr.write('Parallel workers need fork(); seeding in a single process.')
+            workers = 1
+
+        started = time.perf_counter()
+        base = {
+            model: model.objects.aggregate(m=models.Max('pk'))['m'] or 0
+            for model in [User, UserProfile, HostProfile] + TOURNAMENT_MODELS
+        }
+        population = Population(users, base[User], base[UserProfile], hosts, base[HostProfile])
+        self._seed_users(population, seed, batch_size)
+        self.stdout.write(f'Users: {users} ({hosts} hosts) in {time.perf_counter() - started:.1f}s')
+
+        # Lay out every tournament's id ranges so any worker can build any tournament
+        avg_matches = options['matches'] / tournaments if tournaments else 0
+        jobs = []
+        next_ids = Ids(*(base[model] + 1 for model in TOURNAMENT_MODELS))
+        for index in range(tournaments):
+            plan = plan_tournament(seed, index, avg_matches, users)
+            jobs.append((index, plan, next_ids))
+            next_ids = Ids(*(a + b for a, b in zip(next_ids, _row_counts(plan))))
+
+        codes = [_code(ids.tournament) for _, _, ids in jobs]
+        taken = set(Tournament.objects.values_list('code', flat=True))
+        if taken.intersection(codes):
+            raise CommandError('Generated tournament codes collide with existing tournaments.')
+
+        phase = time.perf_counter()
+        if workers > 1:
+            totals = self._seed_parallel(seed, jobs, population, batch_size, workers)
+        else:
+            totals = {model._meta.label: n for model, n in
+                      seed_tournaments(seed, jobs, population, DEFAULT_DB_ALIAS, batch_size).items()}
+
+        # Explicit primary keys bypass sequences on backends that have them
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), [User, UserProfile, HostProfile] + TOURNAMENT_MODELS)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+        summary = ', '.join(f'{label.split(".")[1]}={n}' for label, n in totals.items())
+        self.stdout.write(f'Tournament data in {time.perf_counter() - phase:.1f}s: {summary}')
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.1f}s (seed={seed}).'))
+
+    def _seed_users(self, population, seed, batch_size):
+        password = make_password(f'bench-{seed}')
+        for start in range(0, population.users, batch_size):
+            stop = min(start + batch_size, population.users)
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(id=population.user_base + n + 1, username=f'bench_{population.user_base + n + 1}',
+                         email=f'bench_{population.user_base + n + 1}@example.com', password=password,
+                         date_joined=EPOCH + timedelta(minutes=n))
+                    for n in range(start, stop)
+                ], batch_size=batch_size)
+                UserProfile.objects.bulk_create([
+                    UserProfile(id=population.profile_base + n + 1, user_id=population.user_base + n + 1)
+                    for n in range(start, stop)
+                ], batch_size=batch_size)
+                HostProfile.objects.bulk_create([
+                    HostProfile(id=population.host_base + n + 1, user_id=population.user_base + n + 1,
+                                organization=f'Bench Org {n + 1}')
+                    for n in range(start, min(stop, population.hosts))
+                ], batch_size=batch_size)
+
+    def _seed_parallel(self, seed, jobs, population, batch_size, workers):
+        staging_dir = tempfile.mkdtemp(prefix='seed_bench_')
+        slices = [jobs[n::workers] for n in range(workers)]
+        tasks = [
+            (os.path.join(staging_dir, f'worker{n}.sqlite3'), seed, part, population, batch_size)
+            for n, part in enumerate(slices) if part
+        ]
+        totals = {}
+        try:
+            with multiprocessing.get_context('fork').Pool(len(tasks)) as pool:
+                results = pool.map(_staging_worker, tasks)
+            for path, counts in results:
+                merge_started = time.perf_counter()
+                _merge_staging(path, batch_size)
+                self.stdout.write(f'Merged {os.path.basename(path)} in {time.perf_counter() - merge_started:.1f}s')
+                for label, n in counts.items():
+                    totals[label] = totals.get(label, 0) + n
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        return totals
@@ -0,0 +1,305 @@
+"""
+Prometheus text-format metrics.
+
+Each worker process keeps its samples in its own memory-mapped file under
+settings.METRICS_DIR (`samples_<pid>.db`); /metrics reads every file in the directory
+and sums them, so counters survive across WSGI workers without any locking between
+processes. Without METRICS_DIR samples are only kept in memory for the current process.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help)
+METRICS = {
+    'tournifyx_http_requests_total': ('counter', 'Requests handled, by URL name, method and status.'),
+    'tournifyx_http_request_duration_seconds': ('histogram', 'Request latency by URL name.'),
+    'tournifyx_db_queries_total': ('counter', 'SQL queries executed, by URL name.'),
+    'tournifyx_cache_requests_total': ('counter', 'Cache lookups by cache alias and result (hit/miss).'),
+    'tournifyx_cache_hit_ratio': ('gauge', 'Cache hits / lookups, by cache alias.'),
+    'tournifyx_tournament_joins_total': ('counter', 'Players who joined a tournament.'),
+    'tournifyx_fixtures_generated_total': ('counter', 'Fixtures (matches) created, by stage.'),
+    'tournifyx_match_results_total': ('counter', 'Match results entered.'),
+    'tournifyx_payments_reviewed_total': ('counter', 'Payments reviewed by hosts, by decision.'),
+    'tournifyx_duplicate_transactions_total': ('counter', 'Payment submissions refused for reusing a transaction ID, by method.'),
+    'tournifyx_stripe_events_total': ('counter', 'Stripe webhook events applied by the worker, by type and outcome.'),
+    'tournifyx_images_processed_total': ('counter', 'Uploaded images resized by the worker, by field and outcome.'),
+    'tournifyx_assets_served_total': ('counter', 'Static and media responses served by AssetMiddleware, by kind, status and encoding.'),
+    'tournifyx_page_cache_total': ('counter', 'Pages looked up in the page cache, by view and result (hit/stale/miss/waited/timeout).'),
+    'tournifyx_leave_requests_total': ('counter', 'Leave requests, by status.'),
+    'tournifyx_write_gate_wait_seconds': ('histogram', 'Time unsafe requests waited for the SQLite writer.'),
+    'tournifyx_write_gate_rejections_total': ('counter', 'Unsafe requests shed with 503 because the write queue was full.'),
+    'tournifyx_purged_rows_total': ('counter', 'Rows removed by the background purge of deleted tournaments, by table.'),
+}
+
+
+# ==============================
+# 🔸 Sample stores
+# ==============================
+class MmapStore:
+    """
+    Append-only key -> float64 map in a memory-mapped file.
+    Layout: uint32 used bytes, 4 bytes padding, then entries of
+    uint32 key length, utf-8 key padded to 8 bytes, float64 value.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+            size = self.INITIAL_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._positions = {}
+        used = self._used()
+        if used == 0:
+            used = 8
+            struct.pack_into('I', self._map, 0, used)
+        for key, _, pos in self._entries(self._map, used):
+            self._positions[key] = pos
+
+    def _used(self):
+        return struct.unpack_from('I', self._map, 0)[0]
+
+    @staticmethod
+    def _entries(data, used):
+        pos = 8
+        while pos < used:
+            length = struct.unpack_from('I', data, pos)[0]
+            key = bytes(data[pos + 4:pos + 4 + length]).decode()
+            pos += 4 + length
+            pos += -pos % 8
+            value = struct.unpack_from('d', data, pos)[0]
+            yield key, value, pos
+            pos += 8
+
+    def _add_key(self, key):
+        encoded = key.encode()
+        padded = 4 + len(encoded)
+        padded += -padded % 8
+        needed = padded + 8
+        used = self._used()
+        while used + needed > len(self._map):
+            new_size = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(new_size)
+            self._map = mmap.mmap(self._file.fileno(), new_size)
+        struct.pack_into(f'I{len(encoded)}s', self._map, used, len(encoded), encoded)
+        pos = used + padded
+        struct.pack_into('d', self._map, pos, 0.0)
+        struct.pack_into('I', self._map, 0, used + needed)
+        self._positions[key] = pos
+
+    def add(self, key, amount):
+        if key not in self._positions:
+            self._add_key(key)
+        pos = self._positions[key]
+        value = struct.unpack_from('d', self._map, pos)[0]
+        struct.pack_into('d', self._map, pos, value + amount)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 8:
+            return []
+        used = struct.unpack_from('I', data, 0)[0]
+        return [(key, value) for key, value, _ in cls._entries(data, used)]
+
+
+class MemoryStore:
+    def __init__(self):
+        self.values = defaultdict(float)
+
+    def add(self, key, amount):
+        self.values[key] += amount
+
+    def close(self):
+        pass
+
+
+_lock = threading.Lock()
+_state = {'pid': None, 'dir': None, 'store': None}
+
+
+def _store():
+    """Store for the current process, reopened after a fork or a METRICS_DIR change."""
+    directory = getattr(settings, 'METRICS_DIR', None) or None
+    pid = os.getpid()
+    if _state['pid'] != pid or _state['dir'] != directory:
+        if _state['store'] is not None and _state['pid'] == pid:
+            _state['store'].close()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            store = MmapStore(os.path.join(directory, f'samples_{pid}.db'))
+        else:
+            store = MemoryStore()
+        _state.update(pid=pid, dir=directory, store=store)
+    return _state['store']
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], separators=(',', ':'))
+
+
+def inc(name, amount=1, **labels):
+    """Increment a counter sample."""
+    with _lock:
+        _store().add(_key(name, labels), amount)
+
+
+def observe(name, value, **labels):
+    """Record one observation in a histogram (per-bucket counts, made cumulative on export)."""
+    index = bisect_left(LATENCY_BUCKETS, value)
+    le = str(LATENCY_BUCKETS[index]) if index < len(LATENCY_BUCKETS) else '+Inf'
+    with _lock:
+        store = _store()
+        store.add(_key(name + '_bucket', dict(labels, le=le)), 1)
+        store.add(_key(name + '_sum', labels), value)
+        store.add(_key(name + '_count', labels), 1)
+
+
+def observe_request(url_name, method, status, duration, queries):
+    inc('tournifyx_http_requests_total', url_name=url_name, method=method, status=str(status))
+    observe('tournifyx_http_request_duration_seconds', duration, url_name=url_name)
+    if queries:
+        inc('tournifyx_db_queries_total', queries, url_name=url_name)
+
+
+# ==============================
+# 🔸 Exposition
+# ==============================
+def collect():
+    """Sum the samples of every worker process: {(name, labels tuple): value}."""
+    totals = defaultdict(float)
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if directory:
+        with _lock:
+            _store()  # make sure this process has a file, even if it is still empty
+        for path in glob.glob(os.path.join(directory, 'samples_*.db')):
+            for key, value in MmapStore.read(path):
+                name, labels = json.loads(key)
+                totals[(name, tuple(tuple(pair) for pair in labels))] += value
+    else:
+        with _lock:
+            items = list(_store().values.items())
+        for key, value in items:
+            name, labels = json.loads(key)
+            totals[(name, tuple(tuple(pair) for pair in labels))] += value
+    return totals
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = [
+        '%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in labels
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def _bucket_order(le):
+    return float('inf') if le == '+Inf' else float(le)
+
+
+def render_metrics():
+    totals = collect()
+
+    # Derived gauge: cache hit ratio per alias
+    lookups = defaultdict(lambda: [0.0, 0.0])
+    for (name, labels), value in totals.items():
+        if name == 'tournifyx_cache_requests_total':
+            label_map = dict(labels)
+            lookups[label_map['cache']][label_map['result'] == 'hit'] += value
+    for cache, (misses, hits) in lookups.items():
+        if hits + misses:
+            totals[('tournifyx_cache_hit_ratio', (('cache', cache),))] = hits / (hits + misses)
+
+    by_metric = defaultdict(list)
+    for (name, labels), value in totals.items():
+        base = name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                base = name[:-len(suffix)]
+        by_metric[base].append((name, labels, value))
+
+    lines = []
+    for base in sorted(by_metric):
+        kind, help_text = METRICS.get(base, ('untyped', ''))
+        lines.append(f'# HELP {base} {help_text}')
+        lines.append(f'# TYPE {base} {kind}')
+        samples = by_metric[base]
+        if kind == 'histogram':
+            samples = _cumulative_buckets(base, samples)
+        for name, labels, value in sorted(samples):
+            lines.append(f'{name}{_format_labels(labels)} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def _cumulative_buckets(base, samples):
+    """Turn per-bucket counts into cumulative `le` buckets, filling in every bound."""
+    series = defaultdict(dict)
+    others = []
+    for name, labels, value in samples:
+        if name == base + '_bucket':
+            label_map = dict(labels)
+            le = label_map.pop('le')
+            series[tuple(sorted(label_map.items()))][le] = value
+        else:
+            others.append((name, labels, value))
+
+    result = list(others)
+    bounds = [str(b) for b in LATENCY_BUCKETS] + ['+Inf']
+    for labels, counts in series.items():
+        running = 0.0
+        for le in sorted(set(bounds) | set(counts), key=_bucket_order):
+            running += counts.get(le, 0.0)
+            result.append((base + '_bucket', labels + (('le', le),), running))
+    return result
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>` when the setting is set."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden('Invalid metrics token.')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==============================
+# 🔸 Instrumented cache backend
+# ==============================
+_MISSING = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache that counts hits and misses (get_many/get_or_set go through get)."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.alias = name or 'default'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        inc('tournifyx_cache_requests_total', cache=self.alias, result='miss' if value is _MISSING else 'hit')
+        return default if value is _MISSING else value
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournifyx', '0029_tournament_payment_phone_userprofile_phone_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='schedule_settings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 07:37
+
+from django.db import migrations, models, router
+from django.utils import timezone
+
+
+def backfill_finished_at(apps, schema_editor):
+    # The real finish time is unknown; start the archive countdown from this deploy
+    Tournament = apps.get_model('tournifyx', 'Tournament')
+    if not router.allow_migrate_model(schema_editor.connection.alias, Tournament):
+        return
+    Tournament.objects.using(schema_editor.connection.alias).filter(is_finished=True).update(finished_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournifyx', '0030_tournament_schedule_settings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_finished_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournifyx', '0031_tournament_finished_at_archived_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
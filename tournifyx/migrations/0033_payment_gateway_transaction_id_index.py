@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournifyx', '0032_tournament_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='gateway_transaction_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 07:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournifyx', '0033_payment_gateway_transaction_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmittedTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_method', models.CharField(choices=[('bkash', 'bKash'), ('nagad', 'Nagad'), ('rocket', 'Rocket'), ('card', 'Credit/Debit Card'), ('manual', 'Manual/Bank Transfer')], max_length=20)),
+                ('trx_id', models.CharField(db_index=True, max_length=100)),
+                ('sender_number', models.CharField(blank=True, max_length=20)),
+                ('submitted_at', models.DateTimeField()),
+                ('payment', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tournifyx.payment')),
+                ('tournament', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tournifyx.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sender_number', 'submitted_at'], name='tournifyx_s_sender__4b87c8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournifyx', '0036_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
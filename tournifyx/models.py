@@ -8,6 +8,8 @@ class UserProfile(models.Model):
     cover_photo = models.ImageField(upload_to='covers/', null=True, blank=True)
     bio = models.TextField(null=True, blank=True)
     phone_number = models.CharField(max_length=20, null=True, blank=True)
+    # {image name: {variant: file stem}} for the resized copies made by manage.py process_images
+    image_variants = models.JSONField(default=dict, blank=True)
 
     def _str_(self):
         return self.user.username
@@ -30,6 +32,36 @@ class Category(models.Model):
 
 # models.py
 
+class TournamentQuerySet(models.QuerySet):
+    def latest_per_name(self):
+        """Keep only the most recently created tournament of each name (deduplicated in SQL)."""
+        latest = self.order_by().values('name').annotate(latest_id=models.Max('id')).values('latest_id')
+        return self.filter(id__in=latest)
+
+    def joined_by(self, user_profile):
+        return self.filter(models.Exists(
+            TournamentParticipant.objects.filter(tournament=models.OuterRef('pk'), user_profile=user_profile)
+        ))
+
+    def with_card_info(self):
+        """Annotate player_count and status ('finished', 'active' or 'inactive') for tournament cards."""
+        return self.annotate(
+            player_count=models.Count('player'),
+            status=models.Case(
+                models.When(is_finished=True, then=models.Value('finished')),
+                models.When(is_active=True, then=models.Value('active')),
+                default=models.Value('inactive'),
+            ),
+        )
+
+
+class LiveTournamentManager(models.Manager.from_queryset(TournamentQuerySet)):
+    """Hides deleted tournaments still waiting to be purged (see purge.py)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Tournament(models.Model):
     CATEGORY_CHOICES = [
         ('football', 'Football'),
@@ -58,6 +90,14 @@ class Tournament(models.Model):
     is_public = models.BooleanField(default=False)  # Add this line
     registration_deadline = models.DateTimeField(null=True, blank=True)
     is_finished = models.BooleanField(default=False)  # Host can manually mark tournament as finished
+    schedule_settings = models.JSONField(default=dict, blank=True)  # Slot grid used by the match scheduler
+    finished_at = models.DateTimeField(null=True, blank=True)  # When the host marked it finished
+    archived_at = models.DateTimeField(null=True, blank=True, db_index=True)  # Rows moved to the archive database
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)  # Soft-deleted, purged after the undo window
+    version = models.BigIntegerField(default=0, db_index=True)  # Time (ns) of the last change to it or its rows; keys cached fragments
+
+    objects = LiveTournamentManager()
+    all_objects = TournamentQuerySet.as_manager()  # Including deleted tournaments
     
 
     def __str__(self):
@@ -184,7 +224,7 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     
     transaction_id = models.CharField(max_length=100, unique=True)
-    gateway_transaction_id = models.CharField(max_length=100, blank=True, null=True)  # ID from payment gateway
+    gateway_transaction_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)  # ID from payment gateway
     
     payment_details = models.JSONField(default=dict, blank=True)  # Store additional payment info
     
@@ -199,6 +239,62 @@ class Payment(models.Model):
         return f"Payment {self.transaction_id} - {self.user_profile.user.username} - {self.status}"
 
 
+class SubmittedTransaction(models.Model):
+    """
+    Normalized transaction ID and sender number a user submitted for a manual payment, one row per
+    payment. Rows stay on the primary and outlive their payment, so a used receipt stays used.
+    """
+    payment = models.OneToOneField(Payment, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    tournament = models.ForeignKey(Tournament, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    payment_method = models.CharField(max_length=20, choices=Payment.PAYMENT_METHOD_CHOICES)
+    trx_id = models.CharField(max_length=100, db_index=True)
+    sender_number = models.CharField(max_length=20, blank=True)
+    submitted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['sender_number', 'submitted_at'])]
+
+    def __str__(self):
+        return f"{self.trx_id} from {self.sender_number or '?'} (payment {self.payment_id})"
+
+
+class StripeEvent(models.Model):
+    """A Stripe webhook event exactly as received; processed_at is set once it has been applied."""
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['processed_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.type} {self.event_id}"
+
+
+class ImageJob(models.Model):
+    """A freshly uploaded avatar or cover photo waiting for its resized variants."""
+    FIELD_CHOICES = [('avatar', 'Avatar'), ('cover_photo', 'Cover photo')]
+
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='image_jobs')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    source = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    done_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['done_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.field} {self.source}"
+
+
 class ContactMessage(models.Model):
     """Store contact form submissions"""
     name = models.CharField(max_length=100)
@@ -0,0 +1,121 @@
+"""
+Whole-page caching for pages that look the same to everyone in a role.
+
+`@cache_page` (or `@cache_page(version=...)`) keeps a view's GET responses in the 'pages' cache, one
+variant per path, query string and role (anonymous or logged in). A page may therefore show
+nothing specific to one user; base.html links to the `my_profile` redirect rather than to the
+user's own profile for this reason.
+
+An entry is fresh for PAGE_CACHE_SECONDS and may then be served stale for PAGE_CACHE_STALE_SECONDS
+more while it is rebuilt. Only one request rebuilds it: the one that wins an add() of the entry's
+lock key, whose response becomes the new entry. The others keep serving the stale copy, or, on a
+miss with nothing to serve, wait up to LOCK_WAIT for the winner before rendering the page themselves.
+
+`version` is a callable whose value is stored with the entry; when it changes, the entry is stale
+from then on. The home page passes fragments.site_version, which moves with every change to a
+tournament's standings, so one request renders the new leaderboards while the rest briefly keep
+the previous ones.
+
+With the default per-process LocMemCache each worker process has its own copy and its own rebuild;
+a shared cache backend for 'pages' makes the single flight span all workers.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import metrics
+
+# A rebuild that takes longer than this frees its lock for another request to retry
+LOCK_TIMEOUT = 30
+# How long a request with no copy to serve waits for another request's rebuild, and how often it looks
+LOCK_WAIT = 5.0
+POLL_INTERVAL = 0.05
+
+
+def cache():
+    return caches['pages']
+
+
+def role(request):
+    return 'user' if request.user.is_authenticated else 'anonymous'
+
+
+def key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page.{role(request)}.{digest}'
+
+
+def _cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # The page used the CSRF token, which is not to be shared
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        and 'private' not in response.get('Cache-Control', '')
+        and 'no-store' not in response.get('Cache-Control', '')
+    )
+
+
+def _response(entry, status):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = status
+    return response
+
+
+def _rebuild(view, request, args, kwargs, cache_key, version):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    if _cacheable(request, response):
+        cache().set(cache_key, {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'version': version,
+            'fresh_until': time.time() + settings.PAGE_CACHE_SECONDS,
+        }, settings.PAGE_CACHE_SECONDS + settings.PAGE_CACHE_STALE_SECONDS)
+    response['X-Page-Cache'] = 'miss'
+    return response
+
+
+def cache_page(view=None, *, version=None):
+    """Cache the view's GET/HEAD pages per role for PAGE_CACHE_SECONDS, serving them stale while one request rebuilds."""
+    if view is None:
+        return functools.partial(cache_page, version=version)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not settings.PAGE_CACHE_SECONDS:
+            return view(request, *args, **kwargs)
+        cache_key = key(request)
+        current = version() if version else None
+        entry = cache().get(cache_key)
+        if entry is not None and entry['version'] == current and entry['fresh_until'] > time.time():
+            metrics.inc('tournifyx_page_cache_total', view=view.__name__, result='hit')
+            return _response(entry, 'hit')
+
+        lock_key = f'{cache_key}.lock'
+        if not cache().add(lock_key, 1, LOCK_TIMEOUT):
+            if entry is not None:
+                metrics.inc('tournifyx_page_cache_total', view=view.__name__, result='stale')
+                return _response(entry, 'stale')
+            # Nothing to serve yet: wait for the request that holds the lock
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                entry = cache().get(cache_key)
+                if entry is not None and entry['version'] == current:
+                    metrics.inc('tournifyx_page_cache_total', view=view.__name__, result='waited')
+                    return _response(entry, 'hit')
+            metrics.inc('tournifyx_page_cache_total', view=view.__name__, result='timeout')
+            return view(request, *args, **kwargs)
+        try:
+            metrics.inc('tournifyx_page_cache_total', view=view.__name__, result='miss')
+            return _rebuild(view, request, args, kwargs, cache_key, current)
+        finally:
+            cache().delete(lock_key)
+    return wrapper
@@ -0,0 +1,296 @@
+"""
+Payment state machine.
+
+    pending ──submit──▶ pending_approval ──approve──▶ completed
+       │                  │        ▲
+       │                  └reject─▶ rejected ──submit (retry)
+       ├──complete (gateway callback)──▶ completed
+       ├──fail (gateway)──▶ failed
+       └──cancel──▶ cancelled
+
+    pending, cancelled or failed ──settle (Stripe confirmed the charge)──▶ completed
+
+Every transition is a single `UPDATE ... WHERE id = %s AND status IN (<sources>)`. The row count
+says whether this caller made the transition: of two host tabs approving the same payment, or a
+host racing a gateway callback, exactly one sees 1 and only that one runs the side effects
+(creating the player, generating fixtures). The other gets InvalidTransition.
+
+Manually paid payments are submitted with the transaction ID and sender number the payer typed.
+Both are normalized into SubmittedTransaction, and a transaction ID already used for another
+payment is refused.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Match, Payment, Player, SubmittedTransaction, Tournament, TournamentParticipant
+from .utils import generate_knockout_fixtures, generate_league_fixtures
+
+# action -> (statuses it may start from, resulting status)
+TRANSITIONS = {
+    'submit': ({'pending', 'pending_approval', 'rejected', 'failed', 'cancelled'}, 'pending_approval'),
+    'approve': ({'pending_approval'}, 'completed'),
+    'reject': ({'pending_approval'}, 'rejected'),
+    'complete': ({'pending'}, 'completed'),
+    'cancel': ({'pending'}, 'cancelled'),
+    'fail': ({'pending'}, 'failed'),
+    # The money moved, whatever the browser did meanwhile
+    'settle': ({'pending', 'cancelled', 'failed'}, 'completed'),
+}
+
+
+class InvalidTransition(Exception):
+    """The payment was not (or no longer) in a status the transition starts from."""
+
+    def __init__(self, payment, action):
+        super().__init__(f'Cannot {action} payment {payment.pk}: it is no longer {" or ".join(sorted(TRANSITIONS[action][0]))}.')
+        self.payment = payment
+        self.action = action
+
+
+class TournamentFull(Exception):
+    pass
+
+
+class TournamentGone(Exception):
+    """The payment's tournament was deleted and no longer takes players."""
+
+
+class DuplicateTransaction(Exception):
+    """The transaction ID was already submitted for another payment."""
+
+    def __init__(self, previous):
+        super().__init__(f'Transaction ID {previous.trx_id} was already used for payment {previous.payment_id}.')
+        self.previous = previous
+
+
+def transition(payment, action, **fields):
+    """
+    Move `payment` through `action`, also setting `fields`, with one compare-and-swap UPDATE.
+    Raises InvalidTransition if another request got there first.
+    """
+    sources, target = TRANSITIONS[action]
+    # update() bypasses auto_now
+    fields['updated_at'] = timezone.now()
+    if not Payment.objects.filter(pk=payment.pk, status__in=sources).update(status=target, **fields):
+        raise InvalidTransition(payment, action)
+    payment.status = target
+    for name, value in fields.items():
+        setattr(payment, name, value)
+    return payment
+
+
+def link_player(payment, player):
+    """Point the payment at its player without rewriting (and possibly reverting) its status."""
+    payment.player = player
+    payment.save(update_fields=['player', 'updated_at'])
+
+
+def _generate_fixtures(tournament, players):
+    """Create the first round for a tournament that just filled up; returns the matches created."""
+    count = len(players)
+    if tournament.match_type == 'knockout':
+        if count < 2 or count & (count - 1):
+            return 0
+        fixture_pairs = generate_knockout_fixtures(players)
+        stage = {1: 'FINAL', 2: 'SEMI', 4: 'QUARTER'}.get(len(fixture_pairs), 'KNOCKOUT')
+        # create() rather than bulk_create(): post_save keeps the fixture metrics and snapshots right
+        for p1, p2 in fixture_pairs:
+            Match.objects.create(tournament=tournament, player1=p1, player2=p2, stage=stage, round_number=1)
+        return len(fixture_pairs)
+    if tournament.match_type == 'league' and count >= 2:
+        name_to_player = {p.name: p for p in players}
+        fixture_pairs = generate_league_fixtures([p.name for p in players])
+        for a, b in fixture_pairs:
+            Match.objects.create(tournament=tournament, player1=name_to_player[a], player2=name_to_player[b],
+                                 stage='GROUP', round_number=1)
+        return len(fixture_pairs)
+    return 0
+
+
+def approve(payment):
+    """
+    Approve a payment and seat its payer. Returns (player, fixtures_created); player is None when
+    the payer had already joined. Raises InvalidTransition, or TournamentFull or TournamentGone (the
+    payment then stays pending_approval: the whole approval rolls back).
+    """
+    try:
+        with transaction.atomic():
+            return _approve(payment)
+    except (TournamentFull, TournamentGone):
+        payment.refresh_from_db(fields=['status', 'completed_at', 'updated_at'])
+        raise
+
+
+def _approve(payment):
+    # The UPDATE comes first so SQLite takes the write lock before the capacity count below
+    transition(payment, 'approve', completed_at=timezone.now())
+    tournament = Tournament.objects.select_for_update().filter(pk=payment.tournament_id).first()
+    if tournament is None:
+        raise TournamentGone(payment.tournament_id)
+    user_profile = payment.user_profile
+    if TournamentParticipant.objects.filter(tournament=tournament, user_profile=user_profile).exists():
+        return None, 0
+
+    players = list(Player.objects.filter(tournament=tournament).order_by('id'))
+    if len(players) >= tournament.num_participants:
+        raise TournamentFull(tournament.name)
+    player = Player.objects.create(
+        tournament=tournament,
+        name=user_profile.user.username,
+        team_name=user_profile.user.username,
+        added_by=None,
+        user_profile=user_profile,
+    )
+    link_player(payment, player)
+    TournamentParticipant.objects.get_or_create(tournament=tournament, user_profile=user_profile)
+
+    players.append(player)
+    fixtures = 0
+    if len(players) == tournament.num_participants and not Match.objects.filter(tournament=tournament).exists():
+        fixtures = _generate_fixtures(tournament, players)
+    return player, fixtures
+
+
+# ==============================
+# 🔸 Submitted transaction IDs
+# ==============================
+def normalize_trx_id(value):
+    """'8n7a 6xk-2Lq' and '8N7A6XK2LQ' are the same receipt."""
+    return re.sub(r'[^0-9A-Za-z]', '', value or '').upper()
+
+
+def normalize_sender(value):
+    """Digits only, without the 88 country code: '+880 1712-345678' -> '01712345678'."""
+    digits = re.sub(r'\D', '', value or '')
+    return digits[2:] if digits.startswith('880') else digits
+
+
+def submitted_transaction(payment, trx_id, sender_number, submitted_at):
+    """Unsaved SubmittedTransaction for `payment`."""
+    return SubmittedTransaction(
+        payment_id=payment.pk, tournament_id=payment.tournament_id, payment_method=payment.payment_method,
+        trx_id=normalize_trx_id(trx_id), sender_number=normalize_sender(sender_number), submitted_at=submitted_at,
+    )
+
+
+def submit(payment, trx_id, sender_number):
+    """
+    Hand a manually paid payment to the host for review. Raises InvalidTransition, or
+    DuplicateTransaction when the transaction ID was already used for another payment (the
+    payment is then left as it was).
+    """
+    record = submitted_transaction(payment, trx_id, sender_number, timezone.now())
+    try:
+        with transaction.atomic():
+            transition(
+                payment, 'submit',
+                gateway_transaction_id=record.trx_id,
+                payment_details={
+                    'sender_number': sender_number,
+                    'transaction_id': trx_id,
+                    'payment_method': payment.payment_method,
+                },
+                completed_at=record.submitted_at,
+            )
+            # Looked up after the UPDATE took SQLite's write lock: two payments can't both claim one ID
+            if record.trx_id:
+                previous = SubmittedTransaction.objects.filter(trx_id=record.trx_id).exclude(payment=payment).first()
+                if previous:
+                    raise DuplicateTransaction(previous)
+            SubmittedTransaction.objects.filter(payment=payment).delete()
+            record.save()
+    except DuplicateTransaction:
+        payment.refresh_from_db(fields=['status', 'gateway_transaction_id', 'payment_details', 'completed_at', 'updated_at'])
+        raise
+    return record
+
+
+def _count(queryset, field='id', distinct=False):
+    """Subquery counting the rows of `queryset` (filtered on an OuterRef), without a GROUP BY."""
+    template = 'COUNT(DISTINCT %(expressions)s)' if distinct else 'COUNT(%(expressions)s)'
+    counted = queryset.order_by().annotate(n=models.Func(models.F(field), template=template)).values('n')
+    return models.Subquery(counted, output_field=models.IntegerField())
+
+
+def flagged(submissions):
+    """
+    Annotate `submissions` with how often their transaction ID and sender were seen across every
+    tournament, and keep the suspicious ones: reused IDs and senders over the velocity limit.
+    """
+    since = timezone.now() - timedelta(hours=settings.PAYMENT_VELOCITY_HOURS)
+    same_trx = SubmittedTransaction.objects.filter(trx_id=models.OuterRef('trx_id'))
+    same_sender = SubmittedTransaction.objects.filter(sender_number=models.OuterRef('sender_number'))
+    return submissions.annotate(
+        trx_uses=_count(same_trx),
+        sender_total=_count(same_sender),
+        sender_recent=_count(same_sender.filter(submitted_at__gte=since)),
+        sender_tournaments=_count(same_sender, 'tournament', distinct=True),
+    ).filter(
+        (models.Q(trx_uses__gt=1) & ~models.Q(trx_id=''))
+        | (models.Q(sender_recent__gte=settings.PAYMENT_VELOCITY_LIMIT) & ~models.Q(sender_number=''))
+    )
+
+
+# ==============================
+# 🔸 Bulk review
+# ==============================
+def approve_many(queryset):
+    """
+    Approve every pending_approval payment in `queryset` in one transaction. Seats go to payments
+    in the order they were made; payments left without a seat stay pending_approval. Each
+    tournament's fixtures are generated once, when its last seat is taken.
+    Returns {'approved': [...], 'full': [...], 'skipped': [...], 'gone': [...]} lists of payments;
+    skipped ones were reviewed elsewhere meanwhile, gone ones belong to deleted tournaments.
+    """
+    outcome = {'approved': [], 'full': [], 'skipped': [], 'gone': []}
+    now = timezone.now()
+    with transaction.atomic():
+        pending = list(
+            queryset.filter(status='pending_approval').select_related('user_profile__user').order_by('created_at', 'id')
+        )
+        by_tournament = {}
+        for payment in pending:
+            by_tournament.setdefault(payment.tournament_id, []).append(payment)
+
+        for tournament_id, group in by_tournament.items():
+            tournament = Tournament.objects.select_for_update().filter(pk=tournament_id).first()
+            if tournament is None:
+                outcome['gone'].extend(group)
+                continue
+            players = list(Player.objects.filter(tournament=tournament).order_by('id'))
+            joined = set(TournamentParticipant.objects.filter(tournament=tournament).values_list('user_profile_id', flat=True))
+            for payment in group:
+                needs_seat = payment.user_profile_id not in joined
+                if needs_seat and len(players) >= tournament.num_participants:
+                    outcome['full'].append(payment)
+                    continue
+                try:
+                    transition(payment, 'approve', completed_at=now)
+                except InvalidTransition:
+                    outcome['skipped'].append(payment)
+                    continue
+                outcome['approved'].append(payment)
+                if not needs_seat:
+                    continue
+                username = payment.user_profile.user.username
+                player = Player.objects.create(
+                    tournament=tournament, name=username, team_name=username, added_by=None,
+                    user_profile=payment.user_profile,
+                )
+                link_player(payment, player)
+                TournamentParticipant.objects.get_or_create(tournament=tournament, user_profile=payment.user_profile)
+                joined.add(payment.user_profile_id)
+                players.append(player)
+
+            if len(players) == tournament.num_participants and not Match.objects.filter(tournament=tournament).exists():
+                _generate_fixtures(tournament, players)
+    return outcome
+
+
+def reject_many(queryset):
+    """Reject every pending_approval payment in `queryset` with a single UPDATE; returns how many."""
+    return queryset.filter(status='pending_approval').update(status='rejected', updated_at=timezone.now())
@@ -0,0 +1,194 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.shortcuts import render
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+_local = threading.local()
+_ring = deque(maxlen=getattr(settings, 'PERF_RING_SIZE', 2000))
+_ring_lock = threading.Lock()
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+
+
+class RequestStats:
+    """Timings collected while one request is being handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.sql = Counter()
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def fingerprint(sql):
+    """Collapse variable-length IN (...) lists so the same query shape counts once."""
+    return _IN_LIST.sub('(%s, ...)', sql)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = current_stats()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+        stats.sql[fingerprint(sql)] += 1
+
+
+# ==============================
+# 🔸 Template render timing
+# ==============================
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return super().render(context, request)
+        start, db_time = time.perf_counter(), stats.db_time
+        try:
+            return super().render(context, request)
+        finally:
+            # Queries run by lazy querysets while rendering already count as db time
+            stats.template_time += time.perf_counter() - start - (stats.db_time - db_time)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose top-level renders are timed per request."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+# ==============================
+# 🔸 Middleware
+# ==============================
+class PerformanceMiddleware:
+    """
+    Record SQL count, DB time, template render time and view time for each request,
+    expose them as a Server-Timing header and keep them in an in-process ring buffer.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        _local.stats = stats
+        start = time.perf_counter()
+        try:
+            wrappers = [conn.execute_wrapper(_record_query) for conn in connections.all()]
+            for wrapper in wrappers:
+                wrapper.__enter__()
+            try:
+                response = self.get_response(request)
+            finally:
+                for wrapper in reversed(wrappers):
+                    wrapper.__exit__(None, None, None)
+        finally:
+            _local.stats = None
+        total = time.perf_counter() - start
+
+        view_time = total - stats.db_time - stats.template_time
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'view;dur={view_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        entry = {
+            'view': match.view_name if match and match.view_name else request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': total * 1000,
+            'db_ms': stats.db_time * 1000,
+            'template_ms': stats.template_time * 1000,
+            'queries': stats.queries,
+            'duplicates': {sql: n for sql, n in stats.sql.items() if n > 1},
+            'at': time.time(),
+        }
+        with _ring_lock:
+            _ring.append(entry)
+        url_name = match.url_name if match and match.url_name else '<unmatched>'
+        metrics.observe_request(url_name, request.method, response.status_code, total, stats.queries)
+        return response
+
+
+# ==============================
+# 🔸 Aggregation & /perf/ page
+# ==============================
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(values))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def recent_entries():
+    with _ring_lock:
+        return list(_ring)
+
+
+def clear():
+    with _ring_lock:
+        _ring.clear()
+
+
+def summarize(entries):
+    """Per-view latency percentiles, averages and the most duplicated SQL, slowest (p95) first."""
+    by_view = defaultdict(list)
+    for entry in entries:
+        by_view[entry['view']].append(entry)
+
+    rows = []
+    for view, items in by_view.items():
+        totals = sorted(e['total_ms'] for e in items)
+        duplicated = Counter()
+        for e in items:
+            for sql, n in e['duplicates'].items():
+                duplicated[sql] = max(duplicated[sql], n)
+        rows.append({
+            'view': view,
+            'count': len(items),
+            'p50': percentile(totals, 50),
+            'p95': percentile(totals, 95),
+            'p99': percentile(totals, 99),
+            'avg_queries': sum(e['queries'] for e in items) / len(items),
+            'avg_db_ms': sum(e['db_ms'] for e in items) / len(items),
+            'avg_template_ms': sum(e['template_ms'] for e in items) / len(items),
+            'duplicated_sql': duplicated.most_common(3),
+        })
+    rows.sort(key=lambda r: r['p95'], reverse=True)
+    return rows
+
+
+@staff_member_required
+def perf_dashboard(request):
+    """Staff-only overview of the requests held in the ring buffer."""
+    entries = recent_entries()
+    return render(request, 'perf.html', {
+        'summary': summarize(entries),
+        'entries': len(entries),
+        'capacity': _ring.maxlen,
+    })
@@ -0,0 +1,104 @@
+"""
+Request-scoped profile resolution.
+
+ProfileMiddleware attaches `request.user_profile` and `request.host_profile`. Both are lazy and
+resolved together on first access: from the per-user cache, or with a single
+User.objects.select_related('userprofile', 'hostprofile') query. A missing profile resolves to
+a falsy object, so views test it with `if not request.host_profile`, never `is None`.
+
+The profiles are cached across requests in the 'profiles' cache for PROFILE_CACHE_TIMEOUT seconds
+and invalidated whenever a User, UserProfile or HostProfile is saved or deleted. The invalidation
+only reaches the cache the saving process uses, so with several worker processes the alias must
+point at a shared backend; PROFILE_CACHE_TIMEOUT is 0 (no cross-request cache) until it does.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .models import HostProfile, UserProfile
+
+
+def _cache_key(user_id):
+    return f'profiles:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'PROFILE_CACHE_TIMEOUT', 0)
+
+
+def _cache():
+    return caches['profiles']
+
+
+def _load(user):
+    """Return (user_profile, host_profile) for an authenticated user, either may be None."""
+    timeout = _timeout()
+    key = _cache_key(user.pk)
+    if timeout:
+        cached = _cache().get(key)
+        if cached is not None:
+            return cached
+
+    from django.contrib.auth.models import User
+    row = User.objects.select_related('userprofile', 'hostprofile').filter(pk=user.pk).first()
+    user_profile = getattr(row, 'userprofile', None) if row else None
+    host_profile = getattr(row, 'hostprofile', None) if row else None
+    if timeout and row is not None:
+        _cache().set(key, (user_profile, host_profile), timeout)
+    return user_profile, host_profile
+
+
+def _resolve(request):
+    if not hasattr(request, '_cached_profiles'):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            request._cached_profiles = (None, None)
+        else:
+            request._cached_profiles = _load(user)
+    return request._cached_profiles
+
+
+def invalidate(user_id):
+    """Drop the cached profiles now and again on commit, so a concurrent request cannot re-cache stale rows."""
+    key = _cache_key(user_id)
+    _cache().delete(key)
+    transaction.on_commit(lambda: _cache().delete(key))
+
+
+def ensure_user_profile(request):
+    """The request's UserProfile, created if the user has none yet."""
+    user_profile, host_profile = _resolve(request)
+    if user_profile is None:
+        user_profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        request._cached_profiles = (user_profile, host_profile)
+        request.user_profile = user_profile
+    return user_profile
+
+
+def ensure_host_profile(request):
+    """The request's HostProfile, created if the user has none yet."""
+    user_profile, host_profile = _resolve(request)
+    if host_profile is None:
+        host_profile, _ = HostProfile.objects.get_or_create(user=request.user)
+        request._cached_profiles = (user_profile, host_profile)
+        request.host_profile = host_profile
+    return host_profile
+
+
+def is_host_of(request, tournament):
+    """True when the requesting user created `tournament`; compares ids, so created_by is not fetched."""
+    host_profile = _resolve(request)[1]
+    return host_profile is not None and tournament.created_by_id == host_profile.id
+
+
+class ProfileMiddleware:
+    """Attach lazy, memoized request.user_profile and request.host_profile. Must follow AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_profile = SimpleLazyObject(lambda: _resolve(request)[0])
+        request.host_profile = SimpleLazyObject(lambda: _resolve(request)[1])
+        return self.get_response(request)
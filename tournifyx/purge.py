@@ -0,0 +1,105 @@
+"""
+Deferred tournament deletion.
+
+Deleting a tournament only stamps Tournament.deleted_at: the default manager hides it at once and
+its host can undo the deletion for DELETE_UNDO_MINUTES. After that, `purge_tournament()` (run by
+`manage.py purge_deleted_tournaments`) removes its rows table by table with plain DELETEs in
+bounded batches. Each batch is its own short transaction, so the SQLite write lock is never held
+for long, nothing is collected in Python memory, and an interrupted purge resumes where it stopped.
+The Tournament row goes last, through the ORM, so its post_delete signals still drop the snapshot
+and any archived rows.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import fragments, metrics
+from .models import LeaveRequest, Match, Payment, Player, PointTable, Tournament, TournamentParticipant
+
+logger = logging.getLogger(__name__)
+
+# Delete order: every table goes before the tables it points at
+PURGE_ORDER = [LeaveRequest, Payment, PointTable, Match, Player, TournamentParticipant]
+
+
+def undo_cutoff():
+    """Tournaments deleted before this moment can no longer be restored and may be purged."""
+    return timezone.now() - timedelta(minutes=getattr(settings, 'DELETE_UNDO_MINUTES', 10))
+
+
+def soft_delete(tournament):
+    tournament.deleted_at = timezone.now()
+    # save() rather than update(): post_save drops the pre-rendered snapshot as well
+    tournament.save(update_fields=['deleted_at'])
+
+
+def undo_delete(tournament_id, host_profile):
+    """Restore a tournament deleted within the undo window. Returns True if it was restored."""
+    restored = bool(Tournament.all_objects.filter(
+        id=tournament_id, created_by=host_profile, deleted_at__gt=undo_cutoff()
+    ).update(deleted_at=None))
+    if restored:
+        # update() sends no signals; the tournament's rows count again on cross-tournament pages
+        fragments.bump(tournament_id)
+    return restored
+
+
+def candidates():
+    return Tournament.all_objects.filter(deleted_at__lte=undo_cutoff()).order_by('deleted_at', 'id')
+
+
+def _batches(sql, params, batch_size):
+    """Run `sql` (which must affect at most `batch_size` rows) until it affects none; yields row counts."""
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params + [batch_size])
+            count = cursor.rowcount
+        if not count:
+            return
+        yield count
+
+
+def _unlink_bracket(tournament_id, batch_size):
+    # Matches point at their parent matches; clear the links so matches can go in any order
+    table = connection.ops.quote_name(Match._meta.db_table)
+    sql = (
+        f'UPDATE {table} SET parent_match1_id = NULL, parent_match2_id = NULL WHERE id IN ('
+        f'SELECT id FROM {table} WHERE tournament_id = %s'
+        f' AND (parent_match1_id IS NOT NULL OR parent_match2_id IS NOT NULL) LIMIT %s)'
+    )
+    for _ in _batches(sql, [tournament_id], batch_size):
+        pass
+
+
+def purge_tournament(tournament, batch_size=1000, progress=None):
+    """
+    Delete a soft-deleted tournament and everything below it. `progress(table, deleted)` is
+    called after each batch with the running total for that table. Returns the rows deleted.
+    """
+    started = time.perf_counter()
+    tournament_id = tournament.id
+    total = 0
+    for model in PURGE_ORDER:
+        if model is Match:
+            _unlink_bracket(tournament_id, batch_size)
+        table = model._meta.db_table
+        quoted = connection.ops.quote_name(table)
+        sql = f'DELETE FROM {quoted} WHERE id IN (SELECT id FROM {quoted} WHERE tournament_id = %s LIMIT %s)'
+        deleted = 0
+        for count in _batches(sql, [tournament_id], batch_size):
+            deleted += count
+            metrics.inc('tournifyx_purged_rows_total', count, table=table)
+            if progress:
+                progress(table, deleted)
+        total += deleted
+    # Nothing is left to cascade to; this fires the tournament's post_delete signals
+    tournament.delete()
+    fragments.touch_site()
+    logger.info('Purged %s rows', total, extra={
+        'tournament_id': tournament_id, 'duration_ms': (time.perf_counter() - started) * 1000,
+    })
+    return total
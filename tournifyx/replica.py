@@ -0,0 +1,186 @@
+"""
+Read replica routing.
+
+With DB_REPLICA set, settings add a 'replica' alias: a SQLite copy of the primary that
+`refresh_replica()` rebuilds with the online backup API every REPLICA_REFRESH_SECONDS.
+Views decorated with @replica_reads run their GET/HEAD queries against it; everything else,
+and every write, uses 'default'.
+
+Read-your-writes: a request that writes pins itself to the primary for the rest of the request,
+and its response sets a cookie that keeps the browser on the primary for REPLICA_PIN_SECONDS,
+long enough for the next refresh to pick the write up.
+"""
+import contextvars
+import functools
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_pin'
+# Sessions always come from the primary so a logout takes effect everywhere at once
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.eligible = False
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('replica_state', default=None)
+
+
+def replica_enabled():
+    return bool(getattr(settings, 'DB_REPLICA', ''))
+
+
+# ==============================
+# 🔸 Routing
+# ==============================
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.eligible or state.pinned or state.wrote:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, never migrated on its own
+        return db != REPLICA_ALIAS
+
+
+def replica_reads(view):
+    """Let the view's GET/HEAD queries go to the replica unless the client is pinned to the primary."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is not None and request.method in ('GET', 'HEAD'):
+            state.eligible = replica_enabled()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _reopen_if_replaced():
+    """A refresh renames a new file over the replica; connections still open on the old one must reopen."""
+    try:
+        inode = os.stat(settings.DB_REPLICA).st_ino
+    except FileNotFoundError:
+        return
+    replica = connections[REPLICA_ALIAS]
+    if replica.connection is not None and getattr(replica, 'replica_inode', None) != inode:
+        replica.close()
+    replica.replica_inode = inode
+
+
+class ReplicaMiddleware:
+    """Track per-request routing state and set the read-your-writes pin cookie after a write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if replica_enabled():
+            start_refresher()
+            _reopen_if_replaced()
+        pinned_until = request.COOKIES.get(PIN_COOKIE, '')
+        state = _RequestState(pinned=pinned_until.isdigit() and int(pinned_until) > time.time())
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and replica_enabled():
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+            response.set_cookie(PIN_COOKIE, str(int(time.time() + seconds)), max_age=seconds, httponly=True,
+                                samesite='Lax')
+        return response
+
+
+# ==============================
+# 🔸 Refreshing the replica
+# ==============================
+_refresh_lock = threading.Lock()
+_start_lock = threading.Lock()
+# pid of the process whose refresh thread is running; threads do not survive a fork
+_refresher_pid = None
+
+
+def refresh_replica(primary_path=None, replica_path=None):
+    """
+    Copy the primary into the replica with the SQLite online backup API. The copy is written next
+    to the replica and renamed over it, so readers see either the old or the new file, never half.
+    """
+    primary_path = str(primary_path or settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+    replica_path = str(replica_path or settings.DB_REPLICA)
+    started = time.perf_counter()
+    with _refresh_lock:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(replica_path)), prefix='.replica.')
+        os.close(fd)
+        try:
+            # uri=True as in Django's backend, so in-memory test databases can be copied too
+            source = sqlite3.connect(primary_path, uri=True)
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(target)
+                # A WAL-mode copy would pick up the -wal/-shm files left by the previous replica
+                target.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                target.close()
+                source.close()
+            os.replace(tmp_path, replica_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    logger.debug('Replica refreshed', extra={'duration_ms': (time.perf_counter() - started) * 1000})
+
+
+def _refresh_forever(interval):
+    while True:
+        try:
+            refresh_replica()
+        except Exception:
+            logger.exception('Replica refresh failed')
+        time.sleep(interval)
+
+
+def start_refresher():
+    """
+    Start this process's background refresh thread once (REPLICA_REFRESH_SECONDS=0 disables it).
+    A missing replica is built before returning, so the first request already has one to read.
+    """
+    global _refresher_pid
+    interval = getattr(settings, 'REPLICA_REFRESH_SECONDS', 0)
+    if _refresher_pid == os.getpid() or not interval:
+        return
+    with _start_lock:
+        if _refresher_pid == os.getpid():
+            return
+        if not os.path.exists(settings.DB_REPLICA):
+            refresh_replica()
+        threading.Thread(target=_refresh_forever, args=(interval,), name='replica-refresh', daemon=True).start()
+        _refresher_pid = os.getpid()
@@ -0,0 +1,389 @@
+import bisect
+import math
+import time
+from collections import defaultdict, deque, namedtuple
+from datetime import datetime, time as dtime, timedelta
+
+from . import fragments
+from .models import Match
+
+
+# One schedulable fixture: `players` are the known participants (Player ids),
+# `parents` are the ids of matches that must be played first (knockout feeders).
+ScheduleItem = namedtuple('ScheduleItem', ['id', 'players', 'parents'])
+
+
+# ==============================
+# 🔸 1. Time Slot Generation
+# ==============================
+def build_time_slots(start, slot_minutes, count, day_start=None, day_end=None):
+    """
+    Return `count` slot start times beginning at `start`, one every `slot_minutes`.
+    If `day_start`/`day_end` (datetime.time) are given, only slots whose whole
+    duration fits inside that daily window are produced.
+    """
+    step = timedelta(minutes=slot_minutes)
+    if day_start is not None and day_end is not None:
+        window = datetime.combine(start.date(), day_end) - datetime.combine(start.date(), day_start)
+        if window < step:
+            raise ValueError("The daily window is shorter than a single slot.")
+    slots = []
+    current = start
+    while len(slots) < count:
+        if day_start is not None and current.time() < day_start:
+            current = datetime.combine(current.date(), day_start, tzinfo=current.tzinfo)
+            continue
+        end = current + step
+        if day_end is not None and (end.date() != current.date() or end.time() > day_end):
+            current = datetime.combine(current.date() + timedelta(days=1), day_start or dtime(0), tzinfo=current.tzinfo)
+            continue
+        slots.append(current)
+        current = end
+    return slots
+
+
+# ==============================
+# 🔸 2. Timeline Bookkeeping
+# ==============================
+class _Timeline:
+    """
+    Slot occupancy plus per-player busy times.
+    Times are float seconds relative to the first slot so comparisons stay cheap.
+    """
+
+    def __init__(self, slots, venues, gap):
+        self.origin = slots[0]
+        self.offsets = [(s - self.origin).total_seconds() for s in slots]
+        self.venues = venues
+        self.gap = gap
+        self.used = [0] * len(slots)
+        self.free = list(range(len(slots)))  # sorted slot indexes with spare capacity
+        self.busy = defaultdict(list)         # player id -> sorted busy start times
+
+    def to_offset(self, when):
+        return (when - self.origin).total_seconds()
+
+    def to_datetime(self, offset):
+        return self.origin + timedelta(seconds=offset)
+
+    def slot_at(self, offset):
+        """Index of the slot starting exactly at `offset`, or None if off-grid."""
+        i = bisect.bisect_left(self.offsets, offset)
+        if i < len(self.offsets) and self.offsets[i] == offset:
+            return i
+        return None
+
+    def occupy(self, slot, players, offset):
+        if slot is not None:
+            self.used[slot] += 1
+            if self.used[slot] >= self.venues:
+                i = bisect.bisect_left(self.free, slot)
+                if i < len(self.free) and self.free[i] == slot:
+                    del self.free[i]
+        for p in players:
+            bisect.insort(self.busy[p], offset)
+
+    def release(self, slot, players, offset):
+        if slot is not None:
+            if self.used[slot] >= self.venues:
+                bisect.insort(self.free, slot)
+            self.used[slot] -= 1
+        for p in players:
+            times = self.busy[p]
+            del times[bisect.bisect_left(times, offset)]
+
+    def _conflict(self, players, offset):
+        """Return the busy time that clashes with `offset` for any player, else None."""
+        gap = self.gap
+        for p in players:
+            times = self.busy.get(p)
+            if not times:
+                continue
+            i = bisect.bisect_right(times, offset - gap)
+            if i < len(times) and times[i] < offset + gap:
+                return times[i]
+        return None
+
+    def earliest(self, players, lower_bound, upper_bound=None):
+        """
+        Earliest slot with a free venue at or after `lower_bound` where no player
+        has another match within `gap`. Returns a slot index or None.
+        """
+        start = bisect.bisect_left(self.offsets, lower_bound)
+        while True:
+            i = bisect.bisect_left(self.free, start)
+            if i >= len(self.free):
+                return None
+            slot = self.free[i]
+            offset = self.offsets[slot]
+            if upper_bound is not None and offset >= upper_bound:
+                return None
+            clash = self._conflict(players, offset)
+            if clash is None:
+                return slot
+            start = bisect.bisect_left(self.offsets, clash + self.gap)
+
+
+# ==============================
+# 🔸 3. Greedy + Local Search Solver
+# ==============================
+def _dependency_order(items):
+    """Sort items so every parent comes before its children (depth first, then input order)."""
+    by_id = {item.id: item for item in items}
+    depth = {}
+    for item in items:
+        stack = [item]
+        while stack:
+            current = stack[-1]
+            pending = [p for p in current.parents if p in by_id and p not in depth]
+            if pending:
+                stack.extend(by_id[p] for p in pending)
+                continue
+            stack.pop()
+            depth[current.id] = 1 + max((depth[p] for p in current.parents if p in by_id), default=0)
+    position = {item.id: n for n, item in enumerate(items)}
+    return sorted(items, key=lambda item: (depth[item.id], position[item.id]))
+
+
+def solve_schedule(items, slots, venues=1, match_duration=timedelta(hours=1),
+                   min_rest=timedelta(0), fixed=None, time_budget=2.0):
+    """
+    Assign every ScheduleItem a start time from `slots`.
+
+    Constraints:
+      - at most `venues` matches share a slot,
+      - a player's matches start at least `match_duration + min_rest` apart,
+      - a match starts at least `match_duration + min_rest` after each parent.
+    `fixed` maps item id -> datetime for matches that must not move (already played).
+    A greedy list-scheduling pass in dependency order is followed by local search
+    that pulls matches into earlier gaps until nothing moves or `time_budget` runs out.
+    Returns {item id: datetime}. Raises ValueError if the slots run out.
+    """
+    fixed = fixed or {}
+    if not slots:
+        raise ValueError("At least one time slot is required.")
+    gap = (match_duration + min_rest).total_seconds()
+    timeline = _Timeline(sorted(slots), venues, gap)
+
+    offset = {}
+    slot_of = {}
+    for item in items:
+        if item.id in fixed:
+            offset[item.id] = timeline.to_offset(fixed[item.id])
+            slot_of[item.id] = timeline.slot_at(offset[item.id])
+            timeline.occupy(slot_of[item.id], item.players, offset[item.id])
+
+    def lower_bound(item):
+        return max((offset[p] + gap for p in item.parents if p in offset), default=float('-inf'))
+
+    ordered = _dependency_order(items)
+    for item in ordered:
+        if item.id in fixed:
+            continue
+        slot = timeline.earliest(item.players, lower_bound(item))
+        if slot is None:
+            raise ValueError("Not enough time slots to schedule every match.")
+        offset[item.id] = timeline.offsets[slot]
+        slot_of[item.id] = slot
+        timeline.occupy(slot, item.players, offset[item.id])
+
+    deadline = time.monotonic() + time_budget
+    movable = [item for item in ordered if item.id not in fixed]
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for item in sorted(movable, key=lambda item: -offset[item.id]):
+            current = offset[item.id]
+            timeline.release(slot_of[item.id], item.players, current)
+            slot = timeline.earliest(item.players, lower_bound(item), upper_bound=current)
+            if slot is None:
+                timeline.occupy(slot_of[item.id], item.players, current)
+                continue
+            offset[item.id] = timeline.offsets[slot]
+            slot_of[item.id] = slot
+            timeline.occupy(slot, item.players, offset[item.id])
+            improved = True
+            if time.monotonic() >= deadline:
+                break
+
+    return {item.id: timeline.to_datetime(offset[item.id]) for item in items}
+
+
+# ==============================
+# 🔸 4. Incremental Re-plan
+# ==============================
+def replan_schedule(items, assignment, slots, delayed, venues=1,
+                    match_duration=timedelta(hours=1), min_rest=timedelta(0), fixed=()):
+    """
+    Repair an existing schedule after some matches slip.
+
+    `assignment` maps item id -> current datetime and `delayed` maps item id -> the
+    new start of each late match. Only matches whose constraints are broken by the
+    delay (children of a moved match, or matches of the same players that now sit
+    too close) are moved, and never earlier than their previous start; moves ripple
+    outwards until the schedule is consistent again. Ids in `fixed` never move.
+    Returns {item id: new datetime} for every match that changed.
+    """
+    gap = (match_duration + min_rest).total_seconds()
+    timeline = _Timeline(sorted(slots), venues, gap)
+    by_id = {item.id: item for item in items}
+    children = defaultdict(list)
+    player_items = defaultdict(list)
+    for item in items:
+        for p in item.parents:
+            children[p].append(item.id)
+        for p in item.players:
+            player_items[p].append(item.id)
+
+    offset = {}
+    slot_of = {}
+    for item in items:
+        when = delayed.get(item.id, assignment.get(item.id))
+        if when is None:
+            continue
+        offset[item.id] = timeline.to_offset(when)
+        slot_of[item.id] = timeline.slot_at(offset[item.id])
+        timeline.occupy(slot_of[item.id], item.players, offset[item.id])
+
+    pinned = set(fixed) | set(delayed)
+    changed = {}
+    queue = deque(delayed)
+    while queue:
+        moved_id = queue.popleft()
+        moved = by_id[moved_id]
+        suspects = set(children[moved_id])
+        for p in moved.players:
+            suspects.update(player_items[p])
+        suspects.discard(moved_id)
+        for other_id in sorted(suspects, key=lambda i: offset.get(i, float('inf'))):
+            if other_id in pinned or other_id not in offset:
+                continue
+            other = by_id[other_id]
+            current = offset[other_id]
+            parent_bound = max((offset[p] + gap for p in other.parents if p in offset), default=float('-inf'))
+            timeline.release(slot_of[other_id], other.players, current)
+            if current >= parent_bound and timeline._conflict(other.players, current) is None:
+                timeline.occupy(slot_of[other_id], other.players, current)
+                continue
+            slot = timeline.earliest(other.players, max(current, parent_bound))
+            if slot is None:
+                raise ValueError("Not enough time slots to absorb the delay.")
+            offset[other_id] = timeline.offsets[slot]
+            slot_of[other_id] = slot
+            timeline.occupy(slot, other.players, offset[other_id])
+            changed[other_id] = timeline.to_datetime(offset[other_id])
+            queue.append(other_id)
+
+    for item_id, when in delayed.items():
+        changed[item_id] = when
+    return changed
+
+
+# ==============================
+# 🔸 5. Database Wrappers
+# ==============================
+def _schedule_items(tournament):
+    matches = list(
+        Match.objects.filter(tournament=tournament)
+        .only('id', 'player1_id', 'player2_id', 'parent_match1_id', 'parent_match2_id',
+              'scheduled_time', 'winner_id', 'is_draw')
+        .order_by('round_number', 'id')
+    )
+    items = [
+        ScheduleItem(
+            m.id,
+            tuple(p for p in (m.player1_id, m.player2_id) if p),
+            tuple(p for p in (m.parent_match1_id, m.parent_match2_id) if p),
+        )
+        for m in matches
+    ]
+    return matches, items
+
+
+def _settings_values(settings):
+    return (
+        settings.get('venues', 1),
+        timedelta(minutes=settings.get('slot_minutes', 60)),
+        timedelta(minutes=settings.get('rest_minutes', 0)),
+    )
+
+
+def _slot_count(num_items, slot_minutes, rest_minutes):
+    # Worst case every match waits out a full rest period after the previous one
+    per_match = max(1, math.ceil((slot_minutes + rest_minutes) / slot_minutes))
+    return num_items * per_match + 1
+
+
+def schedule_tournament(tournament, start, slot_minutes=60, venues=1, rest_minutes=0):
+    """
+    Fill Match.scheduled_time for every match of `tournament`.
+    Matches that already have a result keep their time. The settings are stored on
+    the tournament so later delays can be re-planned with the same grid.
+    """
+    matches, items = _schedule_items(tournament)
+    if not items:
+        return 0
+
+    fixed = {m.id: m.scheduled_time for m in matches if m.scheduled_time and (m.winner_id or m.is_draw)}
+    slots = build_time_slots(start, slot_minutes, _slot_count(len(items), slot_minutes, rest_minutes))
+    assignment = solve_schedule(
+        items, slots,
+        venues=venues,
+        match_duration=timedelta(minutes=slot_minutes),
+        min_rest=timedelta(minutes=rest_minutes),
+        fixed=fixed,
+    )
+
+    changed = []
+    for m in matches:
+        if m.scheduled_time != assignment[m.id]:
+            m.scheduled_time = assignment[m.id]
+            changed.append(m)
+    Match.objects.bulk_update(changed, ['scheduled_time'], batch_size=500)
+
+    tournament.schedule_settings = {
+        'start': start.isoformat(),
+        'slot_minutes': slot_minutes,
+        'venues': venues,
+        'rest_minutes': rest_minutes,
+    }
+    tournament.save(update_fields=['schedule_settings'])
+    return len(changed)
+
+
+def replan_tournament(match, new_time):
+    """
+    Move `match` to `new_time` and shift only the matches that the delay affects.
+    Returns the number of matches whose scheduled_time changed.
+    """
+    tournament = match.tournament
+    settings = tournament.schedule_settings or {}
+    venues, duration, rest = _settings_values(settings)
+    matches, items = _schedule_items(tournament)
+    assignment = {m.id: m.scheduled_time for m in matches if m.scheduled_time}
+
+    origin = datetime.fromisoformat(settings['start']) if settings.get('start') else new_time
+    origin = min([origin, new_time] + list(assignment.values()))
+    slot_minutes = settings.get('slot_minutes', 60)
+    horizon = max([new_time] + list(assignment.values())) - origin
+    count = int(horizon.total_seconds() // (slot_minutes * 60)) + _slot_count(len(items), slot_minutes, settings.get('rest_minutes', 0))
+    slots = build_time_slots(origin, slot_minutes, count)
+    # Snap the delayed start onto the grid so it occupies a real venue slot
+    new_time = slots[min(bisect.bisect_left(slots, new_time), len(slots) - 1)]
+
+    played = [m.id for m in matches if m.winner_id or m.is_draw]
+    changed = replan_schedule(
+        items, assignment, slots, {match.id: new_time},
+        venues=venues, match_duration=duration, min_rest=rest, fixed=played,
+    )
+
+    updates = []
+    for m in matches:
+        if m.id in changed and m.scheduled_time != changed[m.id]:
+            m.scheduled_time = changed[m.id]
+            updates.append(m)
+    Match.objects.bulk_update(updates, ['scheduled_time'], batch_size=500)
+    if updates:
+        # Bulk writes send no signals
+        fragments.bump_on_commit(tournament.id)
+    return len(updates)
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from .models import UserProfile, HostProfile, Tournament, TournamentParticipant, Player, Match, PointTable
+from . import archive, fragments, metrics, profiles, snapshots
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,3 +12,64 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.userprofile.save()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_profiles_for_user(sender, instance, **kwargs):
+    profiles.invalidate(instance.pk)
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=HostProfile)
+@receiver(post_delete, sender=HostProfile)
+def drop_cached_profiles(sender, instance, **kwargs):
+    profiles.invalidate(instance.user_id)
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def drop_tournament_snapshot(sender, instance, **kwargs):
+    # Any edit invalidates the pre-rendered snapshot; finished tournaments are re-rendered on demand
+    snapshots.delete_snapshot(instance.id)
+
+@receiver(post_save, sender=Tournament)
+def bump_tournament_version(sender, instance, **kwargs):
+    # A new value rather than +1: a stale instance's save() may just have written back an old one
+    instance.version = fragments.bump(instance.id)
+
+@receiver(post_delete, sender=Tournament)
+def purge_archived_rows(sender, instance, **kwargs):
+    if instance.archived_at and archive.archive_enabled():
+        archive.purge(instance.id)
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+@receiver(post_save, sender=PointTable)
+@receiver(post_delete, sender=PointTable)
+@receiver(post_save, sender=TournamentParticipant)
+@receiver(post_delete, sender=TournamentParticipant)
+def drop_snapshot_on_change(sender, instance, **kwargs):
+    if snapshots.has_snapshot(instance.tournament_id):
+        snapshots.delete_snapshot(instance.tournament_id)
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+@receiver(post_save, sender=PointTable)
+@receiver(post_delete, sender=PointTable)
+@receiver(post_save, sender=TournamentParticipant)
+@receiver(post_delete, sender=TournamentParticipant)
+def bump_version_on_change(sender, instance, **kwargs):
+    fragments.bump_on_commit(instance.tournament_id)
+
+@receiver(post_save, sender=TournamentParticipant)
+def count_join(sender, instance, created, **kwargs):
+    if created:
+        metrics.inc('tournifyx_tournament_joins_total')
+
+@receiver(post_save, sender=Match)
+def count_fixture(sender, instance, created, **kwargs):
+    if created:
+        metrics.inc('tournifyx_fixtures_generated_total', stage=instance.stage)
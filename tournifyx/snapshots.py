@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Match, Player, PointTable, TournamentParticipant
+
+
+# Finished tournaments are rendered once into SNAPSHOT_ROOT/tournaments/<id>/, outside MEDIA_ROOT
+# so the files are only reachable through the views that check access:
+#   dashboard.html   - spectator view of the dashboard content block
+#   tournament.json  - API detail payload with players, matches and standings
+#   standings.json   - point table rows
+#   bracket.json     - knockout bracket payload (knockout tournaments only)
+#   manifest.json    - written last; its presence marks a complete snapshot
+
+
+def snapshot_dir(tournament_id):
+    return os.path.join(settings.SNAPSHOT_ROOT, 'tournaments', str(tournament_id))
+
+
+def _write(directory, name, content):
+    """Write atomically so readers never see a half-written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def _dump(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def has_snapshot(tournament_id):
+    return os.path.exists(os.path.join(snapshot_dir(tournament_id), 'manifest.json'))
+
+
+def read_file(tournament_id, name):
+    """Return the contents of a snapshot file, or None if the tournament has no snapshot."""
+    if not has_snapshot(tournament_id):
+        return None
+    try:
+        with open(os.path.join(snapshot_dir(tournament_id), name), encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def read_json(tournament_id, name):
+    content = read_file(tournament_id, name)
+    return json.loads(content) if content is not None else None
+
+
+def delete_snapshot(tournament_id):
+    shutil.rmtree(snapshot_dir(tournament_id), ignore_errors=True)
+
+
+def _spectator_context(tournament):
+    """Dashboard context as seen by a logged-in user who is neither host nor participant."""
+    from .views import build_knockout_stages
+
+    participants = list(Player.objects.filter(tournament=tournament))
+    matches = list(Match.objects.filter(tournament=tournament).select_related('player1', 'player2', 'winner'))
+    for match in matches:
+        match.has_result = bool(match.winner) or match.is_draw
+
+    point_table = None
+    if tournament.match_type != 'knockout':
+        point_table = PointTable.objects.filter(tournament=tournament).select_related('player').order_by('-points')
+
+    return {
+        'tournament': tournament,
+        'participants': participants,
+        'matches': matches,
+        'point_table': point_table,
+        'knockout_stages': build_knockout_stages(tournament) if tournament.match_type == 'knockout' else None,
+        'is_host': False,
+        'is_tournament_full': len(participants) == tournament.num_participants,
+        'remaining_slots': tournament.num_participants - len(participants),
+        'current_player_count': len(participants),
+        'tournament_ended': tournament.is_finished,
+        'can_leave': False,
+        'pending_leave_requests': [],
+        'user_has_pending_request': False,
+        'pending_payments': [],
+        'user_payment_status': None,
+    }
+
+
+def write_snapshot(tournament):
+    """Render the dashboard, standings and bracket of a finished tournament to static files."""
+    from .api import full_tournament_payload
+    from .views import knockout_stages_data
+
+    directory = snapshot_dir(tournament.id)
+    delete_snapshot(tournament.id)
+    os.makedirs(directory, exist_ok=True)
+
+    context = _spectator_context(tournament)
+    _write(directory, 'dashboard.html', render_to_string('partials/tournament_dashboard_content.html', context))
+
+    payload = full_tournament_payload(tournament.id)
+    _write(directory, 'tournament.json', _dump(payload))
+    _write(directory, 'standings.json', _dump({'data': payload['standings']}))
+    if tournament.match_type == 'knockout':
+        _write(directory, 'bracket.json', _dump({'stages': knockout_stages_data(tournament)}))
+
+    # Everyone who would see a personalised dashboard keeps getting the live view
+    participant_user_ids = set(
+        TournamentParticipant.objects.filter(tournament=tournament).values_list('user_profile__user_id', flat=True)
+    )
+    participant_user_ids.update(
+        Player.objects.filter(tournament=tournament, user_profile__isnull=False).values_list('user_profile__user_id', flat=True)
+    )
+    manifest = {
+        'tournament_id': tournament.id,
+        'name': tournament.name,
+        'host_user_id': tournament.created_by.user_id,
+        'participant_user_ids': sorted(participant_user_ids),
+        'player_names': sorted({p.name.lower() for p in context['participants']}),
+        'generated_at': timezone.now(),
+    }
+    _write(directory, 'manifest.json', _dump(manifest))
+
+
+def load_dashboard(tournament_id, user):
+    """
+    Return (manifest, html) when `user` can be served the static dashboard snapshot,
+    or None when there is no snapshot or the user needs the live, personalised view.
+    """
+    manifest = read_json(tournament_id, 'manifest.json')
+    if manifest is None:
+        return None
+    if user.id == manifest['host_user_id'] or user.id in manifest['participant_user_ids']:
+        return None
+    if user.username.lower() in manifest['player_names']:
+        return None
+    html = read_file(tournament_id, 'dashboard.html')
+    if html is None:
+        return None
+    return manifest, html
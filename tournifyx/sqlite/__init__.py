@@ -0,0 +1,91 @@
+"""
+SQLite production mode (SQLITE_PRODUCTION=1).
+
+`database_options()` returns DATABASES OPTIONS that put the database in WAL mode and tune every new
+connection. Transactions start with BEGIN IMMEDIATE, so a transaction that will write takes the
+write lock up front and waits out `busy_timeout`, instead of failing with "database is locked"
+when it upgrades from a read lock.
+
+The `tournifyx.sqlite` ENGINE (see base.py) funnels write transactions in this process through one
+writer lock; reads never touch it. At most WRITE_GATE_QUEUE writers may wait, for at most
+WRITE_GATE_TIMEOUT seconds. Beyond that the write raises WriteQueueFull, which
+WriteGateMiddleware turns into a 503 with Retry-After, so clients back off instead of piling up.
+"""
+import threading
+import time
+
+from django.db import OperationalError
+from django.http import HttpResponse
+
+
+def database_options(busy_timeout=20, mmap_mb=256, cache_mb=64):
+    """OPTIONS for the sqlite3 backend: WAL, synchronous=NORMAL, busy timeout, mmap and page cache."""
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={busy_timeout * 1000}',
+        f'PRAGMA mmap_size={mmap_mb * 1024 * 1024}',
+        # Negative cache_size is in KiB
+        f'PRAGMA cache_size=-{cache_mb * 1024}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+    return {
+        'timeout': busy_timeout,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': ';'.join(pragmas),
+    }
+
+
+class WriteQueueFull(OperationalError):
+    pass
+
+
+class WriteGate:
+    """A single writer lock with a bounded number of waiters."""
+
+    def __init__(self):
+        self._writer = threading.Lock()
+        self._state = threading.Lock()
+        self.waiting = 0
+
+    def acquire(self, max_waiting, timeout):
+        """Wait for the writer lock and return the seconds waited; raise WriteQueueFull when overloaded."""
+        with self._state:
+            if self.waiting >= max_waiting:
+                raise WriteQueueFull(f'{self.waiting} writes already queued')
+            self.waiting += 1
+        started = time.perf_counter()
+        try:
+            acquired = self._writer.acquire(timeout=timeout)
+        finally:
+            with self._state:
+                self.waiting -= 1
+        if not acquired:
+            raise WriteQueueFull(f'waited {timeout}s for the writer')
+        return time.perf_counter() - started
+
+    def release(self):
+        self._writer.release()
+
+    def locked(self):
+        return self._writer.locked()
+
+
+gate = WriteGate()
+
+
+class WriteGateMiddleware:
+    """Answer writes shed by the gate with 503 + Retry-After instead of a server error."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, WriteQueueFull):
+            response = HttpResponse('The server is busy saving other changes. Please try again.', status=503)
+            response['Retry-After'] = '1'
+            return response
+        return None
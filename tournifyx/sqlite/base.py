@@ -0,0 +1,84 @@
+"""
+sqlite3 backend whose write transactions pass through `tournifyx.sqlite.gate`.
+
+The gate is taken when an atomic block begins its transaction and released on commit, rollback
+or close. Write statements run in autocommit mode hold it for just that statement. Reads in
+autocommit mode never wait.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+from tournifyx import metrics
+from tournifyx.sqlite import WriteQueueFull, gate
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class GatedCursorWrapper(base.SQLiteCursorWrapper):
+    wrapper = None
+
+    def _gated(self, method, query, params):
+        wrapper = self.wrapper
+        if wrapper is None or wrapper.holds_writer or not query.lstrip()[:7].upper().startswith(WRITE_PREFIXES):
+            return method(query, params)
+        wrapper.acquire_writer()
+        try:
+            return method(query, params)
+        finally:
+            wrapper.release_writer()
+
+    def execute(self, query, params=None):
+        return self._gated(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._gated(super().executemany, query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    holds_writer = False
+
+    def acquire_writer(self):
+        max_waiting = getattr(settings, 'WRITE_GATE_QUEUE', 64)
+        try:
+            waited = gate.acquire(max_waiting, getattr(settings, 'WRITE_GATE_TIMEOUT', 10))
+        except WriteQueueFull:
+            metrics.inc('tournifyx_write_gate_rejections_total')
+            raise
+        metrics.observe('tournifyx_write_gate_wait_seconds', waited)
+        self.holds_writer = True
+
+    def release_writer(self):
+        if self.holds_writer:
+            self.holds_writer = False
+            gate.release()
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=GatedCursorWrapper)
+        cursor.wrapper = self
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.acquire_writer()
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self.release_writer()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_writer()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_writer()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_writer()
@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from tournifyx import fragments
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = settings.FRAGMENT_CACHE_TIMEOUT
+        if not timeout:
+            return self.nodelist.render(context)
+        key = fragments.key(self.name.resolve(context), [var.resolve(context) for var in self.vary_on])
+        cache = fragments.cache()
+        html = cache.get(key)
+        if html is None:
+            # The request's CSRF token must not be shared through the cache
+            with context.push(csrf_token=fragments.CSRF_PLACEHOLDER):
+                html = self.nodelist.render(context)
+            cache.set(key, html, timeout)
+        return mark_safe(fragments.fill_csrf(html, context))
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    {% fragment 'name' value ... %}...{% endfragment %}: the enclosed region, cached per name and
+    values for FRAGMENT_CACHE_TIMEOUT seconds. A tournament value keys on its id and version.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least a fragment name.")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,32 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from tournifyx import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(image, variant, variants=None, **attrs):
+    """
+    <picture> showing `variant` ('thumb', 'medium', 'cover') of an uploaded image: WebP with a JPEG
+    fallback once the worker has rendered them, the original until then. `image` is a FieldFile,
+    or an image name plus its profile's `image_variants` (e.g. from .values()).
+    """
+    if not image:
+        return ''
+    if isinstance(image, str):
+        name, storage = image, default_storage
+    else:
+        name, storage = image.name, image.storage
+        variants = image.instance.image_variants
+    width, height = images.VARIANTS[variant]
+    attributes = format_html_join(' ', '{}="{}"', attrs.items())
+    stem = (variants or {}).get(name, {}).get(variant)
+    if not stem:
+        return format_html('<img src="{}" width="{}" height="{}" loading="lazy" {}>', storage.url(name), width, height, attributes)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"><img src="{}" width="{}" height="{}" loading="lazy" {}></picture>',
+        storage.url(f'{stem}.webp'), storage.url(f'{stem}.jpg'), width, height, attributes,
+    )
@@ -1,34 +1,29 @@
-import os
+import logging
 import random
 import itertools
-import stripe
-from dotenv import load_dotenv
 from django.db import models
 
-from .models import Match, Player, Tournament
+from .models import Match, Player, PointTable, Tournament
+from . import fragments
 
-# ==============================
-# 🔸 1. Load environment & Stripe setup
-# ==============================
-load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+logger = logging.getLogger(__name__)
 
 
 # ==============================
-# 🔸 2. League Fixture Generator
+# 🔸 1. League Fixture Generator
 # ==============================
 def generate_league_fixtures(players):
     """
     Generate league fixtures (round robin).
     Each player plays every other player exactly once.
     """
-    print(f"[League] Generating fixtures for players: {players}")
+    logger.debug('Generating league fixtures for %s players', len(players))
     fixtures = list(itertools.combinations(players, 2))
     return fixtures
 
 
 # ==============================
-# 🔸 3. Knockout Fixture Generator
+# 🔸 2. Knockout Fixture Generator
 # ==============================
 def generate_knockout_fixtures(players):
     """
@@ -36,7 +31,7 @@ def generate_knockout_fixtures(players):
     Expects `players` to be a list of Player model instances.
     Requires number of players to be a power of two (2^n). Returns list of (p1, p2) tuples.
     """
-    print(f"[Knockout] Generating fixtures for players: {[p.name for p in players]}")
+    logger.debug('Generating knockout fixtures for %s players', len(players))
     # Filter valid players
     players = [p for p in players if p]
     count = len(players)
@@ -52,7 +47,7 @@ def generate_knockout_fixtures(players):
 
 
 # ==============================
-# 🔸 4. Auto-create Fixtures in DB
+# 🔸 3. Auto-create Fixtures in DB
 # ==============================
 def create_fixtures_for_tournament(tournament):
     """
@@ -62,7 +57,7 @@ def create_fixtures_for_tournament(tournament):
     # Fetch players from Player model
     players = list(Player.objects.filter(tournament=tournament))
     if len(players) < 2:
-        print("[Fixtures] Not enough participants to create fixtures.")
+        logger.info('Not enough participants to create fixtures', extra={'tournament_id': tournament.id})
         return
 
     # Generate fixtures based on tournament type
@@ -83,7 +78,8 @@ def create_fixtures_for_tournament(tournament):
         # Require power-of-two players
         count = len(players)
         if count < 2 or (count & (count - 1)) != 0:
-            print("[Knockout] Tournament must have 2^n participants. Skipping fixture creation.")
+            logger.info('Knockout needs 2^n participants, got %s; skipping fixtures', count,
+                        extra={'tournament_id': tournament.id})
             return
 
         fixture_pairs = generate_knockout_fixtures(players[:])
@@ -99,7 +95,7 @@ def create_fixtures_for_tournament(tournament):
 
 
 # ==============================
-# 🔸 5. Knockout Next-Round Progression
+# 🔸 4. Knockout Next-Round Progression
 # ==============================
 def generate_next_knockout_round(tournament):
     """
@@ -108,7 +104,7 @@ def generate_next_knockout_round(tournament):
     
     max_round = Match.objects.filter(tournament=tournament).aggregate(models.Max('round_number'))['round_number__max']
     if not max_round:
-        print("[Knockout] No existing rounds found.")
+        logger.debug('No knockout rounds yet', extra={'tournament_id': tournament.id})
         return
 
     current_round_matches = Match.objects.filter(tournament=tournament, round_number=max_round)
@@ -116,7 +112,7 @@ def generate_next_knockout_round(tournament):
     
     # Wait until all matches in current round have winners
     if current_round_matches.filter(winner__isnull=True).exists():
-        print("[Knockout] Current round is not finished yet.")
+        logger.debug('Knockout round %s not finished yet', max_round, extra={'tournament_id': tournament.id})
         return
 
     # Preserve parent match order to pair correctly
@@ -125,7 +121,7 @@ def generate_next_knockout_round(tournament):
     if len(winners) <= 1:
         # Tournament has a winner
         if winners:
-            print(f"[Knockout] Tournament Winner: {winners[0].name}")
+            logger.info('Tournament won by player %s', winners[0].id, extra={'tournament_id': tournament.id})
         return
 
     random.shuffle(winners)
@@ -157,7 +153,8 @@ def generate_next_knockout_round(tournament):
                 parent_match1=p1_parent,
                 parent_match2=p2_parent
             )
-            print(f"[Knockout] Created {stage} match: {p1.name} vs {p2.name}")
+            logger.debug('Created %s match %s: player %s vs player %s', stage, m.id, p1.id, p2.id,
+                         extra={'tournament_id': tournament.id})
             
         else:
             # Bye case (shouldn't occur with 2^n) - attach parent
@@ -170,7 +167,7 @@ def generate_next_knockout_round(tournament):
                 round_number=next_round,
                 parent_match1=p1_parent
             )
-            print(f"[Knockout] {p1.name} gets a bye to {stage}.")
+            logger.debug('Player %s gets a bye to %s', p1.id, stage, extra={'tournament_id': tournament.id})
 
 
 def propagate_result_change(changed_match):
@@ -203,3 +200,74 @@ def propagate_result_change(changed_match):
             child.save()
             # recurse
             propagate_result_change(child)
+
+
+# ==============================
+# 🔸 5. Point Table Recalculation
+# ==============================
+def compute_standings(results):
+    """
+    Build per-player stats from played matches.
+    `results` is an iterable of (player1_id, player2_id, winner_id, is_draw) tuples;
+    unplayed matches (no winner and not a draw) are ignored.
+    Returns {player_id: {'matches_played', 'wins', 'draws', 'losses', 'points'}}.
+    """
+    stats = {}
+
+    def row(player_id):
+        if player_id not in stats:
+            stats[player_id] = {'matches_played': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'points': 0}
+        return stats[player_id]
+
+    for p1, p2, winner, is_draw in results:
+        if winner is None and not is_draw:
+            continue
+        r1 = row(p1)
+        r2 = row(p2) if p2 else None  # Handle possible bye (player2 is None)
+        r1['matches_played'] += 1
+        if r2:
+            r2['matches_played'] += 1
+
+        if is_draw:
+            # Draw with missing player doesn't make sense; only handle if both present
+            if r2:
+                r1['draws'] += 1
+                r2['draws'] += 1
+                r1['points'] += 1
+                r2['points'] += 1
+        elif winner == p1:
+            r1['wins'] += 1
+            r1['points'] += 3
+            if r2:
+                r2['losses'] += 1
+        elif r2 and winner == p2:
+            r2['wins'] += 1
+            r2['points'] += 3
+            r1['losses'] += 1
+    return stats
+
+
+def recalculate_point_table(tournament):
+    """
+    Rebuild the PointTable of a tournament from its matches with a fixed number of queries.
+    """
+    results = Match.objects.filter(tournament=tournament).values_list('player1_id', 'player2_id', 'winner_id', 'is_draw')
+    stats = compute_standings(results)
+    fields = ['matches_played', 'wins', 'draws', 'losses', 'points']
+
+    existing = list(PointTable.objects.filter(tournament=tournament))
+    changed = []
+    for pt in existing:
+        values = stats.pop(pt.player_id, None) or dict.fromkeys(fields, 0)
+        if any(getattr(pt, f) != values[f] for f in fields):
+            for f in fields:
+                setattr(pt, f, values[f])
+            changed.append(pt)
+    PointTable.objects.bulk_update(changed, fields, batch_size=500)
+    PointTable.objects.bulk_create(
+        [PointTable(tournament=tournament, player_id=player_id, **values) for player_id, values in stats.items()],
+        batch_size=500,
+    )
+    if changed or stats:
+        # Bulk writes send no signals
+        fragments.bump_on_commit(tournament.id)
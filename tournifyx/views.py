@@ -1,21 +1,40 @@
 from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.contrib.auth import login as auth_login, logout as auth_logout, authenticate
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, transaction
 from collections import defaultdict, OrderedDict
 
 import itertools
+import logging
 import random
 import string
 import secrets
+import time
 
 from .models import *
-from .forms import TournamentForm, JoinTournamentForm, PlayerForm, PublicTournamentJoinForm, CustomUserCreationForm
-from .utils import generate_knockout_fixtures, generate_league_fixtures, generate_next_knockout_round, propagate_result_change
+from .forms import TournamentForm, JoinTournamentForm, PlayerForm, PublicTournamentJoinForm, CustomUserCreationForm, PaymentQueueFilterForm
+from .utils import generate_knockout_fixtures, generate_league_fixtures, generate_next_knockout_round, propagate_result_change, recalculate_point_table
+from .scheduling import schedule_tournament, replan_tournament
+from . import archive, checkout, fragments, images, metrics, pagecache, payments, purge, snapshots
+from .profiles import ensure_host_profile, ensure_user_profile, is_host_of
+from .replica import replica_reads
+
+logger = logging.getLogger(__name__)
+
+# Tournament cards per page on "My Tournaments"
+USER_TOURNAMENTS_PER_PAGE = 12
+# Rows per page in the host payment queue and the flagged payments list
+PAYMENT_QUEUE_PER_PAGE = 50
 
 
 def build_knockout_stages(tournament):
@@ -40,12 +59,8 @@ def build_knockout_stages(tournament):
 
 
 
-def tournament_knockout_json(request, tournament_id):
-    """Return knockout stages as JSON for JS bracket rendering."""
-    tournament = get_object_or_404(Tournament, id=tournament_id)
-    if tournament.match_type != 'knockout':
-        return JsonResponse({'error': 'Not a knockout tournament'}, status=400)
-
+def knockout_stages_data(tournament):
+    """Return knockout stages as plain lists/dicts (the bracket JSON payload)."""
     stages = build_knockout_stages(tournament) or {}
     data = []
     for label, matches in stages.items():
@@ -60,9 +75,35 @@ def tournament_knockout_json(request, tournament_id):
                 'winner_name': m.winner.name if m.winner else None,
             })
         data.append({'label': label, 'matches': mlist})
-    return JsonResponse({'stages': data})
+    return data
+
+
+@replica_reads
+@archive.archive_reads
+def tournament_knockout_json(request, tournament_id):
+    """Return knockout stages as JSON for JS bracket rendering."""
+    # Finished tournaments are served straight from their pre-rendered snapshot
+    archived = snapshots.read_file(tournament_id, 'bracket.json')
+    if archived is not None:
+        response = HttpResponse(archived, content_type='application/json')
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    archive.note(tournament.id, tournament.archived_at)
+    if tournament.match_type != 'knockout':
+        return JsonResponse({'error': 'Not a knockout tournament'}, status=400)
+
+    return JsonResponse({'stages': knockout_stages_data(tournament)})
+
+
+@login_required(login_url='login')
+def my_profile(request):
+    """The signed-in user's profile; lets cached pages link to it without naming the user."""
+    return redirect('profile_view', username=request.user.username)
 
 
+@replica_reads
 def profile_view(request, username):
     # Basic profile lookup
     user = get_object_or_404(User, username=username)
@@ -81,19 +122,26 @@ def profile_view(request, username):
     tournaments_participated = tournaments_participated_qs.count()
 
     # Matches played: matches belonging to tournaments the user participated in
-    participated_tournaments = tournaments_participated_qs.values_list('tournament', flat=True)
-    matches_played = Match.objects.filter(tournament__in=participated_tournaments).count()
+    # (rows of archived tournaments live in the archive database, so count both)
+    participated_tournaments = list(tournaments_participated_qs.values_list('tournament', flat=True))
+    participated_by_db = archive.by_database(participated_tournaments)
+    matches_played = sum(
+        Match.objects.using(db).filter(tournament__in=ids).count() for db, ids in participated_by_db.items()
+    )
 
     # Top finishes
     # For knockout: count FINAL matches where winner.name matches the user's username
-    knockout_wins = Match.objects.filter(stage='FINAL', winner__isnull=False, winner__name__iexact=user.username).count()
+    knockout_wins = sum(
+        Match.objects.using(db).filter(stage='FINAL', winner__isnull=False, winner__name__iexact=user.username).count()
+        for db in archive.databases()
+    )
 
     # For league: count tournaments where PointTable top player name matches user.username
     league_firsts = 0
     league_seconds = 0
     # For each league tournament the user participated in, check PointTable ordering
     for t in Tournament.objects.filter(id__in=participated_tournaments, match_type='league'):
-        pts = PointTable.objects.filter(tournament=t).order_by('-points')
+        pts = PointTable.objects.using(archive.db_for(t)).filter(tournament=t).order_by('-points')
         if pts.exists():
             top = pts.first()
             if top.player.name.lower() == user.username.lower():
@@ -103,7 +151,10 @@ def profile_view(request, username):
 
     # For knockouts second place: count finals where winner is other and the runner-up matches user's name
     knockout_seconds = 0
-    finals = Match.objects.filter(stage='FINAL', tournament__in=participated_tournaments).select_related('player1', 'player2', 'winner')
+    finals = itertools.chain.from_iterable(
+        Match.objects.using(db).filter(stage='FINAL', tournament__in=ids).select_related('player1', 'player2', 'winner')
+        for db, ids in participated_by_db.items()
+    )
     for f in finals:
         # runner-up is the non-winner player
         if f.winner:
@@ -123,16 +174,25 @@ def profile_view(request, username):
         # Ensure user_profile exists
         if not user_profile:
             user_profile = UserProfile.objects.create(user=user)
-        avatar = request.FILES.get('avatar')
-        cover = request.FILES.get('cover')
+        uploads = {'avatar': request.FILES.get('avatar'), 'cover_photo': request.FILES.get('cover')}
+        uploads = {field: upload for field, upload in uploads.items() if upload}
         bio_text = request.POST.get('bio')
-        if avatar:
-            user_profile.avatar = avatar
-        if cover:
-            user_profile.cover_photo = cover
+        try:
+            for field, upload in uploads.items():
+                images.attach(user_profile, field, upload)
+        except ValidationError as e:
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'status': 'error', 'errors': e.messages}, status=400)
+            messages.error(request, ' '.join(e.messages))
+            return redirect('profile_view', username=username)
+        changed = list(uploads)
         if bio_text is not None:
             user_profile.bio = bio_text.strip() or None
-        user_profile.save()
+            changed.append('bio')
+        # Only the edited columns: a full save could put back stale image_variants
+        user_profile.save(update_fields=changed)
+        for field in uploads:
+            images.enqueue(user_profile, field)
         # If this is an AJAX request, return JSON so the client can update without reload
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({'status': 'ok', 'bio': user_profile.bio})
@@ -154,18 +214,16 @@ def profile_view(request, username):
 @login_required(login_url='login')
 def get_profile_phone(request):
     """API endpoint to get user's profile phone number"""
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        return JsonResponse({
-            'phone_number': user_profile.phone_number or '',
-            'has_phone': bool(user_profile.phone_number)
-        })
-    except UserProfile.DoesNotExist:
+    user_profile = request.user_profile
+    if not user_profile:
         return JsonResponse({
             'phone_number': '',
             'has_phone': False
         })
-    return render(request, 'profile.html', context)
+    return JsonResponse({
+        'phone_number': user_profile.phone_number or '',
+        'has_phone': bool(user_profile.phone_number)
+    })
 
 
 
@@ -182,23 +240,16 @@ def join_public_tournament(request, tournament_id):
         # 🟢 NEW: Handle direct "Confirm & Join" without form code field
         if 'join_tournament' in request.POST or not form.is_valid():
             if request.user.is_authenticated:
-                try:
-                    user_profile = UserProfile.objects.get(user=request.user)
-                except UserProfile.DoesNotExist:
-                    user_profile = UserProfile.objects.create(user=request.user)
+                user_profile = ensure_user_profile(request)
 
             # Prevent host joining their own tournament
-            try:
-                host_profile = HostProfile.objects.get(user=request.user)
-                if tournament.created_by == host_profile:
-                    messages.error(request, 'You cannot join a tournament that you created.')
-                    return render(request, 'join_tournament.html', {
-                        'form': form, 
-                        'tournament': tournament,
-                        'is_own_tournament': True
-                    })
-            except HostProfile.DoesNotExist:
-                pass
+            if is_host_of(request, tournament):
+                messages.error(request, 'You cannot join a tournament that you created.')
+                return render(request, 'join_tournament.html', {
+                    'form': form, 
+                    'tournament': tournament,
+                    'is_own_tournament': True
+                })
 
             # Check already joined
             if TournamentParticipant.objects.filter(
@@ -246,20 +297,16 @@ def join_public_tournament(request, tournament_id):
         # 🟡 Normal join (via code form)
         elif form.is_valid():
             if request.user.is_authenticated:
-                try:
-                    user_profile = UserProfile.objects.get(user=request.user)
+                if request.user_profile:
+                    user_profile = request.user_profile
                     # Prevent host joining their own tournament
-                    try:
-                        host_profile = HostProfile.objects.get(user=request.user)
-                        if tournament.created_by == host_profile:
-                            messages.error(request, 'You cannot join a tournament that you created.')
-                            return render(request, 'join_tournament.html', {
-                                'form': form,
-                                'tournament': tournament,
-                                'is_own_tournament': True
-                            })
-                    except HostProfile.DoesNotExist:
-                        pass
+                    if is_host_of(request, tournament):
+                        messages.error(request, 'You cannot join a tournament that you created.')
+                        return render(request, 'join_tournament.html', {
+                            'form': form,
+                            'tournament': tournament,
+                            'is_own_tournament': True
+                        })
 
                     # Already joined check
                     if TournamentParticipant.objects.filter(
@@ -269,8 +316,8 @@ def join_public_tournament(request, tournament_id):
                         messages.error(request, 'You have already joined this tournament.')
                         return render(request, 'join_tournament.html', {'form': form, 'tournament': tournament})
 
-                except UserProfile.DoesNotExist:
-                    user_profile = UserProfile.objects.create(user=request.user)
+                else:
+                    user_profile = ensure_user_profile(request)
 
             # Full check
             if current_players >= capacity:
@@ -283,7 +330,7 @@ def join_public_tournament(request, tournament_id):
 
             # Paid tournament check
             elif tournament.is_paid and tournament.price > 0:
-                user_profile = UserProfile.objects.get(user=request.user)
+                user_profile = ensure_user_profile(request)
                 payment_completed = Payment.objects.filter(
                     tournament=tournament,
                     user_profile=user_profile,
@@ -307,8 +354,7 @@ def join_public_tournament(request, tournament_id):
                     status='completed'
                 ).first()
                 if payment:
-                    payment.player = new_player
-                    payment.save()
+                    payments.link_player(payment, new_player)
 
                 TournamentParticipant.objects.get_or_create(
                     tournament=tournament,
@@ -327,7 +373,7 @@ def join_public_tournament(request, tournament_id):
                 )
 
                 if request.user.is_authenticated:
-                    user_profile = UserProfile.objects.get(user=request.user)
+                    user_profile = ensure_user_profile(request)
                     TournamentParticipant.objects.get_or_create(
                         tournament=tournament,
                         user_profile=user_profile
@@ -339,8 +385,8 @@ def join_public_tournament(request, tournament_id):
                 current_players_qs = Player.objects.filter(tournament=tournament)
                 count = current_players_qs.count()
 
-                print(f"[PUBLIC JOIN DEBUG] Tournament: {tournament.name}")
-                print(f"[PUBLIC JOIN DEBUG] Player count: {count}/{tournament.num_participants}")
+                logger.debug('Public join: %s/%s players', count, tournament.num_participants,
+                             extra={'tournament_id': tournament.id})
 
                 if count == tournament.num_participants:
                     existing_matches = Match.objects.filter(tournament=tournament)
@@ -398,31 +444,65 @@ def generate_league_fixtures(players):
 
 
 # Views
-def home(request):
-    # Top Players: aggregate across all tournaments
-    top_players_qs = (
-        PointTable.objects.select_related('player', 'player__user_profile')
-        .values('player__name', 'player__id', 'player__user_profile__avatar')
+def _across_databases(queryset, **tournament_filters):
+    """
+    The queryset on each database holding tournament rows, limited to tournaments matching the filters
+    that are not deleted. The archive is filtered by tournament id rather than joined to the primary's tables.
+    """
+    for db in archive.databases():
+        if db is None:
+            # Deleted tournaments keep their rows until they are purged
+            yield queryset.filter(tournament__deleted_at__isnull=True, **{
+                f'tournament__{name}': value for name, value in tournament_filters.items()
+            })
+        else:
+            archived = Tournament.objects.filter(archived_at__isnull=False, **tournament_filters)
+            yield queryset.using(db).filter(tournament__in=list(archived.values_list('id', flat=True)))
+
+
+def _player_totals(queryset):
+    return (
+        queryset.values('player__name', 'player__id', 'player__user_profile')
         .annotate(
             total_points=models.Sum('points'),
             total_wins=models.Sum('wins'),
             total_tournaments=models.Count('tournament', distinct=True),
             total_matches=models.Sum('matches_played'),
         )
-        .order_by('-total_points', '-total_wins')[:10]
+        .order_by('-total_points', '-total_wins')
     )
 
+
+def _best(rows, limit):
+    # Each database's rows are already ordered; players are disjoint between them
+    return sorted(rows, key=lambda p: (-(p['total_points'] or 0), -(p['total_wins'] or 0)))[:limit]
+
+
+def _avatars(rows):
+    """{user profile id: (avatar, image variants)} for the players in rows; profiles live on the primary."""
+    ids = {p['player__user_profile'] for p in rows if p['player__user_profile']}
+    if not ids:
+        return {}
+    return {
+        pk: (avatar, variants)
+        for pk, avatar, variants in UserProfile.objects.filter(id__in=ids).values_list('id', 'avatar', 'image_variants')
+    }
+
+
+def _top_players():
+    # Top Players: aggregate across all tournaments, archived ones included
+    top_players_qs = _best(itertools.chain.from_iterable(
+        _player_totals(qs)[:10] for qs in _across_databases(PointTable.objects.all())
+    ), 10)
+    avatars = _avatars(top_players_qs)
+
     # Prepare player leaderboard data
     top_players = []
     for p in top_players_qs:
         win_rate = 0
         if p['total_matches']:
             win_rate = round(100 * p['total_wins'] / p['total_matches'])
-        
-        # Get avatar URL if available
-        avatar_url = None
-        if p['player__user_profile__avatar']:
-            avatar_url = p['player__user_profile__avatar']
+        avatar, avatar_variants = avatars.get(p['player__user_profile'], (None, None))
         
         top_players.append({
             'username': p['player__name'],
@@ -430,37 +510,29 @@ def home(request):
             'tournaments': p['total_tournaments'],
             'wins': p['total_wins'],
             'win_rate': win_rate,
-            'avatar_url': avatar_url,
+            # Image name and its resized variants, for the {% picture %} tag
+            'avatar': avatar,
+            'avatar_variants': avatar_variants,
         })
+    return top_players
+
 
+def _featured_players():
     # Featured Players by Category (Top 1 from each segment)
     featured_categories = ['valorant', 'football', 'cricket', 'basketball']
     featured_players = []
     
     for category in featured_categories:
-        top_in_category = (
-            PointTable.objects.select_related('player', 'player__user_profile', 'player__user_profile__user', 'tournament')
-            .filter(tournament__category=category)
-            .values('player__name', 'player__id', 'player__user_profile__avatar')
-            .annotate(
-                total_points=models.Sum('points'),
-                total_wins=models.Sum('wins'),
-                total_tournaments=models.Count('tournament', distinct=True),
-                total_matches=models.Sum('matches_played'),
-            )
-            .order_by('-total_points', '-total_wins')
-            .first()
-        )
+        top_in_category = next(iter(_best(
+            filter(None, (_player_totals(qs).first() for qs in _across_databases(PointTable.objects.all(), category=category))),
+            1,
+        )), None)
         
         if top_in_category:
             win_rate = 0
             if top_in_category['total_matches']:
                 win_rate = round(100 * top_in_category['total_wins'] / top_in_category['total_matches'])
-            
-            # Get avatar URL
-            avatar_url = None
-            if top_in_category['player__user_profile__avatar']:
-                avatar_url = top_in_category['player__user_profile__avatar']
+            avatar, avatar_variants = _avatars([top_in_category]).get(top_in_category['player__user_profile'], (None, None))
             
             featured_players.append({
                 'username': top_in_category['player__name'],
@@ -470,7 +542,8 @@ def home(request):
                 'wins': top_in_category['total_wins'],
                 'tournaments': top_in_category['total_tournaments'],
                 'win_rate': win_rate,
-                'avatar_url': avatar_url,
+                'avatar': avatar,
+                'avatar_variants': avatar_variants,
                 'has_player': True,
             })
         else:
@@ -483,30 +556,36 @@ def home(request):
                 'wins': 0,
                 'tournaments': 0,
                 'win_rate': 0,
-                'avatar_url': None,
+                'avatar': None,
                 'has_player': False,
             })
+    return featured_players
 
+
+def _top_teams():
     # Top Teams: group by team_name, ignore blank/null
-    top_teams_qs = (
-        Player.objects.exclude(team_name__isnull=True).exclude(team_name='')
-        .values('team_name')
-        .annotate(
+    totals = defaultdict(lambda: dict.fromkeys(('team_points', 'team_wins', 'team_tournaments', 'team_matches'), 0))
+    players = Player.objects.exclude(team_name__isnull=True).exclude(team_name='')
+    # A team plays in live and archived tournaments alike, so every team's totals are added up
+    for qs in _across_databases(players):
+        for t in qs.values('team_name').annotate(
             team_points=models.Sum('pointtable__points'),
             team_wins=models.Sum('pointtable__wins'),
             team_tournaments=models.Count('tournament', distinct=True),
             team_matches=models.Sum('pointtable__matches_played'),
-        )
-        .order_by('-team_points', '-team_wins')[:10]
-    )
+        ).order_by():
+            team = totals[t.pop('team_name')]
+            for field, value in t.items():
+                team[field] += value or 0
+    top_teams_qs = sorted(totals.items(), key=lambda item: (-item[1]['team_points'], -item[1]['team_wins']))[:10]
 
     top_teams = []
-    for t in top_teams_qs:
+    for name, t in top_teams_qs:
         win_rate = 0
         if t['team_matches']:
             win_rate = round(100 * t['team_wins'] / t['team_matches'])
         top_teams.append({
-            'name': t['team_name'],
+            'name': name,
             'points': t['team_points'],
             'tournaments': t['team_tournaments'],
             'wins': t['team_wins'],
@@ -515,10 +594,18 @@ def home(request):
             'logo_url': '/static/images/logo.png',
         })
 
+    return top_teams
+
+
+@replica_reads
+@pagecache.cache_page(version=fragments.site_version)
+def home(request):
     return render(request, 'home.html', {
-        'top_players': top_players,
-        'top_teams': top_teams,
-        'featured_players': featured_players,
+        # Evaluated only when the cached leaderboard fragment has to be rendered again
+        'top_players': SimpleLazyObject(_top_players),
+        'top_teams': SimpleLazyObject(_top_teams),
+        'featured_players': SimpleLazyObject(_featured_players),
+        'site_version': fragments.site_version(),
     })
 
 
@@ -549,11 +636,7 @@ def update_match_result(request, match_id):
 
     # Only the tournament host may update knockout match results
     if match.tournament.match_type == 'knockout':
-        # Compare by user to avoid HostProfile instance mismatch
-        try:
-            if not match.tournament.created_by or match.tournament.created_by.user != request.user:
-                return HttpResponseForbidden('Only the tournament host can update knockout match results.')
-        except Exception:
+        if not is_host_of(request, match.tournament):
             return HttpResponseForbidden('Only the tournament host can update knockout match results.')
 
     # Update match result
@@ -564,6 +647,7 @@ def update_match_result(request, match_id):
         match.winner = Player.objects.get(id=winner_id)
         match.is_draw = False
     match.save()
+    metrics.inc('tournifyx_match_results_total')
 
     # Update point table for both players
     update_points_for_match(match, prev)
@@ -572,69 +656,169 @@ def update_match_result(request, match_id):
         try:
             # Update child matches to reflect change (clear winners downstream)
             propagate_result_change(match)
-        except Exception as e:
-            print(f"Error propagating result change: {e}")
+        except Exception:
+            logger.exception('Error propagating result change of match %s', match.id,
+                             extra={'tournament_id': match.tournament_id})
         try:
             generate_next_knockout_round(match.tournament)
-        except Exception as e:
-            print(f"Error generating next knockout round: {e}")
+        except Exception:
+            logger.exception('Error generating next knockout round', extra={'tournament_id': match.tournament_id})
 
     messages.success(request, 'Match result updated and point table recalculated.')
     return redirect('tournament_dashboard', tournament_id=match.tournament.id)
 
 
+class BulkResultError(Exception):
+    """Raised inside the bulk result transaction to roll every entry back."""
+
+
+def _parse_bulk_results(request):
+    """Return a list of {'match_id', 'winner_id', 'draw'} dicts from a JSON body or form fields."""
+    if request.content_type == 'application/json':
+        import json
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        entries = payload.get('results') if isinstance(payload, dict) else None
+        if not isinstance(entries, list):
+            return None
+        parsed = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                return None
+            parsed.append({
+                'match_id': entry.get('match_id'),
+                'winner_id': entry.get('winner_id'),
+                # Anything but a JSON boolean is rejected below; bool('false') would be a draw
+                'draw': entry.get('draw', False),
+            })
+        return parsed
+
+    # Form post: winner_<match_id>=<player_id> and/or draw_<match_id>=1
+    parsed = {}
+    for key, value in request.POST.items():
+        prefix, _, match_id = key.partition('_')
+        if prefix in ('winner', 'draw') and match_id.isdigit():
+            entry = parsed.setdefault(match_id, {'match_id': match_id, 'winner_id': None, 'draw': False})
+            if prefix == 'winner':
+                entry['winner_id'] = value or None
+            else:
+                entry['draw'] = value.lower() in ('1', 'true', 'on', 'yes')
+    return list(parsed.values())
+
+
+@login_required
+@require_POST
+def bulk_update_match_results(request, tournament_id):
+    """Apply many match results in one transaction, then recompute standings and bracket once"""
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    wants_json = request.content_type == 'application/json' or request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+    if not is_host_of(request, tournament):
+        return HttpResponseForbidden('Only the tournament host can update match results.')
+
+    entries = _parse_bulk_results(request)
+    if not entries:
+        if wants_json:
+            return JsonResponse({'error': 'No results submitted.'}, status=400)
+        messages.error(request, 'No results submitted.')
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+    outcomes = {}
+    valid = []
+    seen = set()
+    match_ids = [str(e['match_id']) for e in entries]
+    matches = {
+        str(m.id): m
+        for m in Match.objects.filter(tournament=tournament, id__in=[i for i in match_ids if i.isdigit()])
+    }
+    is_knockout = tournament.match_type == 'knockout'
+
+    # Validate every entry before touching the database
+    for entry in entries:
+        key = str(entry['match_id'])
+        if key in seen:
+            outcomes[key] = {'match_id': key, 'status': 'error', 'error': 'Duplicate entry for this match.'}
+            continue
+        seen.add(key)
+        if key not in matches:
+            outcomes[key] = {'match_id': key, 'status': 'error', 'error': 'Match not found in this tournament.'}
+        elif not isinstance(entry['draw'], bool):
+            outcomes[key] = {'match_id': key, 'status': 'error', 'error': 'Draw must be true or false.'}
+        elif not entry['winner_id'] and not entry['draw']:
+            outcomes[key] = {'match_id': key, 'status': 'error', 'error': 'Select a winner or mark as draw.'}
+        elif entry['draw'] and is_knockout:
+            outcomes[key] = {'match_id': key, 'status': 'error', 'error': 'Knockout matches cannot end in a draw.'}
+        else:
+            valid.append(entry)
+
+    updated = 0
+    if len(valid) == len(entries):
+        try:
+            with transaction.atomic():
+                # Earlier rounds first so downstream slots are filled before later results are checked
+                propagated = False
+                for entry in sorted(valid, key=lambda e: (matches[str(e['match_id'])].round_number, int(e['match_id']))):
+                    key = str(entry['match_id'])
+                    match = matches[key]
+                    if propagated:
+                        match.refresh_from_db(fields=['player1', 'player2', 'winner', 'is_draw'])
+
+                    if entry['draw']:
+                        winner_id = None
+                    else:
+                        winner_id = int(entry['winner_id']) if str(entry['winner_id']).isdigit() else None
+                        if winner_id is None or winner_id not in (match.player1_id, match.player2_id):
+                            outcomes[key] = {'match_id': key, 'status': 'error', 'error': 'Winner is not a player in this match.'}
+                            raise BulkResultError()
+
+                    if match.winner_id == winner_id and match.is_draw == entry['draw']:
+                        outcomes[key] = {'match_id': key, 'status': 'unchanged'}
+                        continue
+
+                    match.winner_id = winner_id
+                    match.is_draw = entry['draw']
+                    match.save(update_fields=['winner', 'is_draw'])
+                    outcomes[key] = {'match_id': key, 'status': 'updated'}
+                    updated += 1
+
+                    if is_knockout:
+                        propagate_result_change(match)
+                        propagated = True
+
+                if updated:
+                    metrics.inc('tournifyx_match_results_total', updated)
+                    recalculate_point_table(tournament)
+                    if is_knockout:
+                        generate_next_knockout_round(tournament)
+        except BulkResultError:
+            updated = 0
+
+    ok = not any(o['status'] == 'error' for o in outcomes.values())
+    results = []
+    for key in match_ids:
+        outcome = outcomes.get(key) or {'match_id': key, 'status': 'skipped'}
+        if not ok and outcome['status'] in ('updated', 'unchanged'):
+            outcome = {'match_id': key, 'status': 'skipped'}
+        results.append(outcome)
+
+    if wants_json:
+        return JsonResponse({'updated': updated, 'results': results}, status=200 if ok else 400)
+
+    if ok:
+        messages.success(request, f'{updated} match result(s) updated and point table recalculated.')
+    else:
+        errors = [f"Match {r['match_id']}: {r['error']}" for r in results if r['status'] == 'error']
+        messages.error(request, 'No results were saved. ' + ' '.join(errors))
+    return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+
 # Helper function to update points for a match
 def update_points_for_match(match, prev_result=None):
     # Recalculate the entire point table for the tournament
-    tournament = match.tournament
-    
     # Update point tables for both league AND knockout tournaments
-    players = Player.objects.filter(tournament=tournament)
-    # Reset all point table entries
-    for pt in PointTable.objects.filter(tournament=tournament):
-        pt.matches_played = 0
-        pt.wins = 0
-        pt.draws = 0
-        pt.losses = 0
-        pt.points = 0
-        pt.save()
-
-    
-    # Go through all matches and update stats
-    for m in Match.objects.filter(tournament=tournament):
-        # Only count as played if result is set (winner or draw)
-        if m.winner is not None or m.is_draw:
-            pt1, _ = PointTable.objects.get_or_create(tournament=tournament, player=m.player1)
-            # Handle possible bye (player2 is None)
-            if m.player2:
-                pt2, _ = PointTable.objects.get_or_create(tournament=tournament, player=m.player2)
-            else:
-                pt2 = None
-
-            pt1.matches_played += 1
-            if pt2:
-                pt2.matches_played += 1
-
-            if m.is_draw:
-                # Draw with missing player doesn't make sense; only handle if both present
-                if pt2:
-                    pt1.draws += 1
-                    pt2.draws += 1
-                    pt1.points += 1
-                    pt2.points += 1
-            elif m.winner == m.player1:
-                pt1.wins += 1
-                pt1.points += 3
-                if pt2:
-                    pt2.losses += 1
-            elif m.player2 and m.winner == m.player2:
-                pt2.wins += 1
-                pt2.points += 3
-                pt1.losses += 1
-
-            pt1.save()
-            if pt2:
-                pt2.save()
+    recalculate_point_table(match.tournament)
 
 def register(request):
     if request.method == 'POST':
@@ -686,10 +870,7 @@ def logout(request):
 
 @login_required(login_url='login')
 def host_tournament(request):
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-    except HostProfile.DoesNotExist:
-        host_profile = HostProfile.objects.create(user=request.user)
+    host_profile = ensure_host_profile(request)
 
     tournaments = Tournament.objects.filter(created_by=host_profile)
     tournament_code = None
@@ -713,12 +894,10 @@ def host_tournament(request):
                 use_profile_phone = form.cleaned_data.get('use_profile_phone', True)
                 if use_profile_phone:
                     # Get phone from user profile
-                    try:
-                        user_profile = UserProfile.objects.get(user=request.user)
-                        tournament.payment_phone = user_profile.phone_number
-                    except UserProfile.DoesNotExist:
+                    if not request.user_profile:
                         messages.error(request, 'Please add a phone number to your profile first.')
                         return redirect('host_tournament')
+                    tournament.payment_phone = request.user_profile.phone_number
                 else:
                     # Use custom phone number
                     tournament.payment_phone = form.cleaned_data.get('payment_phone')
@@ -726,10 +905,9 @@ def host_tournament(request):
                         messages.error(request, 'Please provide a phone number for receiving payments.')
                         return redirect('host_tournament')
             
-            print(f"[HOST DEBUG] is_paid: {tournament.is_paid}, price: {tournament.price}, payment_phone: {tournament.payment_phone}")
             # Generate a unique tournament code
             code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            while Tournament.objects.filter(code=code).exists():
+            while Tournament.all_objects.filter(code=code).exists():
                 code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
             tournament.code = code
             tournament.save()
@@ -764,16 +942,14 @@ def host_tournament(request):
             # Create Match objects ONLY if tournament is FULL
             # Fixtures should only be generated when the tournament reaches full capacity
             count = len(player_objs)
-            print(f"[HOST DEBUG] Tournament: {tournament.name}")
-            print(f"[HOST DEBUG] Initial player count: {count}")
-            print(f"[HOST DEBUG] Required participants: {tournament.num_participants}")
-            print(f"[HOST DEBUG] Match type: {tournament.match_type}")
+            log_extra = {'tournament_id': tournament.id}
+            logger.debug('Hosted %s tournament with %s/%s players (paid=%s)', tournament.match_type, count,
+                         tournament.num_participants, tournament.is_paid, extra=log_extra)
             
             if count == tournament.num_participants:
-                print(f"[HOST DEBUG] Tournament is full at creation! Generating fixtures...")
+                started = time.perf_counter()
                 if tournament.match_type == 'knockout':
                     if count >= 2 and (count & (count - 1)) == 0:  # Power of 2 check
-                        print(f"[HOST DEBUG] Generating knockout fixtures for {count} players")
                         fixture_pairs = generate_knockout_fixtures(player_objs[:])
                         for p1, p2 in fixture_pairs:
                             Match.objects.create(
@@ -784,12 +960,12 @@ def host_tournament(request):
                                 round_number=1,
                                 scheduled_time=None
                             )
-                        print(f"[HOST DEBUG] Created {len(fixture_pairs)} knockout matches")
+                        logger.info('Created %s knockout matches', len(fixture_pairs),
+                                    extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                     else:
-                        print(f"[HOST DEBUG] Player count {count} is not a power of 2")
+                        logger.warning('Knockout player count %s is not a power of 2', count, extra=log_extra)
                         
                 elif tournament.match_type == 'league' and count >= 2:
-                    print(f"[HOST DEBUG] Generating league fixtures for {count} players")
                     fixture_pairs = generate_league_fixtures([p.name for p in player_objs])
                     name_to_player = {p.name: p for p in player_objs}
                     for p1_name, p2_name in fixture_pairs:
@@ -801,9 +977,8 @@ def host_tournament(request):
                             round_number=1,
                             scheduled_time=None
                         )
-                    print(f"[HOST DEBUG] Created {len(fixture_pairs)} league matches")
-            else:
-                print(f"[HOST DEBUG] Tournament not full yet ({count}/{tournament.num_participants}), fixtures will be generated later")
+                    logger.info('Created %s league matches', len(fixture_pairs),
+                                extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
 
             tournament_code = tournament.code
             player_count = len(player_objs)
@@ -860,7 +1035,7 @@ def join_tournament(request):
                 try:
                     tournament = Tournament.objects.get(code=code)
                     # Check if user already joined
-                    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+                    user_profile = ensure_user_profile(request)
                     already_joined = TournamentParticipant.objects.filter(
                         tournament=tournament,
                         user_profile=user_profile
@@ -886,7 +1061,7 @@ def join_tournament(request):
                     tournament = Tournament.objects.get(code=tournament_code)
                     
                     # Get or create UserProfile
-                    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+                    user_profile = ensure_user_profile(request)
                     
                     # Check if user already joined
                     already_joined = TournamentParticipant.objects.filter(
@@ -897,18 +1072,14 @@ def join_tournament(request):
                         messages.error(request, 'You have already joined this tournament.')
                     else:
                         # Check if user is the host (hosts can't join their own tournaments)
-                        try:
-                            host_profile = HostProfile.objects.get(user=request.user)
-                            if tournament.created_by == host_profile:
-                                messages.error(request, 'You cannot join a tournament that you created.')
-                                return render(request, 'join_tournament.html', {
-                                    'form': form,
-                                    'tournament': tournament,
-                                    'public_tournaments': public_tournaments,
-                                    'is_own_tournament': True  # Flag to show modal
-                                })
-                        except HostProfile.DoesNotExist:
-                            pass  # User is not a host, they can join
+                        if is_host_of(request, tournament):
+                            messages.error(request, 'You cannot join a tournament that you created.')
+                            return render(request, 'join_tournament.html', {
+                                'form': form,
+                                'tournament': tournament,
+                                'public_tournaments': public_tournaments,
+                                'is_own_tournament': True  # Flag to show modal
+                            })
                         
                         # Check if tournament is full
                         current_players = Player.objects.filter(tournament=tournament).count()
@@ -956,28 +1127,24 @@ def join_tournament(request):
                                 status='completed'
                             ).first()
                             if payment:
-                                payment.player = new_player
-                                payment.save()
+                                payments.link_player(payment, new_player)
                             
                             # Check if tournament is now FULL and needs fixtures generated
                             current_players = Player.objects.filter(tournament=tournament)
                             count = current_players.count()
                             
-                            print(f"[JOIN PAID DEBUG] Tournament: {tournament.name}")
-                            print(f"[JOIN PAID DEBUG] Current player count: {count}")
-                            print(f"[JOIN PAID DEBUG] Required participants: {tournament.num_participants}")
-                            print(f"[JOIN PAID DEBUG] Match type: {tournament.match_type}")
+                            log_extra = {'tournament_id': tournament.id}
+                            logger.debug('Paid join: %s/%s players (%s)', count, tournament.num_participants,
+                                         tournament.match_type, extra=log_extra)
                             
                             # Only generate fixtures if tournament is now full and no fixtures exist yet
                             if count == tournament.num_participants:
                                 existing_matches = Match.objects.filter(tournament=tournament)
-                                print(f"[JOIN PAID DEBUG] Tournament is full! Existing matches: {existing_matches.count()}")
                                 
                                 if not existing_matches.exists():
-                                    print(f"[JOIN PAID DEBUG] No existing matches, generating fixtures...")
+                                    started = time.perf_counter()
                                     if tournament.match_type == 'knockout':
                                         if count >= 2 and (count & (count - 1)) == 0:  # Power of 2
-                                            print(f"[JOIN PAID DEBUG] Generating knockout fixtures for {count} players")
                                             fixture_pairs = generate_knockout_fixtures(list(current_players))
                                             
                                             # Calculate stage based on number of matches
@@ -991,7 +1158,6 @@ def join_tournament(request):
                                             else:
                                                 stage = 'KNOCKOUT'
                                             
-                                            print(f"[JOIN PAID DEBUG] Creating {num_matches} matches with stage: {stage}")
                                             for p1, p2 in fixture_pairs:
                                                 Match.objects.create(
                                                     tournament=tournament,
@@ -1001,12 +1167,12 @@ def join_tournament(request):
                                                     round_number=1,
                                                     scheduled_time=None
                                                 )
-                                            print(f"[JOIN PAID DEBUG] Created {len(fixture_pairs)} knockout matches")
+                                            logger.info('Created %s %s matches', num_matches, stage,
+                                                        extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                                             messages.success(request, f'Successfully joined "{tournament.name}"! Tournament is now full and fixtures have been generated.')
                                         else:
-                                            print(f"[JOIN PAID DEBUG] Player count {count} is not a power of 2")
+                                            logger.warning('Knockout player count %s is not a power of 2', count, extra=log_extra)
                                     elif tournament.match_type == 'league' and count >= 2:
-                                        print(f"[JOIN PAID DEBUG] Generating league fixtures for {count} players")
                                         fixture_pairs = generate_league_fixtures([p.name for p in current_players])
                                         name_to_player = {p.name: p for p in current_players}
                                         for p1_name, p2_name in fixture_pairs:
@@ -1018,10 +1184,11 @@ def join_tournament(request):
                                                 round_number=1,
                                                 scheduled_time=None
                                             )
-                                        print(f"[JOIN PAID DEBUG] Created {len(fixture_pairs)} league matches")
+                                        logger.info('Created %s league matches', len(fixture_pairs),
+                                                    extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                                         messages.success(request, f'Successfully joined "{tournament.name}"! Tournament is now full and fixtures have been generated.')
                                 else:
-                                    print(f"[JOIN PAID DEBUG] Fixtures already exist, skipping generation")
+                                    logger.debug('Fixtures already exist, skipping generation', extra=log_extra)
                                     messages.success(request, f'Successfully joined {tournament.name}!')
                             
                             if count < tournament.num_participants:
@@ -1049,21 +1216,18 @@ def join_tournament(request):
                             current_players = Player.objects.filter(tournament=tournament)
                             count = current_players.count()
                             
-                            print(f"[JOIN DEBUG] Tournament: {tournament.name}")
-                            print(f"[JOIN DEBUG] Current player count: {count}")
-                            print(f"[JOIN DEBUG] Required participants: {tournament.num_participants}")
-                            print(f"[JOIN DEBUG] Match type: {tournament.match_type}")
+                            log_extra = {'tournament_id': tournament.id}
+                            logger.debug('Join: %s/%s players (%s)', count, tournament.num_participants,
+                                         tournament.match_type, extra=log_extra)
                             
                             # Only generate fixtures if tournament is now full and no fixtures exist yet
                             if count == tournament.num_participants:
                                 existing_matches = Match.objects.filter(tournament=tournament)
-                                print(f"[JOIN DEBUG] Tournament is full! Existing matches: {existing_matches.count()}")
                                 
                                 if not existing_matches.exists():
-                                    print(f"[JOIN DEBUG] No existing matches, generating fixtures...")
+                                    started = time.perf_counter()
                                     if tournament.match_type == 'knockout':
                                         if count >= 2 and (count & (count - 1)) == 0:  # Power of 2
-                                            print(f"[JOIN DEBUG] Generating knockout fixtures for {count} players")
                                             fixture_pairs = generate_knockout_fixtures(list(current_players))
                                             
                                             # Calculate stage based on number of matches
@@ -1077,7 +1241,6 @@ def join_tournament(request):
                                             else:
                                                 stage = 'KNOCKOUT'
                                             
-                                            print(f"[JOIN DEBUG] Creating {num_matches} matches with stage: {stage}")
                                             for p1, p2 in fixture_pairs:
                                                 Match.objects.create(
                                                     tournament=tournament,
@@ -1087,12 +1250,12 @@ def join_tournament(request):
                                                     round_number=1,
                                                     scheduled_time=None
                                                 )
-                                            print(f"[JOIN DEBUG] Created {len(fixture_pairs)} knockout matches")
+                                            logger.info('Created %s %s matches', num_matches, stage,
+                                                        extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                                             messages.success(request, f'Successfully joined "{tournament.name}"! Tournament is now full and fixtures have been generated.')
                                         else:
-                                            print(f"[JOIN DEBUG] Player count {count} is not a power of 2")
+                                            logger.warning('Knockout player count %s is not a power of 2', count, extra=log_extra)
                                     elif tournament.match_type == 'league' and count >= 2:
-                                        print(f"[JOIN DEBUG] Generating league fixtures for {count} players")
                                         fixture_pairs = generate_league_fixtures([p.name for p in current_players])
                                         name_to_player = {p.name: p for p in current_players}
                                         for p1_name, p2_name in fixture_pairs:
@@ -1104,10 +1267,11 @@ def join_tournament(request):
                                                 round_number=1,
                                                 scheduled_time=None
                                             )
-                                        print(f"[JOIN DEBUG] Created {len(fixture_pairs)} league matches")
+                                        logger.info('Created %s league matches', len(fixture_pairs),
+                                                    extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                                         messages.success(request, f'Successfully joined "{tournament.name}"! Tournament is now full and fixtures have been generated.')
                                 else:
-                                    print(f"[JOIN DEBUG] Fixtures already exist, skipping generation")
+                                    logger.debug('Fixtures already exist, skipping generation', extra=log_extra)
                             
                             if count < tournament.num_participants:
                                 messages.success(request, f'Successfully joined "{tournament.name}"!')
@@ -1125,66 +1289,95 @@ def join_tournament(request):
 
 
 
+def _dashboard_matches(tournament):
+    matches = list(Match.objects.filter(tournament=tournament).select_related('player1', 'player2', 'winner'))
+    for match in matches:
+        match.has_result = bool(match.winner) or match.is_draw
+    return matches
+
+
 @login_required
+@replica_reads
+@archive.archive_reads
 def tournament_dashboard(request, tournament_id):
+    # Spectators of a finished tournament get the pre-rendered snapshot (no tournament queries)
+    snapshot = snapshots.load_dashboard(tournament_id, request.user)
+    if snapshot is not None:
+        manifest, snapshot_html = snapshot
+        return render(request, 'archived_dashboard.html', {
+            'tournament_name': manifest['name'],
+            'snapshot_html': snapshot_html,
+        })
+
+    # The tournament (and its version, which keys the cached fragments) is read before anything they show
     tournament = get_object_or_404(Tournament, id=tournament_id)
+    archive.note(tournament.id, tournament.archived_at)
     participants = Player.objects.filter(tournament=tournament)
     
     # Check if fixtures need to be generated for filled tournaments
     current_player_count = participants.count()
-    matches = list(Match.objects.filter(tournament=tournament).select_related('player1', 'player2', 'winner'))
+    has_matches = Match.objects.filter(tournament=tournament).exists()
+
+    if current_player_count == tournament.num_participants and not has_matches:
+        # The replica may lag behind; decide on fixture generation from the primary
+        participants = participants.using(DEFAULT_DB_ALIAS)
+        current_player_count = participants.count()
+        has_matches = Match.objects.using(DEFAULT_DB_ALIAS).filter(tournament=tournament).exists()
     
     # Auto-generate fixtures if tournament is filled and no fixtures exist
     if (current_player_count == tournament.num_participants and 
-        not matches and 
+        not has_matches and 
         current_player_count >= 2):
         
-        if tournament.match_type == 'knockout':
-            # Check if player count is power of 2
-            if current_player_count & (current_player_count - 1) == 0:
-                fixture_pairs = generate_knockout_fixtures(list(participants))
+        # One transaction, so the tournament's version is bumped once for all the new matches
+        with transaction.atomic():
+            if tournament.match_type == 'knockout':
+                # Check if player count is power of 2
+                if current_player_count & (current_player_count - 1) == 0:
+                    fixture_pairs = generate_knockout_fixtures(list(participants))
                 
-                # Determine stage based on number of matches
-                num_matches = len(fixture_pairs)
-                if num_matches == 1:
-                    stage = 'FINAL'
-                elif num_matches == 2:
-                    stage = 'SEMI'
-                elif num_matches == 4:
-                    stage = 'QUARTER'
-                else:
-                    stage = 'KNOCKOUT'
+                    # Determine stage based on number of matches
+                    num_matches = len(fixture_pairs)
+                    if num_matches == 1:
+                        stage = 'FINAL'
+                    elif num_matches == 2:
+                        stage = 'SEMI'
+                    elif num_matches == 4:
+                        stage = 'QUARTER'
+                    else:
+                        stage = 'KNOCKOUT'
                 
-                for p1, p2 in fixture_pairs:
+                    for p1, p2 in fixture_pairs:
+                        Match.objects.create(
+                            tournament=tournament,
+                            player1=p1,
+                            player2=p2,
+                            stage=stage,
+                            round_number=1,
+                            scheduled_time=None
+                        )
+                    messages.success(request, f"Tournament is now full! Fixtures have been generated automatically.")
+                
+            elif tournament.match_type == 'league':
+                fixture_pairs = generate_league_fixtures([p.name for p in participants])
+                name_to_player = {p.name: p for p in participants}
+                for p1_name, p2_name in fixture_pairs:
                     Match.objects.create(
                         tournament=tournament,
-                        player1=p1,
-                        player2=p2,
-                        stage=stage,
+                        player1=name_to_player[p1_name],
+                        player2=name_to_player[p2_name],
+                        stage='GROUP',
                         round_number=1,
                         scheduled_time=None
                     )
                 messages.success(request, f"Tournament is now full! Fixtures have been generated automatically.")
-                
-        elif tournament.match_type == 'league':
-            fixture_pairs = generate_league_fixtures([p.name for p in participants])
-            name_to_player = {p.name: p for p in participants}
-            for p1_name, p2_name in fixture_pairs:
-                Match.objects.create(
-                    tournament=tournament,
-                    player1=name_to_player[p1_name],
-                    player2=name_to_player[p2_name],
-                    stage='GROUP',
-                    round_number=1,
-                    scheduled_time=None
-                )
-            messages.success(request, f"Tournament is now full! Fixtures have been generated automatically.")
         
         # Refresh matches after generation
-        matches = list(Match.objects.filter(tournament=tournament).select_related('player1', 'player2', 'winner'))
-    
-    for match in matches:
-        match.has_result = bool(match.winner) or match.is_draw
+        has_matches = Match.objects.filter(tournament=tournament).exists()
+        tournament.refresh_from_db(using=DEFAULT_DB_ALIAS, fields=['version'])
+
+    # Evaluated only when a fragment showing them has to be rendered
+    matches = SimpleLazyObject(lambda: _dashboard_matches(tournament))
     
     # Get point table sorted in descending order by points
     point_table = None
@@ -1192,13 +1385,7 @@ def tournament_dashboard(request, tournament_id):
         point_table = PointTable.objects.filter(tournament=tournament).select_related('player').order_by('-points')
     
     # Determine if the current user is the host
-    is_host = False
-    if request.user.is_authenticated:
-        try:
-            host_profile = HostProfile.objects.get(user=request.user)
-            is_host = (tournament.created_by == host_profile)
-        except HostProfile.DoesNotExist:
-            is_host = False
+    is_host = is_host_of(request, tournament)
             
     # Check tournament status
     is_tournament_full = (current_player_count == tournament.num_participants)
@@ -1211,20 +1398,7 @@ def tournament_dashboard(request, tournament_id):
     # Hosts cannot leave their own tournaments
     can_leave = False
     if request.user.is_authenticated:
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-        except UserProfile.DoesNotExist:
-            # Create UserProfile if it doesn't exist
-            user_profile = UserProfile.objects.create(user=request.user)
-        
-        # Check if user is the host - hosts cannot leave their own tournaments
-        is_host = False
-        try:
-            host_profile = HostProfile.objects.get(user=request.user)
-            if tournament.created_by == host_profile:
-                is_host = True
-        except HostProfile.DoesNotExist:
-            pass
+        user_profile = ensure_user_profile(request)
         
         # Only allow leave if user is NOT the host
         if not is_host:
@@ -1256,15 +1430,11 @@ def tournament_dashboard(request, tournament_id):
     # Check if current user has a pending leave request
     user_has_pending_request = False
     if request.user.is_authenticated:
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-            user_has_pending_request = LeaveRequest.objects.filter(
-                tournament=tournament,
-                user_profile=user_profile,
-                status='pending'
-            ).exists()
-        except UserProfile.DoesNotExist:
-            pass
+        user_has_pending_request = LeaveRequest.objects.filter(
+            tournament=tournament,
+            user_profile=user_profile,
+            status='pending'
+        ).exists()
     
     # Get pending payments for hosts to approve
     pending_payments = []
@@ -1277,24 +1447,24 @@ def tournament_dashboard(request, tournament_id):
     # Check if current user has pending payment
     user_payment_status = None
     if request.user.is_authenticated and not is_host:
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-            user_payment = Payment.objects.filter(
-                tournament=tournament,
-                user_profile=user_profile
-            ).order_by('-created_at').first()
-            if user_payment:
-                user_payment_status = user_payment.status
-        except UserProfile.DoesNotExist:
-            pass
+        user_payment = Payment.objects.filter(
+            tournament=tournament,
+            user_profile=user_profile
+        ).order_by('-created_at').first()
+        if user_payment:
+            user_payment_status = user_payment.status
     
+    if tournament.is_finished and not snapshots.has_snapshot(tournament.id):
+        snapshots.write_snapshot(tournament)
+
     return render(request, 'tournament_dashboard.html', {
         'tournament': tournament,
         'participants': participants,
         'matches': matches,
         'point_table': point_table,
+        'has_matches': has_matches,
         # Knockout stages grouped by round_number (labelled)
-        'knockout_stages': build_knockout_stages(tournament) if tournament.match_type == 'knockout' else None,
+        'knockout_stages': SimpleLazyObject(lambda: build_knockout_stages(tournament)) if tournament.match_type == 'knockout' else None,
         'is_host': is_host,
         'is_tournament_full': is_tournament_full,
         'remaining_slots': remaining_slots,
@@ -1312,12 +1482,7 @@ def regenerate_fixtures(request, tournament_id):
     """Regenerate all fixtures for the tournament from scratch"""
     tournament = get_object_or_404(Tournament, id=tournament_id)
 
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, "You are not authorized to regenerate fixtures for this tournament.")
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    if not is_host_of(request, tournament):
         messages.error(request, "You are not authorized to regenerate fixtures for this tournament.")
         return redirect('tournament_dashboard', tournament_id=tournament.id)
 
@@ -1326,10 +1491,9 @@ def regenerate_fixtures(request, tournament_id):
         players = list(Player.objects.filter(tournament=tournament))
         player_count = len(players)
         
-        print(f"[REGENERATE DEBUG] Tournament: {tournament.name}")
-        print(f"[REGENERATE DEBUG] Player count: {player_count}")
-        print(f"[REGENERATE DEBUG] Required participants: {tournament.num_participants}")
-        print(f"[REGENERATE DEBUG] Match type: {tournament.match_type}")
+        log_extra = {'tournament_id': tournament.id}
+        logger.debug('Regenerating %s fixtures for %s/%s players', tournament.match_type, player_count,
+                     tournament.num_participants, extra=log_extra)
         
         # Check if we have enough players
         if player_count < 2:
@@ -1337,11 +1501,11 @@ def regenerate_fixtures(request, tournament_id):
             return redirect('tournament_dashboard', tournament_id=tournament.id)
         
         # Delete all existing matches (will regenerate from scratch)
-        existing_count = Match.objects.filter(tournament=tournament).count()
-        Match.objects.filter(tournament=tournament).delete()
-        print(f"[REGENERATE DEBUG] Deleted {existing_count} existing matches")
+        _, deleted = Match.objects.filter(tournament=tournament).delete()
+        logger.debug('Deleted %s existing matches', deleted.get(Match._meta.label, 0), extra=log_extra)
         
         # Generate new fixtures based on tournament type
+        started = time.perf_counter()
         try:
             if tournament.match_type == 'knockout':
                 # Check if player count is power of 2
@@ -1349,7 +1513,6 @@ def regenerate_fixtures(request, tournament_id):
                     messages.error(request, f"Knockout tournaments require a power of 2 players (2, 4, 8, 16...). You have {player_count} players.")
                     return redirect('tournament_dashboard', tournament_id=tournament.id)
                 
-                print(f"[REGENERATE DEBUG] Generating knockout fixtures")
                 fixture_pairs = generate_knockout_fixtures(players[:])
                 
                 # Determine stage based on number of matches
@@ -1363,8 +1526,6 @@ def regenerate_fixtures(request, tournament_id):
                 else:
                     stage = 'KNOCKOUT'
                 
-                print(f"[REGENERATE DEBUG] Creating {num_matches} matches with stage: {stage}")
-                
                 for p1, p2 in fixture_pairs:
                     Match.objects.create(
                         tournament=tournament,
@@ -1374,11 +1535,11 @@ def regenerate_fixtures(request, tournament_id):
                         round_number=1,
                         scheduled_time=None
                     )
-                print(f"[REGENERATE DEBUG] Created {len(fixture_pairs)} knockout matches")
+                logger.info('Regenerated %s %s matches', num_matches, stage,
+                            extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                 messages.success(request, f"Successfully generated {len(fixture_pairs)} knockout fixtures for {player_count} players!")
                 
             elif tournament.match_type == 'league':
-                print(f"[REGENERATE DEBUG] Generating league fixtures")
                 player_names = [p.name for p in players]
                 fixture_pairs = generate_league_fixtures(player_names)
                 name_to_player = {p.name: p for p in players}
@@ -1392,12 +1553,13 @@ def regenerate_fixtures(request, tournament_id):
                         round_number=1,
                         scheduled_time=None
                     )
-                print(f"[REGENERATE DEBUG] Created {len(fixture_pairs)} league matches")
+                logger.info('Regenerated %s league matches', len(fixture_pairs),
+                            extra=dict(log_extra, duration_ms=(time.perf_counter() - started) * 1000))
                 messages.success(request, f"Successfully generated {len(fixture_pairs)} league fixtures for {player_count} players!")
             
         except Exception as e:
             messages.error(request, f"Error generating fixtures: {str(e)}")
-            print(f"[REGENERATE DEBUG] Error: {e}")
+            logger.exception('Error regenerating fixtures', extra=log_extra)
     
     return redirect('tournament_dashboard', tournament_id=tournament.id)
 
@@ -1408,19 +1570,23 @@ def toggle_tournament_status(request, tournament_id):
     tournament = get_object_or_404(Tournament, id=tournament_id)
     
     # Check if user is the host
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, "You are not authorized to change tournament status.")
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    if not is_host_of(request, tournament):
         messages.error(request, "You are not authorized to change tournament status.")
         return redirect('tournament_dashboard', tournament_id=tournament.id)
     
     if request.method == 'POST':
-        # Toggle the finished status
+        from django.utils import timezone
+        # Toggle the finished status; reopening brings archived rows back to the primary first
+        if tournament.is_finished and tournament.archived_at:
+            archive.restore_tournament(tournament)
         tournament.is_finished = not tournament.is_finished
+        tournament.finished_at = timezone.now() if tournament.is_finished else None
         tournament.save()
+        # Finished tournaments are frozen: render them once to static files (reopening drops them)
+        if tournament.is_finished:
+            snapshots.write_snapshot(tournament)
+        else:
+            snapshots.delete_snapshot(tournament.id)
         
         status_text = "finished" if tournament.is_finished else "active"
         messages.success(request, f'Tournament "{tournament.name}" has been marked as {status_text}.')
@@ -1428,18 +1594,82 @@ def toggle_tournament_status(request, tournament_id):
     return redirect('tournament_dashboard', tournament_id=tournament.id)
 
 
+@login_required
+def schedule_matches(request, tournament_id):
+    """Allow host to assign a time slot to every match of the tournament"""
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+
+    # Check if user is the host
+    if not is_host_of(request, tournament):
+        messages.error(request, "You are not authorized to schedule matches for this tournament.")
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+    if request.method == 'POST':
+        from django.utils import timezone
+        from django.utils.dateparse import parse_datetime
+
+        start = parse_datetime(request.POST.get('start', ''))
+        try:
+            slot_minutes = int(request.POST.get('slot_minutes', 60))
+            venues = int(request.POST.get('venues', 1))
+            rest_minutes = int(request.POST.get('rest_minutes', 0))
+        except ValueError:
+            start = None
+        if start is None or slot_minutes < 1 or venues < 1 or rest_minutes < 0:
+            messages.error(request, 'Please provide a valid start time, slot length, venue count and rest period.')
+            return redirect('tournament_dashboard', tournament_id=tournament.id)
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+
+        try:
+            changed = schedule_tournament(tournament, start, slot_minutes=slot_minutes, venues=venues, rest_minutes=rest_minutes)
+        except ValueError as e:
+            messages.error(request, f"Could not schedule matches: {e}")
+        else:
+            messages.success(request, f'Scheduled {changed} matches starting {start:%b %d, %Y %H:%M}.')
+
+    return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+
+@login_required
+def delay_match(request, match_id):
+    """Allow host to push a match back and re-plan only the matches it affects"""
+    match = get_object_or_404(Match, id=match_id)
+    tournament = match.tournament
+
+    # Check if user is the host
+    if not is_host_of(request, tournament):
+        messages.error(request, "You are not authorized to reschedule matches for this tournament.")
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+    if request.method == 'POST':
+        from datetime import timedelta
+
+        try:
+            delay_minutes = int(request.POST.get('delay_minutes', 0))
+        except ValueError:
+            delay_minutes = 0
+        if not match.scheduled_time or delay_minutes <= 0:
+            messages.error(request, 'Only scheduled matches can be delayed, by a positive number of minutes.')
+            return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+        try:
+            changed = replan_tournament(match, match.scheduled_time + timedelta(minutes=delay_minutes))
+        except ValueError as e:
+            messages.error(request, f"Could not re-plan the schedule: {e}")
+        else:
+            messages.success(request, f'Match delayed. {changed} match time(s) updated.')
+
+    return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+
 @login_required(login_url='login')
 def toggle_tournament_visibility(request, tournament_id):
     """Allow host to toggle tournament public/private status"""
     tournament = get_object_or_404(Tournament, id=tournament_id)
     
     # Check if user is the host
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, "You are not authorized to change tournament visibility.")
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    if not is_host_of(request, tournament):
         messages.error(request, "You are not authorized to change tournament visibility.")
         return redirect('tournament_dashboard', tournament_id=tournament.id)
     
@@ -1456,33 +1686,52 @@ def toggle_tournament_visibility(request, tournament_id):
 
 @login_required(login_url='login')
 def user_tournaments(request):
-    user_profile = UserProfile.objects.get(user=request.user)
-    host_profile = HostProfile.objects.filter(user=request.user).first()
-    # Only show one tournament per unique name (latest by id)
-    hosted_tournaments = []
+    user_profile = ensure_user_profile(request)
+    host_profile = request.host_profile or None
+    # Only show one tournament per unique name (latest by id); one query per page for each list
+    hosted = Tournament.objects.none()
     if host_profile:
-        seen_names = set()
-        
-        for t in Tournament.objects.filter(created_by=host_profile).order_by('-id'):
-            if t.name not in seen_names:
-                hosted_tournaments.append(t)
-                seen_names.add(t.name)
-    joined_tournaments = Tournament.objects.filter(
-        tournamentparticipant__user_profile=user_profile
-    ).exclude(created_by=host_profile).distinct()
+        hosted = Tournament.objects.filter(created_by=host_profile).latest_per_name()
+    joined = Tournament.objects.joined_by(user_profile).exclude(created_by=host_profile)
+    hosted_tournaments = Paginator(hosted.with_card_info().order_by('-id'), USER_TOURNAMENTS_PER_PAGE).get_page(
+        request.GET.get('hosted_page'))
+    joined_tournaments = Paginator(joined.with_card_info().order_by('-id'), USER_TOURNAMENTS_PER_PAGE).get_page(
+        request.GET.get('joined_page'))
+    # player_count only counts the primary's players; archived tournaments have theirs in the archive
+    for page in (hosted_tournaments, joined_tournaments):
+        page.object_list = list(page.object_list)
+        counts = archive.player_counts([t.id for t in page.object_list if t.archived_at])
+        for t in page.object_list:
+            t.player_count = counts.get(t.id, t.player_count)
+    # Deleted tournaments the host can still bring back
+    recently_deleted = Tournament.all_objects.filter(
+        created_by=host_profile, deleted_at__gt=purge.undo_cutoff()
+    ).order_by('-deleted_at') if host_profile else []
 
     
     if request.method == 'POST':
         tournament_id = request.POST.get('tournament_id')
         action = request.POST.get('action')
         if action == 'delete':
-            Tournament.objects.filter(id=tournament_id, created_by=host_profile).delete()
+            # Hidden at once; the rows are purged in the background once the undo window closes
+            tournament = Tournament.objects.filter(id=tournament_id, created_by=host_profile).first()
+            if tournament:
+                purge.soft_delete(tournament)
+                messages.success(request, f'"{tournament.name}" deleted. You can undo this for {settings.DELETE_UNDO_MINUTES} minutes.')
+            return redirect('user_tournaments')
+        elif action == 'undo_delete':
+            if host_profile and purge.undo_delete(tournament_id, host_profile):
+                messages.success(request, 'Tournament restored.')
+            else:
+                messages.error(request, 'This tournament can no longer be restored.')
+            return redirect('user_tournaments')
         elif action == 'update':
             return redirect('update_tournament', tournament_id=tournament_id)
 
     return render(request, 'user_tournaments.html', {
         'hosted_tournaments': hosted_tournaments,
         'joined_tournaments': joined_tournaments,
+        'recently_deleted': recently_deleted,
     })
 
 
@@ -1531,7 +1780,7 @@ def update_tournament(request, tournament_id):
     })
 
 
-
+@pagecache.cache_page
 def about(request):
     """Render the About page."""
     return render(request, 'about.html', {
@@ -1543,13 +1792,14 @@ def about(request):
         ]
     })
 
-
+@pagecache.cache_page
 def support(request):
     """Render the Support & Help page."""
     return render(request, 'support.html')
 
 
 @login_required(login_url='login')
+@replica_reads
 def public_tournaments(request):
     tournaments = Tournament.objects.filter(is_public=True, is_active=True)
 
@@ -1588,7 +1838,7 @@ def public_tournaments(request):
     # Add player count and status for each tournament
     tournaments_with_info = []
     for t in tournaments:
-        current_players = Player.objects.filter(tournament=t).count()
+        current_players = Player.objects.using(archive.db_for(t)).filter(tournament=t).count()
         capacity = t.num_participants
         is_full = current_players >= capacity
         
@@ -1628,9 +1878,8 @@ def leave_tournament(request, tournament_id):
     tournament = get_object_or_404(Tournament, id=tournament_id)
     
     # Check if user is authenticated and has a profile
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-    except UserProfile.DoesNotExist:
+    user_profile = request.user_profile
+    if not user_profile:
         messages.error(request, 'User profile not found.')
         return redirect('tournament_dashboard', tournament_id=tournament.id)
     
@@ -1713,6 +1962,7 @@ def leave_tournament(request, tournament_id):
                 reason=reason,
                 status='pending'
             )
+            metrics.inc('tournifyx_leave_requests_total', status='pending')
             
             messages.success(request, f'Your leave request has been submitted. The host will review it shortly.')
             return redirect('tournament_dashboard', tournament_id=tournament.id)
@@ -1727,14 +1977,13 @@ def approve_leave_request(request, request_id):
     tournament = leave_request.tournament
     
     # Check if user is the host
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, 'You are not authorized to approve leave requests for this tournament.')
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    host_profile = request.host_profile
+    if not host_profile:
         messages.error(request, 'You must be a host to approve leave requests.')
         return redirect('tournament_dashboard', tournament_id=tournament.id)
+    if tournament.created_by_id != host_profile.id:
+        messages.error(request, 'You are not authorized to approve leave requests for this tournament.')
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
     
     if request.method == 'POST':
         # Update the request status
@@ -1743,6 +1992,7 @@ def approve_leave_request(request, request_id):
         leave_request.reviewed_at = timezone.now()
         leave_request.reviewed_by = host_profile
         leave_request.save()
+        metrics.inc('tournifyx_leave_requests_total', status='approved')
         
         # Remove the player from the tournament
         player = leave_request.player
@@ -1776,14 +2026,13 @@ def reject_leave_request(request, request_id):
     tournament = leave_request.tournament
     
     # Check if user is the host
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, 'You are not authorized to reject leave requests for this tournament.')
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    host_profile = request.host_profile
+    if not host_profile:
         messages.error(request, 'You must be a host to reject leave requests.')
         return redirect('tournament_dashboard', tournament_id=tournament.id)
+    if tournament.created_by_id != host_profile.id:
+        messages.error(request, 'You are not authorized to reject leave requests for this tournament.')
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
     
     if request.method == 'POST':
         # Update the request status
@@ -1792,6 +2041,7 @@ def reject_leave_request(request, request_id):
         leave_request.reviewed_at = timezone.now()
         leave_request.reviewed_by = host_profile
         leave_request.save()
+        metrics.inc('tournifyx_leave_requests_total', status='rejected')
         
         messages.success(request, f'Leave request from {leave_request.player.name} has been rejected.')
         return redirect('tournament_dashboard', tournament_id=tournament.id)
@@ -1810,7 +2060,7 @@ def payment_page(request, tournament_id):
         return redirect('tournament_dashboard', tournament_id=tournament.id)
     
     # Get or create user profile
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+    user_profile = ensure_user_profile(request)
     
     # Check if user already paid
     existing_payment = Payment.objects.filter(
@@ -1838,7 +2088,7 @@ def initiate_payment(request, tournament_id):
         return redirect('payment_page', tournament_id=tournament_id)
     
     tournament = get_object_or_404(Tournament, id=tournament_id)
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+    user_profile = ensure_user_profile(request)
     
     # Check if already paid
     existing_payment = Payment.objects.filter(
@@ -1871,6 +2121,20 @@ def initiate_payment(request, tournament_id):
     request.session['pending_payment_id'] = payment.id
     request.session['pending_tournament_id'] = tournament.id
     
+    # Cards are charged on Stripe's hosted checkout page; its webhook completes the payment
+    if payment_method == 'card' and checkout.enabled():
+        try:
+            return redirect(checkout.start(
+                payment,
+                success_url=request.build_absolute_uri(reverse('payment_success', args=[tournament.id])),
+                cancel_url=request.build_absolute_uri(reverse('payment_cancel', args=[tournament.id])),
+            ))
+        except checkout.CheckoutUnavailable:
+            logger.exception('Could not open a Stripe checkout', extra={'tournament_id': tournament.id})
+            payments.transition(payment, 'fail')
+            messages.error(request, 'Card payments are unavailable right now. Please try again or choose another method.')
+            return redirect('payment_page', tournament_id=tournament.id)
+    
     # Redirect to payment confirmation page
     return redirect('payment_confirmation', payment_id=payment.id)
 
@@ -1894,18 +2158,17 @@ def payment_confirmation(request, payment_id):
         sender_number = request.POST.get('sender_number', '')
         trx_id = request.POST.get('trx_id', '')
         
-        # Update payment record
-        payment.gateway_transaction_id = trx_id
-        payment.payment_details = {
-            'sender_number': sender_number,
-            'transaction_id': trx_id,
-            'payment_method': payment.payment_method,
-        }
-        payment.status = 'pending_approval'  # Changed from 'completed' to 'pending_approval'
-        
-        from django.utils import timezone
-        payment.completed_at = timezone.now()
-        payment.save()
+        # Hand the payment to the host for review, unless it was approved meanwhile
+        try:
+            payments.submit(payment, trx_id, sender_number)
+        except payments.InvalidTransition:
+            messages.info(request, 'This payment has already been completed.')
+            return redirect('tournament_dashboard', tournament_id=payment.tournament.id)
+        except payments.DuplicateTransaction:
+            metrics.inc('tournifyx_duplicate_transactions_total', method=payment.payment_method)
+            logger.warning('Reused transaction ID submitted', extra={'tournament_id': payment.tournament_id})
+            messages.error(request, 'This transaction ID has already been used for another payment. Please check it and try again.')
+            return redirect('payment_confirmation', payment_id=payment.id)
         
         messages.info(request, f'Payment information submitted! Transaction ID: {payment.transaction_id}. The tournament host will verify your payment and approve your entry.')
         
@@ -1924,19 +2187,26 @@ def payment_confirmation(request, payment_id):
 def payment_success(request, tournament_id):
     """Payment success callback"""
     tournament = get_object_or_404(Tournament, id=tournament_id)
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+    user_profile = ensure_user_profile(request)
     
     # Get payment from session
     payment_id = request.session.get('pending_payment_id')
     if payment_id:
-        payment = Payment.objects.filter(id=payment_id).first()
-        if payment:
-            payment.status = 'completed'
+        payment = Payment.objects.filter(id=payment_id, user_profile=user_profile).first()
+        if payment and checkout.is_stripe_checkout(payment):
+            # Anyone can open this URL; only Stripe's signed webhook completes the payment
+            if payment.status == 'completed':
+                messages.success(request, 'Payment successful! You can now join the tournament.')
+            else:
+                messages.info(request, 'Thanks! Your card payment is being confirmed; you can join as soon as it is.')
+        elif payment:
             from django.utils import timezone
-            payment.completed_at = timezone.now()
-            payment.save()
-            
-            messages.success(request, 'Payment successful! You can now join the tournament.')
+            try:
+                payments.transition(payment, 'complete', completed_at=timezone.now())
+                messages.success(request, 'Payment successful! You can now join the tournament.')
+            except payments.InvalidTransition:
+                # A repeated callback, or the payment was cancelled meanwhile
+                messages.info(request, 'This payment has already been processed.')
             del request.session['pending_payment_id']
             if 'pending_tournament_id' in request.session:
                 del request.session['pending_tournament_id']
@@ -1954,8 +2224,10 @@ def payment_cancel(request, tournament_id):
     if payment_id:
         payment = Payment.objects.filter(id=payment_id).first()
         if payment:
-            payment.status = 'cancelled'
-            payment.save()
+            try:
+                payments.transition(payment, 'cancel')
+            except payments.InvalidTransition:
+                pass  # Already submitted or completed; nothing to cancel
             
             del request.session['pending_payment_id']
             if 'pending_tournament_id' in request.session:
@@ -1965,6 +2237,17 @@ def payment_cancel(request, tournament_id):
     return redirect('public_tournaments')
 
 
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    """Store Stripe's signed event and acknowledge at once; process_stripe_events applies it."""
+    try:
+        checkout.receive(request.body, request.headers.get('Stripe-Signature', ''))
+    except checkout.InvalidWebhook:
+        return HttpResponse(status=400)
+    return HttpResponse(status=200)
+
+
 @login_required(login_url='login')
 def approve_payment(request, payment_id):
     """Approve a payment (host only)"""
@@ -1972,111 +2255,35 @@ def approve_payment(request, payment_id):
     tournament = payment.tournament
     
     # Check if user is the host
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, 'You are not authorized to approve payments for this tournament.')
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    host_profile = request.host_profile
+    if not host_profile:
         messages.error(request, 'You must be a host to approve payments.')
         return redirect('tournament_dashboard', tournament_id=tournament.id)
+    if tournament.created_by_id != host_profile.id:
+        messages.error(request, 'You are not authorized to approve payments for this tournament.')
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
     
     if request.method == 'POST':
-        if payment.status != 'pending_approval':
+        try:
+            player, fixtures = payments.approve(payment)
+        except payments.InvalidTransition:
             messages.error(request, 'This payment is not pending approval.')
             return redirect('tournament_dashboard', tournament_id=tournament.id)
-        
-        # Update payment status
-        payment.status = 'completed'
-        from django.utils import timezone
-        payment.completed_at = timezone.now()
-        payment.save()
-        
-        # Check if user is already a participant
-        user_profile = payment.user_profile
-        already_joined = TournamentParticipant.objects.filter(
-            tournament=tournament,
-            user_profile=user_profile
-        ).exists()
-        
-        if not already_joined:
-            # Check if tournament is full
-            current_players = Player.objects.filter(tournament=tournament).count()
-            if current_players >= tournament.num_participants:
-                messages.error(request, 'Cannot approve - tournament is full.')
-                payment.status = 'pending_approval'
-                payment.save()
-                return redirect('tournament_dashboard', tournament_id=tournament.id)
-            
-            # Create the player
-            new_player = Player.objects.create(
-                tournament=tournament,
-                name=user_profile.user.username,
-                team_name=user_profile.user.username,
-                added_by=None,
-                user_profile=user_profile
-            )
-            
-            # Link payment to player
-            payment.player = new_player
-            payment.save()
-            
-            # Add TournamentParticipant entry
-            TournamentParticipant.objects.get_or_create(
-                tournament=tournament,
-                user_profile=user_profile
-            )
-            
-            # Check if tournament is now full and generate fixtures
-            current_players = Player.objects.filter(tournament=tournament)
-            count = current_players.count()
-            
-            if count == tournament.num_participants:
-                existing_matches = Match.objects.filter(tournament=tournament)
-                
-                if not existing_matches.exists():
-                    if tournament.match_type == 'knockout':
-                        if count >= 2 and (count & (count - 1)) == 0:
-                            fixture_pairs = generate_knockout_fixtures(list(current_players))
-                            num_matches = len(fixture_pairs)
-                            if num_matches == 1:
-                                stage = 'FINAL'
-                            elif num_matches == 2:
-                                stage = 'SEMI'
-                            elif num_matches == 4:
-                                stage = 'QUARTER'
-                            else:
-                                stage = 'KNOCKOUT'
-                            
-                            for p1, p2 in fixture_pairs:
-                                Match.objects.create(
-                                    tournament=tournament,
-                                    player1=p1,
-                                    player2=p2,
-                                    stage=stage,
-                                    round_number=1,
-                                    scheduled_time=None
-                                )
-                            messages.success(request, f'Payment approved! {user_profile.user.username} has been added to the tournament. Fixtures have been generated.')
-                    elif tournament.match_type == 'league' and count >= 2:
-                        fixture_pairs = generate_league_fixtures([p.name for p in current_players])
-                        name_to_player = {p.name: p for p in current_players}
-                        for p1_name, p2_name in fixture_pairs:
-                            Match.objects.create(
-                                tournament=tournament,
-                                player1=name_to_player[p1_name],
-                                player2=name_to_player[p2_name],
-                                stage='GROUP',
-                                round_number=1,
-                                scheduled_time=None
-                            )
-                        messages.success(request, f'Payment approved! {user_profile.user.username} has been added to the tournament. Fixtures have been generated.')
-                else:
-                    messages.success(request, f'Payment approved! {user_profile.user.username} has been added to the tournament.')
-            else:
-                messages.success(request, f'Payment approved! {user_profile.user.username} has been added to the tournament.')
+        except payments.TournamentFull:
+            messages.error(request, 'Cannot approve - tournament is full.')
+            return redirect('tournament_dashboard', tournament_id=tournament.id)
+        except payments.TournamentGone:
+            messages.error(request, 'Cannot approve - this tournament has been deleted.')
+            return redirect('user_tournaments')
+        metrics.inc('tournifyx_payments_reviewed_total', decision='approved')
+
+        username = payment.user_profile.user.username
+        if player is None:
+            messages.success(request, f'Payment approved for {username}.')
+        elif fixtures:
+            messages.success(request, f'Payment approved! {username} has been added to the tournament. Fixtures have been generated.')
         else:
-            messages.success(request, f'Payment approved for {user_profile.user.username}.')
+            messages.success(request, f'Payment approved! {username} has been added to the tournament.')
     
     return redirect('tournament_dashboard', tournament_id=tournament.id)
 
@@ -2088,24 +2295,93 @@ def reject_payment(request, payment_id):
     tournament = payment.tournament
     
     # Check if user is the host
-    try:
-        host_profile = HostProfile.objects.get(user=request.user)
-        if tournament.created_by != host_profile:
-            messages.error(request, 'You are not authorized to reject payments for this tournament.')
-            return redirect('tournament_dashboard', tournament_id=tournament.id)
-    except HostProfile.DoesNotExist:
+    host_profile = request.host_profile
+    if not host_profile:
         messages.error(request, 'You must be a host to reject payments.')
         return redirect('tournament_dashboard', tournament_id=tournament.id)
+    if tournament.created_by_id != host_profile.id:
+        messages.error(request, 'You are not authorized to reject payments for this tournament.')
+        return redirect('tournament_dashboard', tournament_id=tournament.id)
     
     if request.method == 'POST':
-        if payment.status != 'pending_approval':
+        try:
+            payments.transition(payment, 'reject')
+        except payments.InvalidTransition:
             messages.error(request, 'This payment is not pending approval.')
             return redirect('tournament_dashboard', tournament_id=tournament.id)
-        
-        # Update payment status
-        payment.status = 'rejected'
-        payment.save()
+        metrics.inc('tournifyx_payments_reviewed_total', decision='rejected')
         
         messages.warning(request, f'Payment from {payment.user_profile.user.username} has been rejected.')
     
     return redirect('tournament_dashboard', tournament_id=tournament.id)
+
+
+@login_required(login_url='login')
+def payment_queue(request):
+    """Payments across all of the host's tournaments, filterable, with bulk approve/reject."""
+    host_profile = request.host_profile
+    if not host_profile:
+        messages.error(request, 'You must be a host to review payments.')
+        return redirect('user_tournaments')
+
+    # Any other payment carrying the same gateway id points at a reused or forged receipt
+    same_gateway_id = Payment.objects.filter(
+        gateway_transaction_id=models.OuterRef('gateway_transaction_id')
+    ).exclude(pk=models.OuterRef('pk')).exclude(gateway_transaction_id='')
+    # The relation skips Tournament's live manager: leave out deleted tournaments explicitly
+    host_payments = Payment.objects.filter(tournament__created_by=host_profile, tournament__deleted_at__isnull=True).annotate(
+        has_duplicate=models.Exists(same_gateway_id)
+    )
+
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        selected = host_payments.filter(id__in=request.POST.getlist('payment_ids'))
+        if action == 'approve':
+            outcome = payments.approve_many(selected)
+            approved = len(outcome['approved'])
+            if approved:
+                metrics.inc('tournifyx_payments_reviewed_total', approved, decision='approved')
+                messages.success(request, f'{approved} payment(s) approved.')
+            if outcome['full']:
+                messages.error(request, f'{len(outcome["full"])} payment(s) left pending - tournament is full.')
+            if outcome['skipped']:
+                messages.warning(request, f'{len(outcome["skipped"])} payment(s) were already reviewed.')
+            if outcome['gone']:
+                messages.error(request, f'{len(outcome["gone"])} payment(s) left pending - their tournament was deleted.')
+        elif action == 'reject':
+            rejected = payments.reject_many(selected)
+            if rejected:
+                metrics.inc('tournifyx_payments_reviewed_total', rejected, decision='rejected')
+            messages.warning(request, f'{rejected} payment(s) rejected.')
+        # Back to the same filters and page
+        return redirect(request.get_full_path())
+
+    form = PaymentQueueFilterForm(request.GET, host_profile=host_profile)
+    queue = form.filter(host_payments).select_related('tournament', 'user_profile__user').order_by('created_at', 'id')
+    page = Paginator(queue, PAYMENT_QUEUE_PER_PAGE).get_page(request.GET.get('page'))
+    filter_query = request.GET.copy()
+    filter_query.pop('page', None)
+    return render(request, 'payment_queue.html', {
+        'form': form,
+        'page': page,
+        'filter_query': filter_query.urlencode(),
+    })
+
+
+@login_required(login_url='login')
+def payment_flags(request):
+    """Submissions to the host's tournaments whose transaction ID was reused or whose sender pays unusually often."""
+    host_profile = request.host_profile
+    if not host_profile:
+        messages.error(request, 'You must be a host to review payments.')
+        return redirect('user_tournaments')
+    hosted = Tournament.all_objects.filter(created_by=host_profile).values('id')
+    flagged = payments.flagged(SubmittedTransaction.objects.filter(tournament_id__in=hosted))
+    # Joined to tournaments, not payments: a payment may have been archived since
+    flagged = flagged.select_related('tournament').order_by('-submitted_at', '-id')
+    page = Paginator(flagged, PAYMENT_QUEUE_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'payment_flags.html', {
+        'page': page,
+        'velocity_limit': settings.PAYMENT_VELOCITY_LIMIT,
+        'velocity_hours': settings.PAYMENT_VELOCITY_HOURS,
+    })